@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, Security, Request
+from fastapi import Depends, HTTPException, Security, Request, WebSocket
 from fastapi.security import APIKeyHeader
 from typing import Optional
 from config.auth import auth_settings
@@ -25,6 +25,11 @@ async def verify_api_key(
     """为了保持向后兼容的API key验证函数"""
     return await verify_access(request, api_key)
 
+async def verify_websocket_api_key(websocket: WebSocket) -> bool:
+    """WebSocket 连接的 API key 验证：浏览器无法设置请求头，也接受 apikey 查询参数"""
+    api_key = websocket.headers.get("apikey") or websocket.query_params.get("apikey")
+    return await verify_access(websocket, api_key)
+
 async def verify_access(
     request: Request,
     api_key: Optional[str] = Security(api_key_header)
@@ -1,49 +1,332 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional, Dict
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional, Dict, Any, AsyncIterator
+import csv
+import io
+import json
 import logging
 import time
-from schemas.assets import AssetsCreate, AssetsResponse, AssetsFilter
+import orjson
+from pydantic import ValidationError
+from schemas.assets import (
+    AssetsCreate, AssetsResponse, AssetsFilter, AssetsBulkResult, AssetsIngestResult
+)
 from services.assets import AssetsService
+from database.repositories import read_from_primary, set_read_primary
+from services.ingest_queue import ingest_queue, IngestQueueFull
+from services.change_feed import change_feed, ChangeFeedFull
+from services.delete_jobs import delete_jobs
+from services.retention import partition_maintainer
+from services.pagination import encode_cursor, decode_cursor
+from services.query_builder import compile_filters, parse_fields, SELECTABLE_COLUMNS
+from services.facets import parse_group_by, FACET_COLUMNS, DEFAULT_FACET_LIMIT, MAX_FACET_LIMIT
+from services.delta import WatermarkExpired, DEFAULT_DELTA_LIMIT, MAX_DELTA_LIMIT
+from config.settings import settings
 from datetime import datetime, timedelta
-from ..auth import verify_api_key
+from ..auth import verify_api_key, verify_websocket_api_key
 
-router = APIRouter()
+async def read_consistency(
+    x_read_your_writes: bool = Header(default=False, description="为 true 时本次请求的读取走主库，可立即读到之前的写入")
+):
+    """按请求选择读路由：默认读只读副本，X-Read-Your-Writes: true 时读主库"""
+    set_read_primary(x_read_your_writes)
+
+# orjson 序列化，比默认的 json + jsonable_encoder 快得多
+router = APIRouter(default_response_class=ORJSONResponse, dependencies=[Depends(read_consistency)])
 
 logger = logging.getLogger(__name__)
 
 @router.post("/", response_model=AssetsResponse, dependencies=[Depends(verify_api_key)])
 async def create_asset(asset: AssetsCreate):
     """创建新的资产记录"""
+    if settings.WRITE_BEHIND_ENABLED:
+        # 写后模式：入队即返回，由后台任务按 (ip, port) 批量 upsert
+        try:
+            await ingest_queue.put(asset)
+        except IngestQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        return ORJSONResponse(
+            status_code=202,
+            content={"status": "accepted", "identifier": asset.identifier}
+        )
+
     try:
-        # 检查记录是否已存在
-        existing_asset = await AssetsService.get_asset_by_identifier(asset.identifier)
+        # 检查记录是否已存在（查主库，副本可能还没有刚写入的记录）
+        with read_from_primary():
+            existing_asset = await AssetsService.get_asset_by_identifier(asset.identifier)
         if existing_asset:
             raise HTTPException(status_code=400, detail="资产记录已存在")
             
         created_asset = await AssetsService.create_asset(asset)
-        return created_asset
+        # 直接输出，跳过 response_model 的逐字段校验
+        return ORJSONResponse(created_asset)
     except Exception as e:
         logger.error(f"创建资产失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk", response_model=AssetsBulkResult, dependencies=[Depends(verify_api_key)])
+async def bulk_create_assets(records: List[Dict[str, Any]] = Body(...)):
+    """批量创建资产记录，按 (ip, port) 存在则更新"""
+    if len(records) > settings.BULK_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"单次最多提交 {settings.BULK_MAX_RECORDS} 条记录"
+        )
+
+    valid_assets = []
+    valid_indexes = []
+    errors = []
+    for index, record in enumerate(records):
+        try:
+            valid_assets.append(AssetsCreate.model_validate(record))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            errors.append({"index": index, "error": str(e)})
+
+    try:
+        result = await AssetsService.bulk_upsert_assets(valid_assets)
+    except Exception as e:
+        logger.error(f"批量创建资产失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # 将批次错误的下标映射回原始请求中的位置
+    for error in result["errors"]:
+        error["index"] = valid_indexes[error["index"]]
+    result["rejected"] += len(errors)
+    result["errors"] = sorted(errors + result["errors"], key=lambda e: e["index"])
+    return result
+
+@router.post("/stream", response_model=AssetsIngestResult, dependencies=[Depends(verify_api_key)])
+async def stream_create_assets(request: Request):
+    """流式导入 NDJSON（每行一条资产记录），边接收边分批写入"""
+    try:
+        return await AssetsService.ingest_ndjson(request.stream())
+    except Exception as e:
+        logger.error(f"流式导入资产失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingest/stats", dependencies=[Depends(verify_api_key)])
+async def ingest_stats():
+    """写后队列深度与刷写耗时"""
+    return ingest_queue.stats()
+
+@router.get("/partitions/stats", dependencies=[Depends(verify_api_key)])
+async def partition_stats():
+    """分区维护状态"""
+    return partition_maintainer.stats()
+
+@router.get("/cache/stats", dependencies=[Depends(verify_api_key)])
+async def cache_stats():
+    """查询结果缓存统计"""
+    return AssetsService.cache_stats()
+
+@router.get("/stats", dependencies=[Depends(verify_api_key)])
+async def get_assets_stats(
+    group_by: str = Query(..., description=f"逗号分隔的统计维度，可选: {', '.join(FACET_COLUMNS)}"),
+    limit: int = Query(default=DEFAULT_FACET_LIMIT, ge=1, le=MAX_FACET_LIMIT, description="每个维度返回的分组数"),
+    filters: AssetsFilter = Depends()
+):
+    """按维度统计资产数量，每个维度按数量降序返回前 limit 个分组"""
+    try:
+        columns = parse_group_by(group_by)
+        result = await AssetsService.get_stats(columns, filters, limit)
+        return ORJSONResponse({"group_by": list(columns), **result})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取资产统计失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/stats/rebuild", dependencies=[Depends(verify_api_key)])
+async def rebuild_assets_stats():
+    """全量重建统计汇总表"""
+    started = time.perf_counter()
+    try:
+        groups = await AssetsService.rebuild_stats()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"groups": groups, "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
 @router.get("/", dependencies=[Depends(verify_api_key)])
 async def get_assets(
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=10000),
+    pagination: str = Query(default="offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(default=None, description="上一页返回的 next_cursor，传入即使用游标翻页"),
+    total: str = Query(default="exact", pattern="^(exact|estimate|none)$", description="总数计算方式"),
+    fields: Optional[str] = Query(default=None, description="逗号分隔的返回字段，默认全部"),
     filters: AssetsFilter = Depends()
 ):
-    """获取资产列表"""
+    """获取资产列表；pagination=cursor 或传入 cursor 时按 id 游标翻页"""
+    after_id = None
+    try:
+        columns = parse_fields(fields)
+        if cursor or pagination == "cursor":
+            after_id = decode_cursor(cursor) if cursor else 0
+            # 生成 next_cursor 需要 id
+            if columns and "id" not in columns:
+                columns = ("id",) + columns
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        total = await AssetsService.get_assets_count(filters)
-        items = await AssetsService.get_assets(skip=skip, limit=limit, filters=filters)
-        return {
-            "total": total,
+        count = None
+        if total != "none":
+            count = await AssetsService.get_assets_count(filters, mode=total)
+        # 游标翻页或 total=none 时多取一条，用于判断是否还有下一页
+        peek = total == "none" or after_id is not None
+        items = await AssetsService.get_assets(
+            skip=skip, limit=limit + 1 if peek else limit, filters=filters,
+            after_id=after_id, columns=columns
+        )
+        has_more = len(items) > limit
+        items = items[:limit]
+        response = {
+            "total": count,
             "items": items
         }
+        if total == "none":
+            response["has_more"] = has_more
+        if after_id is not None:
+            response["next_cursor"] = encode_cursor(items[-1]["id"]) if has_more else None
+        # 直接用 orjson 序列化，跳过 jsonable_encoder 对每条记录的遍历
+        return ORJSONResponse(response)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取资产列表失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _export_ndjson(filters: AssetsFilter, columns: Optional[tuple]) -> AsyncIterator[bytes]:
+    # 与列表接口（ORJSONResponse）同一序列化路径，字段格式一致
+    async for rows in AssetsService.iter_assets(filters, columns=columns):
+        yield b"".join(orjson.dumps(row, default=str) + b"\n" for row in rows)
+
+async def _export_csv(filters: AssetsFilter, columns: Optional[tuple]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns or SELECTABLE_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for rows in AssetsService.iter_assets(filters, columns=columns):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+@router.get("/export", dependencies=[Depends(verify_api_key)])
+async def export_assets(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(default=None, description="逗号分隔的导出字段，默认全部"),
+    filters: AssetsFilter = Depends()
+):
+    """流式导出全部符合条件的资产（NDJSON 或 CSV），内存占用与结果集大小无关"""
+    try:
+        # 开始输出前校验过滤条件和字段
+        compile_filters(filters)
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(filters, columns),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": "attachment; filename=assets.csv"}
+        )
+    return StreamingResponse(
+        _export_ndjson(filters, columns),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=assets.ndjson"}
+    )
+
+@router.get("/delta", dependencies=[Depends(verify_api_key)])
+async def get_assets_delta(
+    watermark: Optional[str] = Query(default=None, description="上一次同步返回的 watermark"),
+    updated_since: Optional[str] = Query(default=None, description="首次同步的起始时间（没有 watermark 时使用），默认从头读取"),
+    limit: int = Query(default=DEFAULT_DELTA_LIMIT, ge=1, le=MAX_DELTA_LIMIT, description="新增/更新与删除各最多返回的条数"),
+    filters: AssetsFilter = Depends()
+):
+    """增量同步：返回水位之后新增或更新的符合条件的资产（items）、被删除的资产（deleted）、
+    删除过期分区产生的截断点（cutoffs，lastupdatetime 早于 before 的资产均已删除）和新的水位；
+    has_more 为 true 时用新水位继续读取。同一组过滤条件应一直使用同一个水位；
+    水位早于墓碑保留期时返回 410，需要全量重新同步"""
+    if watermark and updated_since:
+        raise HTTPException(status_code=400, detail="watermark 与 updated_since 不能同时使用")
+    try:
+        return ORJSONResponse(await AssetsService.get_delta(filters, watermark, updated_since, limit))
+    except WatermarkExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"增量同步失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _feed_event(event: Dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False, default=str)
+
+async def _feed_sse(request: Request, subscription) -> AsyncIterator[bytes]:
+    try:
+        yield b": connected\n\n"
+        async for event in subscription.events(settings.CHANGE_FEED_HEARTBEAT):
+            if event is None:
+                if await request.is_disconnected():
+                    break
+                yield b": ping\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {_feed_event(event)}\n\n".encode()
+    finally:
+        change_feed.unsubscribe(subscription)
+
+@router.get("/feed", dependencies=[Depends(verify_api_key)])
+async def assets_feed(request: Request, filters: AssetsFilter = Depends()):
+    """Server-Sent Events 推送新增/更新（created、upserted）和删除（deleted）的资产，可按列表接口的条件过滤；
+    消费过慢时收到 dropped 事件后连接关闭，客户端应重新订阅并用列表接口补齐"""
+    try:
+        subscription = change_feed.subscribe(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChangeFeedFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return StreamingResponse(
+        _feed_sse(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/feed/ws")
+async def assets_feed_ws(websocket: WebSocket, filters: AssetsFilter = Depends()):
+    """WebSocket 推送，事件内容与 GET /feed 相同，每条消息一个 JSON 事件"""
+    try:
+        await verify_websocket_api_key(websocket)
+        subscription = change_feed.subscribe(filters)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    except ChangeFeedFull as e:
+        await websocket.close(code=1013, reason=str(e))  # 1013: Try Again Later
+        return
+    try:
+        await websocket.accept()
+        async for event in subscription.events(settings.CHANGE_FEED_HEARTBEAT):
+            # 空闲时发送心跳，连接已断开时发送失败即退出
+            await websocket.send_text(_feed_event(event or {"type": "ping"}))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        change_feed.unsubscribe(subscription)
+
+@router.get("/feed/stats", dependencies=[Depends(verify_api_key)])
+async def feed_stats():
+    """变更推送订阅者数量与投递/断开统计"""
+    return change_feed.stats()
+
 @router.delete("/", dependencies=[Depends(verify_api_key)])
 async def delete_assets(
     title: Optional[str] = None,
@@ -51,26 +334,62 @@ async def delete_assets(
     day: Optional[int] = None,
     before: Optional[str] = None,
     country_name: Optional[str] = None,
-    region: Optional[str] = None
+    region: Optional[str] = None,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=100000, description="每批删除条数"),
+    wait: bool = Query(default=False, description="等待删除完成后返回")
 ):
-    """通过title, search_engine, day, before, country_name, region参数删除资产"""
+    """通过title, search_engine, day, before, country_name, region参数删除资产；在后台按主键分批删除，返回任务信息"""
+    # 计算day参数的日期限制
+    date_limit = None
+    if day is not None:
+        date_limit = datetime.now() - timedelta(days=day)
+    conditions = {
+        "title": title,
+        "search_engine": search_engine,
+        "before": before,
+        "date_limit": date_limit,
+        "country_name": country_name,
+        "region": region
+    }
     try:
-        # 计算day参数的日期限制
-        date_limit = None
-        if day is not None:
-            date_limit = datetime.now() - timedelta(days=day)
-        
-        deleted_count = await AssetsService.delete_assets(
-            title=title,
-            search_engine=search_engine,
-            before=before,
-            date_limit=date_limit,
-            country_name=country_name,
-            region=region
-        )
-        return {"deleted_count": deleted_count}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        compiled = compile_filters(**conditions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job = delete_jobs.submit(
+        compiled,
+        {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in conditions.items() if v is not None},
+        batch_size=batch_size
+    )
+    if wait:
+        await delete_jobs.wait(job.id)
+        if job.status == 'failed':
+            raise HTTPException(status_code=500, detail=job.error)
+        return job.to_dict()
+    return ORJSONResponse(job.to_dict(), status_code=202)
+
+@router.get("/delete-jobs", dependencies=[Depends(verify_api_key)])
+async def list_delete_jobs():
+    """删除任务列表（最近的在前）"""
+    return delete_jobs.list()
+
+@router.get("/delete-jobs/{job_id}", dependencies=[Depends(verify_api_key)])
+async def get_delete_job(job_id: str):
+    """删除任务进度"""
+    job = delete_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="删除任务不存在")
+    return job.to_dict()
+
+@router.delete("/delete-jobs/{job_id}", dependencies=[Depends(verify_api_key)])
+async def cancel_delete_job(job_id: str):
+    """取消删除任务，当前批次完成后停止"""
+    job = delete_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="删除任务不存在")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"删除任务已结束: {job.status}")
+    return job.to_dict()
 
 @router.get("/test-connection", dependencies=[Depends(verify_api_key)])
 async def test_connection():
@@ -78,10 +397,12 @@ async def test_connection():
     from database.connection import get_db
     try:
         db = get_db()
-        conn = db.get_connection()
-        if hasattr(conn, 'table'):
-            return {"status": "success", "connection": "Supabase"}
-        else:
-            return {"status": "success", "connection": "MySQL"}
+        repository = db.repository
+        await repository.ping()
+        result = {"status": "success", "connection": repository.name}
+        stats = repository.stats()
+        if stats is not None:
+            result["pool"] = stats
+        return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
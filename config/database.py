@@ -19,6 +19,71 @@ class DatabaseConfig:
             'port': int(os.getenv('DB_PORT', 3306))
         }
 
+    @staticmethod
+    def get_mysql_pool_config() -> Dict[str, float]:
+        return {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'acquire_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+            'ping_interval': float(os.getenv('DB_POOL_PING_INTERVAL', 30))
+        }
+
+    @staticmethod
+    def get_supabase_http_config() -> Dict[str, any]:
+        """Supabase（PostgREST）HTTP 传输：连接池、HTTP/2、超时、批量写入和并行读取"""
+        return {
+            'http2': os.getenv('SUPABASE_HTTP2', 'true').lower() == 'true',
+            'max_connections': int(os.getenv('SUPABASE_MAX_CONNECTIONS', 20)),
+            'max_keepalive': int(os.getenv('SUPABASE_MAX_KEEPALIVE', 10)),
+            'keepalive_expiry': float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', 60)),
+            'timeout': float(os.getenv('SUPABASE_TIMEOUT', 30)),
+            'connect_timeout': float(os.getenv('SUPABASE_CONNECT_TIMEOUT', 5)),
+            'read_chunk_size': int(os.getenv('SUPABASE_READ_CHUNK_SIZE', 1000)),
+            'parallel_reads': int(os.getenv('SUPABASE_PARALLEL_READS', 4)),
+            'insert_batch_size': int(os.getenv('SUPABASE_INSERT_BATCH_SIZE', 100)),
+            'insert_batch_delay': float(os.getenv('SUPABASE_INSERT_BATCH_DELAY', 0.005))
+        }
+
+    @staticmethod
+    def get_sqlite_config() -> Dict[str, any]:
+        return {
+            'path': os.getenv('SQLITE_PATH', 'data/assets.db'),
+            'readers': int(os.getenv('SQLITE_READERS', 4)),
+            'busy_timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 5)),
+            'cache_size_kb': int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+        }
+
+    @staticmethod
+    def get_partition_config() -> Dict[str, any]:
+        """assets 表按 lastupdatetime 范围分区（仅 MySQL）：none / monthly / daily"""
+        return {
+            'mode': os.getenv('ASSETS_PARTITIONING', 'none').lower(),
+            'premake': int(os.getenv('ASSETS_PARTITION_PREMAKE', 3)),
+            'retention_days': int(os.getenv('ASSETS_RETENTION_DAYS', 0)),  # 0 表示不自动清理
+            'interval': float(os.getenv('ASSETS_PARTITION_INTERVAL', 3600))
+        }
+
+    @staticmethod
+    def get_replica_config() -> Dict[str, any]:
+        """只读副本，逗号分隔：MySQL 为 host[:port]（账号与主库相同），Supabase 为副本 API 地址，SQLite 为数据库文件路径"""
+        return {
+            'hosts': [h.strip() for h in os.getenv('DB_READ_REPLICAS', '').split(',') if h.strip()],
+            'strategy': os.getenv('DB_REPLICA_STRATEGY', 'round_robin').lower(),  # round_robin | least_busy
+            'max_lag': float(os.getenv('DB_REPLICA_MAX_LAG', 5)),  # 秒，超过后读请求回退主库
+            'lag_check_interval': float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+        }
+
+    @staticmethod
+    def get_backend() -> str:
+        """存储后端：auto（优先 Supabase，失败使用 MySQL）/ supabase / mysql / sqlite"""
+        backend = os.getenv('DB_BACKEND', 'auto').lower()
+        if backend not in ('auto', 'supabase', 'mysql', 'sqlite'):
+            logger.warning(f"未知的 DB_BACKEND: {backend}，使用 auto")
+            return 'auto'
+        return backend
+
     @staticmethod
     def get_supabase_config() -> Optional[Dict[str, str]]:
         url = os.getenv('SUPABASE_URL')
@@ -36,7 +101,13 @@ class DatabaseConfig:
 
 # 实例化配置
 MYSQL_CONFIG = DatabaseConfig.get_mysql_config()
+MYSQL_POOL_CONFIG = DatabaseConfig.get_mysql_pool_config()
+SQLITE_CONFIG = DatabaseConfig.get_sqlite_config()
+DB_BACKEND = DatabaseConfig.get_backend()
+PARTITION_CONFIG = DatabaseConfig.get_partition_config()
+REPLICA_CONFIG = DatabaseConfig.get_replica_config()
 SUPABASE_CONFIG = DatabaseConfig.get_supabase_config()
+SUPABASE_HTTP_CONFIG = DatabaseConfig.get_supabase_http_config()
 
 # 日志输出当前配置
 logger.info(f"MySQL 主机: {MYSQL_CONFIG['host']}")
@@ -9,7 +9,52 @@ class Settings(BaseSettings):
     MAX_RECORDS_PER_REQUEST: int = int(os.getenv('MAX_RECORDS_PER_REQUEST', 10000))
     MAX_TOTAL_RECORDS: int = int(os.getenv('MAX_TOTAL_RECORDS', 100000))
     LARGE_REQUEST_TIMEOUT: int = int(os.getenv('LARGE_REQUEST_TIMEOUT', 300))
+    # 批量写入
+    BULK_MAX_RECORDS: int = int(os.getenv('BULK_MAX_RECORDS', 50000))
+    BULK_BATCH_SIZE: int = int(os.getenv('BULK_BATCH_SIZE', 1000))
+    # NDJSON 流式导入
+    NDJSON_MAX_LINE_BYTES: int = int(os.getenv('NDJSON_MAX_LINE_BYTES', 1024 * 1024))
+    NDJSON_MAX_ERRORS: int = int(os.getenv('NDJSON_MAX_ERRORS', 1000))
+    # 查询结果缓存（列表/计数/标识符查询），写入后自动失效
+    RESULT_CACHE_ENABLED: bool = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_TTL: int = int(os.getenv('RESULT_CACHE_TTL', 300))
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    # 流式导出
+    EXPORT_CHUNK_SIZE: int = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    # 写后（write-behind）模式：POST /assets/ 入队后立即返回 202，由后台任务批量落库
+    WRITE_BEHIND_ENABLED: bool = os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+    WRITE_BEHIND_QUEUE_SIZE: int = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 50000))
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 1000))
+    WRITE_BEHIND_FLUSH_INTERVAL: float = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 1.0))
+    WRITE_BEHIND_BACKPRESSURE: str = os.getenv('WRITE_BEHIND_BACKPRESSURE', 'reject')  # block | reject
+    WRITE_BEHIND_BLOCK_TIMEOUT: float = float(os.getenv('WRITE_BEHIND_BLOCK_TIMEOUT', 5.0))
+    WRITE_BEHIND_DRAIN_TIMEOUT: float = float(os.getenv('WRITE_BEHIND_DRAIN_TIMEOUT', 30.0))
+    # 落库失败时重试次数，等待时间从 RETRY_BACKOFF 秒起逐次翻倍；仍失败的记录逐行追加到死信文件（NDJSON，
+    # 可直接用 POST /assets/stream 重新导入），路径为空或写入失败时逐条记录到错误日志
+    WRITE_BEHIND_RETRY_ATTEMPTS: int = int(os.getenv('WRITE_BEHIND_RETRY_ATTEMPTS', 3))
+    WRITE_BEHIND_RETRY_BACKOFF: float = float(os.getenv('WRITE_BEHIND_RETRY_BACKOFF', 0.5))
+    WRITE_BEHIND_DEAD_LETTER_PATH: str = os.getenv('WRITE_BEHIND_DEAD_LETTER_PATH', 'data/ingest_dead_letter.ndjson')
+    # 后台删除任务：按主键分批删除，批间暂停（秒），避免长时间锁表
+    DELETE_BATCH_SIZE: int = int(os.getenv('DELETE_BATCH_SIZE', 1000))
+    DELETE_BATCH_PAUSE: float = float(os.getenv('DELETE_BATCH_PAUSE', 0.1))
+    DELETE_JOB_CONCURRENCY: int = int(os.getenv('DELETE_JOB_CONCURRENCY', 1))
+    DELETE_JOB_HISTORY: int = int(os.getenv('DELETE_JOB_HISTORY', 100))
+    # 在线迁移：数据回填每批行数及批间暂停（秒），降低对线上写入的影响
+    MIGRATION_BATCH_SIZE: int = int(os.getenv('MIGRATION_BATCH_SIZE', 1000))
+    MIGRATION_BATCH_PAUSE: float = float(os.getenv('MIGRATION_BATCH_PAUSE', 0.05))
+    # 变更推送（GET /assets/feed、/assets/feed/ws）：每个订阅者最多缓冲的事件数，写满即断开该订阅者
+    CHANGE_FEED_BUFFER: int = int(os.getenv('CHANGE_FEED_BUFFER', 1000))
+    CHANGE_FEED_MAX_SUBSCRIBERS: int = int(os.getenv('CHANGE_FEED_MAX_SUBSCRIBERS', 1000))
+    CHANGE_FEED_HEARTBEAT: float = float(os.getenv('CHANGE_FEED_HEARTBEAT', 15.0))
+    # 增量同步（GET /assets/delta）：只读到数据库当前时间减去该秒数之前，给未提交的写入留出时间；
+    # 墓碑保留天数，水位早于保留期时需要全量重新同步
+    DELTA_SETTLE_SECONDS: float = float(os.getenv('DELTA_SETTLE_SECONDS', 5.0))
+    DELTA_TOMBSTONE_RETENTION_DAYS: int = int(os.getenv('DELTA_TOMBSTONE_RETENTION_DAYS', 30))
 
     class Config:
         env_file = ['.env', '.env.prod' if os.getenv('ENV') == 'prod' else '.env.local']
-        env_file_encoding = 'utf-8'
\ No newline at end of file
+        env_file_encoding = 'utf-8'
+        extra = 'ignore'
+
+# 创建设置实例
+settings = Settings()
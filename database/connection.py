@@ -10,38 +10,84 @@ import mysql.connector
 from mysql.connector import Error
 from supabase import create_client, Client
 import logging
-from config.database import MYSQL_CONFIG, SUPABASE_CONFIG
-from typing import Optional, Any
+from config.database import (
+    MYSQL_CONFIG, MYSQL_POOL_CONFIG, SUPABASE_CONFIG, SUPABASE_HTTP_CONFIG, SQLITE_CONFIG, DB_BACKEND, REPLICA_CONFIG
+)
+from database.pool import MySQLConnectionPool
+from database.repositories import (
+    AssetsRepository,
+    MySQLAssetsRepository,
+    SupabaseAssetsRepository,
+    PooledAsyncPostgrestClient,
+    SQLiteAssetsRepository,
+    ReplicatedAssetsRepository,
+)
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
 class DatabaseConnection:
     def __init__(self):
         self.mysql_conn = None
+        self.mysql_pool: Optional[MySQLConnectionPool] = None
         self.supabase_client = None
+        self.repository: Optional[AssetsRepository] = None  # 服务层通过它访问 assets 表
+        self.primary: Optional[AssetsRepository] = None  # 主库；配置了只读副本时 repository 为读写分离包装
         self._current_connection = None  # 新增：跟踪当前使用的连接
         self._initialize_connection()
 
     def _initialize_connection(self):
-        """初始化数据库连接，优先尝试 Supabase，失败则使用 MySQL"""
-        if SUPABASE_CONFIG and self._try_supabase_connection():
-            logger.info("成功连接到 Supabase")
-            self._current_connection = 'supabase'
-        elif self._try_mysql_connection():
-            logger.info("成功连接到 MySQL")
-            self._current_connection = 'mysql'
+        """按 DB_BACKEND 选择存储后端；auto 时优先尝试 Supabase，失败则使用 MySQL"""
+        if DB_BACKEND == 'sqlite':
+            connected = self._try_sqlite_connection()
+        elif DB_BACKEND == 'supabase':
+            connected = self._try_supabase_connection()
+        elif DB_BACKEND == 'mysql':
+            connected = self._try_mysql_connection()
         else:
+            connected = self._try_supabase_connection() or self._try_mysql_connection()
+        if not connected:
             raise ConnectionError("无法连接到任何数据库")
+        self.primary = self.repository
+        replicas = self._open_replicas()
+        if replicas:
+            self.repository = ReplicatedAssetsRepository(
+                self.primary,
+                replicas,
+                strategy=REPLICA_CONFIG['strategy'],
+                max_lag=REPLICA_CONFIG['max_lag'],
+                lag_check_interval=REPLICA_CONFIG['lag_check_interval']
+            )
+        logger.info(f"成功连接到 {self.repository.name}")
+
+    def _open_replicas(self) -> List[AssetsRepository]:
+        """连接 DB_READ_REPLICAS 中的只读副本，连接失败的副本跳过"""
+        replicas = []
+        for index, host in enumerate(REPLICA_CONFIG['hosts'], 1):
+            try:
+                if self._current_connection == 'mysql':
+                    name, _, port = host.partition(':')
+                    config = {**MYSQL_CONFIG, 'host': name, 'port': int(port or MYSQL_CONFIG['port'])}
+                    pool = MySQLConnectionPool(config, **MYSQL_POOL_CONFIG, name=f"replica-{index}")
+                    replicas.append(MySQLAssetsRepository(pool))
+                elif self._current_connection == 'supabase':
+                    replicas.append(self._build_supabase_repository(host))
+                else:
+                    replicas.append(SQLiteAssetsRepository(**{**SQLITE_CONFIG, 'path': host}))
+            except Exception as e:
+                logger.error(f"只读副本 {host} 连接失败，已跳过: {str(e)}")
+        return replicas
 
     def _try_mysql_connection(self) -> bool:
-        """尝试连接 MySQL"""
+        """尝试连接 MySQL，创建连接池"""
         try:
-            self.mysql_conn = mysql.connector.connect(
-                **MYSQL_CONFIG,
-                charset='utf8mb4',
-                use_unicode=True
-            )
-            return self.mysql_conn.is_connected()
+            self.mysql_pool = MySQLConnectionPool(MYSQL_CONFIG, **MYSQL_POOL_CONFIG)
+            with self.mysql_pool.connection() as conn:
+                if not conn.is_connected():
+                    return False
+            self.repository = MySQLAssetsRepository(self.mysql_pool)
+            self._current_connection = 'mysql'
+            return True
         except Error as e:
             logger.error(f"MySQL 连接失败: {str(e)}")
             return False
@@ -57,25 +103,80 @@ class DatabaseConnection:
             )
             # 测试连接
             self.supabase_client.table(SUPABASE_CONFIG['table']).select("*").limit(1).execute()
+            self.repository = self._build_supabase_repository(SUPABASE_CONFIG['url'])
+            self._current_connection = 'supabase'
             return True
         except Exception as e:
             logger.error(f"Supabase 连接失败: {str(e)}")
             return False
 
+    @staticmethod
+    def _build_supabase_repository(url: str) -> SupabaseAssetsRepository:
+        """基于异步 PostgREST 客户端的存储，主库与只读副本共用 API key 和 HTTP 配置"""
+        http = SUPABASE_HTTP_CONFIG
+        client = PooledAsyncPostgrestClient(
+            f"{url}/rest/v1",
+            headers={
+                "apiKey": SUPABASE_CONFIG['key'],
+                "Authorization": f"Bearer {SUPABASE_CONFIG['key']}"
+            },
+            timeout=http['timeout'],
+            http2=http['http2'],
+            max_connections=http['max_connections'],
+            max_keepalive=http['max_keepalive'],
+            keepalive_expiry=http['keepalive_expiry'],
+            connect_timeout=http['connect_timeout']
+        )
+        return SupabaseAssetsRepository(
+            client,
+            SUPABASE_CONFIG['table'],
+            read_chunk_size=http['read_chunk_size'],
+            parallel_reads=http['parallel_reads'],
+            insert_batch_size=http['insert_batch_size'],
+            insert_batch_delay=http['insert_batch_delay']
+        )
+
+    def _try_sqlite_connection(self) -> bool:
+        """打开嵌入式 SQLite 数据库（不存在时创建）"""
+        try:
+            self.repository = SQLiteAssetsRepository(**SQLITE_CONFIG)
+            self._current_connection = 'sqlite'
+            return True
+        except Exception as e:
+            logger.error(f"SQLite 打开失败: {str(e)}")
+            return False
+
+    @property
+    def backend(self) -> Optional[str]:
+        """当前使用的数据库类型：supabase / mysql / sqlite"""
+        return self._current_connection
+
     def get_connection(self):
-        """获取当前活动的数据库连接"""
+        """获取当前活动的数据库连接（兼容旧代码的长连接，服务层请使用 repository）"""
         if self._current_connection == 'supabase':
             return self.supabase_client
         elif self._current_connection == 'mysql':
+            if self.mysql_conn is None or not self.mysql_conn.is_connected():
+                self.mysql_conn = mysql.connector.connect(
+                    **MYSQL_CONFIG,
+                    charset='utf8mb4',
+                    use_unicode=True
+                )
             return self.mysql_conn
         return None
 
     def close(self):
-        """关闭所有数据库连接"""
+        """关闭兼容旧代码的长连接"""
         if self.mysql_conn and self.mysql_conn.is_connected():
             self.mysql_conn.close()
         # Supabase client 不需要显式关闭
 
+    async def aclose(self):
+        """关闭存储后端和所有数据库连接"""
+        if self.repository:
+            await self.repository.close()
+        self.close()
+
 # 全局数据库连接实例
 db_connection = None
 
@@ -86,6 +187,13 @@ def get_db():
         db_connection = DatabaseConnection()
     return db_connection
 
+async def close_db():
+    """应用关闭时释放数据库连接"""
+    global db_connection
+    if db_connection is not None:
+        await db_connection.aclose()
+        db_connection = None
+
 if __name__ == "__main__":
     try:
         db = DatabaseConnection()
@@ -0,0 +1,129 @@
+from typing import List
+from services.facets import FACET_COLUMNS, FACETS_TABLE, COUNT_COLUMN
+
+# assets_facets 汇总表（MySQL）：每种维度组合一行及其资产数，由 assets 上的触发器在同一事务内增减，
+# 统计查询只需扫描汇总表。维度列总长超过 InnoDB 索引长度上限，以各维度值的 MD5 作为主键；
+# 计数为 0 的行保留，查询时过滤，重建时清理
+TRIGGERS = ('assets_facets_insert', 'assets_facets_update', 'assets_facets_delete')
+# 汇总表状态（迁移 0010）：删除过期分区不会触发触发器，删除前后把汇总表标记为失效，失效期间统计查询扫描 assets，
+# 由分区维护任务在后台全量重建后清除标记；删除失败时标记保留，重建后依然正确
+STATE_TABLE = 'assets_facets_state'
+
+CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {FACETS_TABLE} (
+    dims_hash BINARY(16) NOT NULL PRIMARY KEY,
+    country_name VARCHAR(255) NULL,
+    product VARCHAR(255) NULL,
+    port INT NULL,
+    protocol VARCHAR(255) NULL,
+    search_engine VARCHAR(255) NULL,
+    {COUNT_COLUMN} BIGINT NOT NULL DEFAULT 0
+)
+"""
+
+CREATE_STATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+    id TINYINT NOT NULL PRIMARY KEY,
+    dirty TINYINT NOT NULL DEFAULT 0,
+    marked_at DATETIME NULL
+)
+"""
+
+def _values(ref: str = '') -> List[str]:
+    """维度值表达式，空字符串计为 NULL"""
+    return [f"{ref}{c}" if c == 'port' else f"NULLIF({ref}{c}, '')" for c in FACET_COLUMNS]
+
+def _key(ref: str = '') -> str:
+    # QUOTE 区分 NULL 与字符串 'NULL'，按字节计算，不受列排序规则影响
+    return f"UNHEX(MD5(CONCAT_WS(',', {', '.join(f'QUOTE({v})' for v in _values(ref))})))"
+
+def _increment(ref: str) -> str:
+    return (
+        f"INSERT INTO {FACETS_TABLE} (dims_hash, {', '.join(FACET_COLUMNS)}, {COUNT_COLUMN}) "
+        f"VALUES ({_key(ref)}, {', '.join(_values(ref))}, 1) "
+        f"ON DUPLICATE KEY UPDATE {COUNT_COLUMN} = {COUNT_COLUMN} + 1"
+    )
+
+def _decrement(ref: str) -> str:
+    return f"UPDATE {FACETS_TABLE} SET {COUNT_COLUMN} = {COUNT_COLUMN} - 1 WHERE dims_hash = {_key(ref)}"
+
+def trigger_statements() -> List[str]:
+    """增量维护汇总表的触发器；INSERT ... ON DUPLICATE KEY UPDATE 命中已有行时触发 UPDATE 触发器"""
+    changed = " OR ".join(f"NOT (NEW.{c} <=> OLD.{c})" for c in FACET_COLUMNS)
+    return [
+        f"CREATE TRIGGER {TRIGGERS[0]} AFTER INSERT ON assets FOR EACH ROW {_increment('NEW.')}",
+        f"CREATE TRIGGER {TRIGGERS[1]} AFTER UPDATE ON assets FOR EACH ROW "
+        f"BEGIN IF {changed} THEN {_decrement('OLD.')}; {_increment('NEW.')}; END IF; END",
+        f"CREATE TRIGGER {TRIGGERS[2]} AFTER DELETE ON assets FOR EACH ROW {_decrement('OLD.')}",
+    ]
+
+def _grouped(source: str) -> str:
+    """按维度组合分组计数；按 MD5 分组，组内各维度值逐字节相同"""
+    return (
+        f"SELECT {_key()} AS dims_hash, "
+        + ", ".join(f"ANY_VALUE({v}) AS {c}" for v, c in zip(_values(), FACET_COLUMNS))
+        + f", COUNT(*) AS n FROM {source} GROUP BY dims_hash"
+    )
+
+def _has_table(conn, table: str) -> bool:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+def has_facets_table(conn) -> bool:
+    return _has_table(conn, FACETS_TABLE)
+
+def has_state_table(conn) -> bool:
+    return _has_table(conn, STATE_TABLE)
+
+def mark_dirty(conn):
+    """标记汇总表失效，立即提交"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO {STATE_TABLE} (id, dirty, marked_at) VALUES (1, 1, NOW()) "
+            f"ON DUPLICATE KEY UPDATE dirty = 1, marked_at = NOW()"
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def is_dirty(conn) -> bool:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT dirty FROM {STATE_TABLE} WHERE id = 1")
+        row = cursor.fetchone()
+        return bool(row and row[0])
+    finally:
+        cursor.close()
+
+def rebuild(conn) -> int:
+    """按 assets 全量重建汇总表，返回维度组合数。INSERT ... SELECT 对 assets 加共享锁，
+    重建期间的写入会等待，结果与触发器的增量保持一致；同一事务内清除失效标记"""
+    clear_dirty = has_state_table(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {FACETS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FACETS_TABLE} (dims_hash, {', '.join(FACET_COLUMNS)}, {COUNT_COLUMN}) "
+            f"SELECT * FROM ({_grouped('assets')}) AS g"
+        )
+        groups = cursor.rowcount
+        if clear_dirty:
+            cursor.execute(f"UPDATE {STATE_TABLE} SET dirty = 0 WHERE id = 1")
+        conn.commit()
+        return groups
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
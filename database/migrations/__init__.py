@@ -0,0 +1,3 @@
+from database.migrations.runner import MigrationContext, MigrationRunner, SchemaMigration
+
+__all__ = ['MigrationContext', 'MigrationRunner', 'SchemaMigration']
@@ -0,0 +1,29 @@
+import argparse
+import logging
+from database.migrations.runner import MigrationRunner
+from database.models.assets import Assets
+
+def main():
+    parser = argparse.ArgumentParser(description="assets 表结构迁移")
+    parser.add_argument('command', choices=['status', 'upgrade'])
+    parser.add_argument('--target', type=int, help="迁移到指定版本（默认最新）")
+    parser.add_argument('--batch-size', type=int, help="回填每批行数")
+    parser.add_argument('--pause', type=float, help="回填批间暂停秒数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    runner = MigrationRunner(batch_size=args.batch_size, pause=args.pause)
+
+    if args.command == 'upgrade':
+        if runner.baseline([Assets]):
+            print("空数据库，已按当前模型建表")
+        else:
+            done = runner.upgrade(args.target)
+            print(f"已执行迁移: {done}" if done else "没有待执行的迁移")
+
+    for item in runner.status():
+        applied = item['applied_at'] or '未执行'
+        print(f"{item['version']:04d} {item['name']:<32} {applied}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import logging
+import time
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from peewee import CharField, DateTimeField, IntegerField, Model, Database
+from playhouse.migrate import SchemaMigrator
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class SchemaMigration(Model):
+    """已执行的迁移版本"""
+    version = IntegerField(primary_key=True)
+    name = CharField(max_length=255)
+    applied_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = 'schema_migrations'
+
+class MigrationContext:
+    """传给每个迁移 upgrade() 的上下文"""
+
+    def __init__(self, database: Database, batch_size: int, pause: float):
+        self.database = database
+        self.migrator = SchemaMigrator.from_database(database)
+        self.batch_size = batch_size
+        self.pause = pause
+
+    @property
+    def is_mysql(self) -> bool:
+        return self.migrator.__class__.__name__ == 'MySQLMigrator'
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(c.name == column for c in self.database.get_columns(table))
+
+    def has_index(self, table: str, name: str) -> bool:
+        return any(i.name == name for i in self.database.get_indexes(table))
+
+    def iter_batches(
+        self,
+        table: str,
+        columns: Sequence[str],
+        where: str = "1=1",
+        after_id: int = 0,
+        pause: Optional[float] = None
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """按主键分批读取 (id, *columns)，批间暂停，每批一个短事务，不长时间持有锁"""
+        pause = self.pause if pause is None else pause
+        param = self.database.param
+        query = (
+            f"SELECT id, {', '.join(columns)} FROM {table} "
+            f"WHERE id > {param} AND ({where}) ORDER BY id LIMIT {param}"
+        )
+        while True:
+            rows = self.database.execute_sql(query, (after_id, self.batch_size)).fetchall()
+            if not rows:
+                return
+            after_id = rows[-1][0]
+            yield rows
+            if len(rows) < self.batch_size:
+                return
+            if pause:
+                time.sleep(pause)
+
+class MigrationRunner:
+    """按版本号顺序执行 database/migrations/versions 中尚未执行的迁移"""
+
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        migrations: Optional[Sequence[ModuleType]] = None,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ):
+        if database is None:
+            from database.base import db as database
+        if migrations is None:
+            from database.migrations.versions import MIGRATIONS as migrations
+        self.database = database
+        self.migrations = sorted(migrations, key=lambda m: m.VERSION)
+        self.context = MigrationContext(
+            database,
+            batch_size or settings.MIGRATION_BATCH_SIZE,
+            settings.MIGRATION_BATCH_PAUSE if pause is None else pause
+        )
+
+    def _ensure_table(self):
+        with SchemaMigration.bind_ctx(self.database):
+            SchemaMigration.create_table(safe=True)
+
+    def applied(self) -> Dict[int, datetime]:
+        self._ensure_table()
+        with SchemaMigration.bind_ctx(self.database):
+            return {m.version: m.applied_at for m in SchemaMigration.select()}
+
+    def pending(self) -> List[ModuleType]:
+        applied = self.applied()
+        return [m for m in self.migrations if m.VERSION not in applied]
+
+    def status(self) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [
+            {"version": m.VERSION, "name": m.NAME, "applied_at": applied.get(m.VERSION)}
+            for m in self.migrations
+        ]
+
+    def _record(self, migration: ModuleType):
+        with SchemaMigration.bind_ctx(self.database):
+            SchemaMigration.create(version=migration.VERSION, name=migration.NAME)
+
+    def baseline(self, models: Sequence[Model]) -> bool:
+        """空库时直接按当前模型建表，并把全部迁移记为已执行；返回是否建表"""
+        if self.applied() or any(self.database.table_exists(m._meta.table_name) for m in models):
+            return False
+        with self.database.bind_ctx(models):
+            self.database.create_tables(models)
+        for migration in self.migrations:
+            # 模型无法表达的结构（如 MySQL ngram 全文索引）由迁移自身补建
+            if getattr(migration, 'RUN_ON_BASELINE', False):
+                migration.upgrade(self.context)
+            self._record(migration)
+        logger.info("空数据库，已按当前模型建表")
+        return True
+
+    def upgrade(self, target: Optional[int] = None) -> List[int]:
+        """执行到 target 版本（默认最新），返回本次执行的版本号"""
+        done = []
+        for migration in self.pending():
+            if target is not None and migration.VERSION > target:
+                break
+            logger.info(f"执行迁移 {migration.VERSION:04d} {migration.NAME}")
+            started = time.monotonic()
+            # MySQL 的 DDL 会隐式提交，迁移自身需要可重复执行；成功后才记录版本
+            migration.upgrade(self.context)
+            self._record(migration)
+            logger.info(f"迁移 {migration.VERSION:04d} 完成，耗时 {time.monotonic() - started:.1f}s")
+            done.append(migration.VERSION)
+        return done
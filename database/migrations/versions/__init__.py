@@ -0,0 +1,26 @@
+from database.migrations.versions import (
+    m0001_query_indexes,
+    m0002_typed_time_columns,
+    m0003_drop_legacy_time_columns,
+    m0004_fulltext_search,
+    m0005_ip_binary,
+    m0006_domain_rev,
+    m0007_facets,
+    m0008_delta_sync,
+    m0009_tombstone_ranges,
+    m0010_facets_state,
+)
+
+# 新迁移追加到末尾，VERSION 递增
+MIGRATIONS = [
+    m0001_query_indexes,
+    m0002_typed_time_columns,
+    m0003_drop_legacy_time_columns,
+    m0004_fulltext_search,
+    m0005_ip_binary,
+    m0006_domain_rev,
+    m0007_facets,
+    m0008_delta_sync,
+    m0009_tombstone_ranges,
+    m0010_facets_state,
+]
@@ -0,0 +1,26 @@
+from playhouse.migrate import make_index_name, migrate
+
+VERSION = 1
+NAME = "query_indexes"
+
+# 创建时按 identifier 查重，列表/删除按 search_engine、country_name、region 过滤
+INDEXES = [
+    ('identifier',),
+    ('search_engine',),
+    ('country_name',),
+    ('region',),
+]
+
+def upgrade(ctx):
+    for columns in INDEXES:
+        name = make_index_name('assets', columns)
+        if ctx.has_index('assets', name):
+            continue
+        if ctx.is_mysql:
+            # InnoDB 在线建索引，期间不阻塞读写
+            ctx.database.execute_sql(
+                f"ALTER TABLE assets ADD INDEX {name} ({', '.join(columns)}), "
+                f"ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            migrate(ctx.migrator.add_index('assets', columns))
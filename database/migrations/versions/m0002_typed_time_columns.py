@@ -0,0 +1,122 @@
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from services.times import parse_time_value
+
+logger = logging.getLogger(__name__)
+
+VERSION = 2
+NAME = "typed_time_columns"
+
+# timestamp / lastupdatetime 由 VARCHAR 转为 DATETIME，使时间条件可以走范围扫描。
+# 在线步骤：新增影子列 -> 触发器标记回填期间被改动的行 -> 分批回填 -> 增量补齐
+# -> 写锁下补齐最后一批并改名切换。旧列改名为 *_legacy 保留，由 0003 删除。
+COLUMNS = ('timestamp', 'lastupdatetime')
+TRIGGER = 'assets_time_sync'
+
+def _shadow(column: str) -> str:
+    return f"{column}_dt"
+
+def _legacy(column: str) -> str:
+    return f"{column}_legacy"
+
+# 需要转换的行：影子列为空而源列有值
+PENDING = " OR ".join(
+    f"({_shadow(c)} IS NULL AND `{c}` IS NOT NULL AND `{c}` <> '')" for c in COLUMNS
+)
+
+def _parse(value: Any) -> Optional[datetime]:
+    """与写入路径（AssetsCreate 的时间字段校验）规则一致，无法解析时返回 None"""
+    try:
+        return parse_time_value(value)
+    except ValueError:
+        return None
+
+def _convert(ctx, rows: List[Tuple[Any, ...]], locked: bool = False) -> int:
+    """转换一批行并写入影子列，返回无法解析的值的个数"""
+    updates = {c: [] for c in COLUMNS}
+    failed = 0
+    for row in rows:
+        for column, raw in zip(COLUMNS, row[1:]):
+            value = _parse(raw)
+            if value is not None:
+                updates[column].append((value, row[0], raw))
+            elif raw not in (None, ''):
+                failed += 1
+    # LOCK TABLES 期间开启事务会隐式释放表锁，此时逐条自动提交
+    with nullcontext() if locked else ctx.database.atomic():
+        cursor = ctx.database.cursor()
+        for column, params in updates.items():
+            if params:
+                # 只在源列未被并发修改时写入；被修改的行已由触发器清空影子列，下一轮补齐
+                cursor.executemany(
+                    f"UPDATE assets SET {_shadow(column)} = %s WHERE id = %s AND `{column}` <=> %s",
+                    params
+                )
+    return failed
+
+def _backfill(ctx, locked: bool = False) -> Tuple[int, int]:
+    """转换所有待转换的行，返回 (处理行数, 无法解析的值的个数)"""
+    converted = failed = 0
+    batches = ctx.iter_batches(
+        'assets', [f"`{c}`" for c in COLUMNS], PENDING, pause=0 if locked else None
+    )
+    for rows in batches:
+        failed += _convert(ctx, rows, locked)
+        converted += len(rows)
+    return converted, failed
+
+def upgrade(ctx):
+    if not ctx.is_mysql:
+        raise RuntimeError("时间列类型迁移仅支持 MySQL")
+    db = ctx.database
+    if all(ctx.has_column('assets', _legacy(c)) for c in COLUMNS):
+        return  # 已切换
+
+    for column in COLUMNS:
+        if not ctx.has_column('assets', _shadow(column)):
+            db.execute_sql(f"ALTER TABLE assets ADD COLUMN {_shadow(column)} DATETIME NULL")
+
+    # 回填期间源列被更新时清空影子列，由补齐阶段重新转换
+    db.execute_sql(f"DROP TRIGGER IF EXISTS {TRIGGER}")
+    db.execute_sql(
+        f"CREATE TRIGGER {TRIGGER} BEFORE UPDATE ON assets FOR EACH ROW BEGIN "
+        + " ".join(
+            f"IF NOT (NEW.`{c}` <=> OLD.`{c}`) THEN SET NEW.{_shadow(c)} = NULL; END IF;"
+            for c in COLUMNS
+        )
+        + " END"
+    )
+
+    converted, failed = _backfill(ctx)
+    logger.info(f"回填完成: 处理 {converted} 行")
+    converted, _ = _backfill(ctx)
+    logger.info(f"增量补齐: 处理 {converted} 行")
+
+    index = f"assets_{_shadow('lastupdatetime')}"
+    if not ctx.has_index('assets', index):
+        db.execute_sql(
+            f"ALTER TABLE assets ADD INDEX {index} ({_shadow('lastupdatetime')}), "
+            f"ALGORITHM=INPLACE, LOCK=NONE"
+        )
+    # 切换后应用不再写旧列，NOT NULL 的旧列需要默认值
+    db.execute_sql("ALTER TABLE assets ALTER COLUMN `timestamp` SET DEFAULT ''")
+
+    # 写锁只覆盖最后一批增量和改名（仅修改元数据）
+    db.execute_sql("LOCK TABLES assets WRITE")
+    try:
+        converted, _ = _backfill(ctx, locked=True)
+        logger.info(f"切换前补齐: 处理 {converted} 行")
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {TRIGGER}")
+        renames = []
+        for column in COLUMNS:
+            renames.append(f"RENAME COLUMN `{column}` TO {_legacy(column)}")
+            renames.append(f"RENAME COLUMN {_shadow(column)} TO `{column}`")
+        renames.append(f"RENAME INDEX {index} TO assets_lastupdatetime")
+        db.execute_sql(f"ALTER TABLE assets {', '.join(renames)}")
+    finally:
+        db.execute_sql("UNLOCK TABLES")
+
+    if failed:
+        logger.warning(f"{failed} 个时间值无法解析，新列为 NULL，原值保留在 *_legacy 列中")
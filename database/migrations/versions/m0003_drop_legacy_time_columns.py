@@ -0,0 +1,16 @@
+VERSION = 3
+NAME = "drop_legacy_time_columns"
+
+# 0002 切换后保留的旧 VARCHAR 时间列，确认数据无误后删除
+COLUMNS = ('timestamp_legacy', 'lastupdatetime_legacy')
+
+def upgrade(ctx):
+    drops = [f"DROP COLUMN {c}" for c in COLUMNS if ctx.has_column('assets', c)]
+    if not drops:
+        return
+    if ctx.is_mysql:
+        # 一次 ALTER 只重建一次表，重建期间允许并发读写
+        ctx.database.execute_sql(f"ALTER TABLE assets {', '.join(drops)}, ALGORITHM=INPLACE, LOCK=NONE")
+    else:
+        from playhouse.migrate import migrate
+        migrate(*[ctx.migrator.drop_column('assets', c) for c in COLUMNS if ctx.has_column('assets', c)])
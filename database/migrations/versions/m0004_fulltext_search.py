@@ -0,0 +1,21 @@
+VERSION = 4
+NAME = "fulltext_search"
+
+# 模型无法表达 WITH PARSER ngram，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+INDEX_NAME = 'assets_fulltext'
+COLUMNS = ('title', 'product', 'domain')
+
+def upgrade(ctx):
+    # SQLite 存储由 SQLiteAssetsRepository 维护 FTS5 表，Supabase 见 database/sql/supabase_fulltext.sql
+    if not ctx.is_mysql or ctx.has_index('assets', INDEX_NAME):
+        return
+    # ngram 解析器（默认 ngram_token_size=2）按二元组切分，中文标题无需分词；
+    # 停用词表会剔除 "in"、"to" 等二元组，建索引时关闭（以建索引时的会话设置为准）
+    ctx.database.execute_sql("SET SESSION innodb_ft_enable_stopword = OFF")
+    # 第一个 FULLTEXT 索引需要添加隐藏列 FTS_DOC_ID 并重建表，期间只允许读
+    ctx.database.execute_sql(
+        f"ALTER TABLE assets ADD FULLTEXT INDEX {INDEX_NAME} ({', '.join(COLUMNS)}) WITH PARSER ngram, "
+        f"ALGORITHM=INPLACE, LOCK=SHARED"
+    )
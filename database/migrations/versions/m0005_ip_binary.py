@@ -0,0 +1,69 @@
+import logging
+from peewee import BlobField
+from playhouse.migrate import migrate
+from services.network import ip_to_bytes
+
+logger = logging.getLogger(__name__)
+
+VERSION = 5
+NAME = "ip_binary"
+
+# 触发器无法由模型表达，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+COLUMN = 'ip_bin'
+INDEX_NAME = 'assets_ip_bin_port'
+TRIGGERS = ('assets_ip_bin_insert', 'assets_ip_bin_update')
+
+# 与 services/network.py 的 ip_to_bytes 一致：IPv4 存为 ::ffff:a.b.c.d 的 16 字节形式，
+# IPv4/IPv6 同一字节序可比较；非法地址为 NULL（先判断再转换，严格模式下不报错）
+IP_BIN_SQL = (
+    "IF(IS_IPV4(NEW.ip), CONCAT(0x00000000000000000000FFFF, INET6_ATON(NEW.ip)), "
+    "IF(IS_IPV6(NEW.ip), INET6_ATON(NEW.ip), NULL))"
+)
+
+def _create_triggers(db):
+    """由触发器维护 ip_bin，应用写入路径无需改动"""
+    for name, event in zip(TRIGGERS, ('INSERT', 'UPDATE')):
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+        db.execute_sql(
+            f"CREATE TRIGGER {name} BEFORE {event} ON assets FOR EACH ROW "
+            f"SET NEW.{COLUMN} = {IP_BIN_SQL}"
+        )
+
+def _backfill(ctx) -> int:
+    """分批回填已有行，每批一个短事务"""
+    filled = 0
+    for rows in ctx.iter_batches('assets', ['ip'], f"{COLUMN} IS NULL"):
+        params = [(ip_to_bytes(ip), row_id) for row_id, ip in rows]
+        with ctx.database.atomic():
+            ctx.database.cursor().executemany(
+                f"UPDATE assets SET {COLUMN} = {ctx.database.param} WHERE id = {ctx.database.param}",
+                params
+            )
+        filled += len(rows)
+    return filled
+
+def upgrade(ctx):
+    # SQLite 存储由 SQLiteAssetsRepository 打开时补列，Supabase 见 database/sql/supabase_ip_range.sql
+    db = ctx.database
+    if not ctx.has_column('assets', COLUMN):
+        if ctx.is_mysql:
+            db.execute_sql(
+                f"ALTER TABLE assets ADD COLUMN {COLUMN} VARBINARY(16) NULL, ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            migrate(ctx.migrator.add_column('assets', COLUMN, BlobField(null=True)))
+
+    if ctx.is_mysql:
+        # 先建触发器再回填：回填期间新写入或修改的行由触发器填充，回填按 id 游标推进不会重复处理
+        _create_triggers(db)
+    logger.info(f"回填 {COLUMN}: 处理 {_backfill(ctx)} 行")
+
+    if not ctx.has_index('assets', INDEX_NAME):
+        if ctx.is_mysql:
+            db.execute_sql(
+                f"ALTER TABLE assets ADD INDEX {INDEX_NAME} ({COLUMN}, port), ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            db.execute_sql(f"CREATE INDEX {INDEX_NAME} ON assets ({COLUMN}, port)")
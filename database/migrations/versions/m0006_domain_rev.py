@@ -0,0 +1,48 @@
+import logging
+from peewee import CharField
+from playhouse.migrate import make_index_name, migrate
+from services.network import reverse_domain
+
+logger = logging.getLogger(__name__)
+
+VERSION = 6
+NAME = "domain_rev"
+
+# domain_rev 为倒序域名（com.example.www.），由 AssetsService 在每条写入路径上计算，
+# 本迁移只负责补列、回填已有数据和建索引。新版本上线前写入的行可重复执行 _backfill 补齐
+COLUMN = 'domain_rev'
+INDEX_NAME = make_index_name('assets', (COLUMN,))
+
+def _backfill(ctx) -> int:
+    """分批回填已有行，每批一个短事务"""
+    filled = 0
+    param = ctx.database.param
+    for rows in ctx.iter_batches('assets', ['domain'], f"{COLUMN} IS NULL AND domain IS NOT NULL"):
+        params = [(reverse_domain(domain), row_id) for row_id, domain in rows]
+        with ctx.database.atomic():
+            ctx.database.cursor().executemany(
+                f"UPDATE assets SET {COLUMN} = {param} WHERE id = {param}", params
+            )
+        filled += len(rows)
+    return filled
+
+def upgrade(ctx):
+    # SQLite 存储由 SQLiteAssetsRepository 打开时补列，Supabase 见 database/sql/supabase_domain_suffix.sql
+    db = ctx.database
+    if not ctx.has_column('assets', COLUMN):
+        if ctx.is_mysql:
+            db.execute_sql(
+                f"ALTER TABLE assets ADD COLUMN {COLUMN} VARCHAR(255) NULL, ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            migrate(ctx.migrator.add_column('assets', COLUMN, CharField(max_length=255, null=True)))
+
+    logger.info(f"回填 {COLUMN}: 处理 {_backfill(ctx)} 行")
+
+    if not ctx.has_index('assets', INDEX_NAME):
+        if ctx.is_mysql:
+            db.execute_sql(
+                f"ALTER TABLE assets ADD INDEX {INDEX_NAME} ({COLUMN}), ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            db.execute_sql(f"CREATE INDEX {INDEX_NAME} ON assets ({COLUMN})")
@@ -0,0 +1,23 @@
+import logging
+from database import facets
+
+logger = logging.getLogger(__name__)
+
+VERSION = 7
+NAME = "facets"
+
+# 汇总表和触发器无法由模型表达，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+def upgrade(ctx):
+    # SQLite 存储由 SQLiteAssetsRepository 维护汇总表，Supabase 见 database/sql/supabase_facets.sql
+    if not ctx.is_mysql:
+        return
+    db = ctx.database
+    db.execute_sql(facets.CREATE_TABLE_SQL)
+    # 先建触发器再全量重建：重建在同一事务内清空并写入汇总表，建触发器之前的写入也会计入
+    for name in facets.TRIGGERS:
+        db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for statement in facets.trigger_statements():
+        db.execute_sql(statement)
+    logger.info(f"汇总表已重建: {facets.rebuild(db.connection())} 个维度组合")
@@ -0,0 +1,46 @@
+import logging
+from peewee import DateTimeField
+from playhouse.migrate import make_index_name, migrate
+from database import tombstones
+
+logger = logging.getLogger(__name__)
+
+VERSION = 8
+NAME = "delta_sync"
+
+# 列的默认值/ON UPDATE 和墓碑表无法由模型表达，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+COLUMN = 'updated_at'
+INDEX_NAME = make_index_name('assets', (COLUMN, 'id'))
+# 由 MySQL 在插入和内容变化时写入，应用写入路径无需改动；upsert 命中内容相同的行不更新
+COLUMN_DEFINITION = "DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+
+def _column(ctx):
+    return next((c for c in ctx.database.get_columns('assets') if c.name == COLUMN), None)
+
+def upgrade(ctx):
+    # SQLite 存储由 SQLiteAssetsRepository 打开时补列，Supabase 见 database/sql/supabase_delta_sync.sql
+    db = ctx.database
+    column = _column(ctx)
+    if ctx.is_mysql:
+        if column is None:
+            # 在线加列，已有行取加列时刻，首次增量同步会读到全部已有行
+            db.execute_sql(
+                f"ALTER TABLE assets ADD COLUMN {COLUMN} {COLUMN_DEFINITION}, ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        elif column.default is None:
+            # 按模型建表的空库：模型中是普通可空列，补上默认值和 ON UPDATE
+            db.execute_sql(f"ALTER TABLE assets MODIFY COLUMN {COLUMN} {COLUMN_DEFINITION}")
+        db.execute_sql(tombstones.CREATE_TABLE_SQL)
+    elif column is None:
+        migrate(ctx.migrator.add_column('assets', COLUMN, DateTimeField(null=True)))
+
+    if not ctx.has_index('assets', INDEX_NAME):
+        if ctx.is_mysql:
+            db.execute_sql(
+                f"ALTER TABLE assets ADD INDEX {INDEX_NAME} ({COLUMN}, id), ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            db.execute_sql(f"CREATE INDEX {INDEX_NAME} ON assets ({COLUMN}, id)")
+    logger.info(f"增量同步: {COLUMN} 列、索引 {INDEX_NAME} 和墓碑表已就绪")
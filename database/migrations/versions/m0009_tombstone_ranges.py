@@ -0,0 +1,17 @@
+import logging
+from database import tombstones
+
+logger = logging.getLogger(__name__)
+
+VERSION = 9
+NAME = "tombstone_ranges"
+
+# 范围墓碑表无法由模型表达，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+def upgrade(ctx):
+    # 只有 MySQL 分区表会整分区删除数据，SQLite 和 Supabase 的删除都逐行写墓碑
+    if not ctx.is_mysql:
+        return
+    ctx.database.execute_sql(tombstones.CREATE_CUTOFFS_TABLE_SQL)
+    logger.info("增量同步: 范围墓碑表已就绪")
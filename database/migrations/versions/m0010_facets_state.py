@@ -0,0 +1,17 @@
+import logging
+from database import facets
+
+logger = logging.getLogger(__name__)
+
+VERSION = 10
+NAME = "facets_state"
+
+# 汇总表状态表无法由模型表达，空库按模型建表后也要执行本迁移
+RUN_ON_BASELINE = True
+
+def upgrade(ctx):
+    # 只有 MySQL 分区表会整分区删除数据、绕过汇总表触发器
+    if not ctx.is_mysql:
+        return
+    ctx.database.execute_sql(facets.CREATE_STATE_TABLE_SQL)
+    logger.info("汇总表状态表已就绪")
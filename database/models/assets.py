@@ -1,11 +1,15 @@
 from peewee import *
 from database.base import BaseModel
 
+class IPBinaryField(Field):
+    """ip 的 16 字节二进制形式（IPv4 映射为 ::ffff:a.b.c.d），按字节序比较即按地址大小比较"""
+    field_type = 'VARBINARY(16)'
+
 class Assets(BaseModel):
     id = AutoField()
     identifier = CharField(max_length=255)
     url = CharField(max_length=255)
-    timestamp = CharField(max_length=255)
+    timestamp = DateTimeField(null=True)
     search_engine = CharField(max_length=255)
     query_statements = CharField(max_length=255)
     protocol = CharField(max_length=255, null=True)
@@ -21,10 +25,22 @@ class Assets(BaseModel):
     city = CharField(max_length=255, null=True)
     os = CharField(max_length=255, null=True)
     as_organization = CharField(max_length=255, null=True)
-    lastupdatetime = CharField(max_length=255, null=True)
+    lastupdatetime = DateTimeField(null=True)
     icp = CharField(max_length=255, null=True)
+    ip_bin = IPBinaryField(null=True)
+    domain_rev = CharField(max_length=255, null=True)
+    # 插入或内容变化的时间，默认值和 ON UPDATE 由迁移 0008 设置
+    updated_at = DateTimeField(null=True)
 
     class Meta:
         indexes = (
             (('ip', 'port'), True),
+            (('identifier',), False),
+            (('search_engine',), False),
+            (('country_name',), False),
+            (('region',), False),
+            (('lastupdatetime',), False),
+            (('ip_bin', 'port'), False),
+            (('domain_rev',), False),
+            (('updated_at', 'id'), False),
         ) 
\ No newline at end of file
@@ -0,0 +1,215 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from database.facets import has_state_table, mark_dirty, is_dirty
+from database.tombstones import has_cutoffs_table, record_partitions
+
+logger = logging.getLogger(__name__)
+
+# assets 表按 lastupdatetime 做 RANGE COLUMNS 分区（MySQL 8，需要已执行迁移 0002）。
+# MySQL 要求分区键包含在每个唯一键中，因此启用分区后：
+#   - 主键改为 (id, lastupdatetime)，lastupdatetime 改为 NOT NULL；
+#   - (ip, port) 唯一索引降为普通索引，upsert 由仓储层先查后写实现，不再由数据库保证唯一。
+MODES = ('monthly', 'daily')
+MAX_PARTITION = 'pmax'  # 兜底分区，预建分区未覆盖的新数据落在这里，新增分区时从它拆分
+MAX_PARTITIONS = 8192   # MySQL 单表分区数上限
+
+def period_start(day: date, mode: str) -> date:
+    return day.replace(day=1) if mode == 'monthly' else day
+
+def next_period(start: date, mode: str) -> date:
+    if mode == 'monthly':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+def partition_name(start: date, mode: str) -> str:
+    return 'p' + start.strftime('%Y%m' if mode == 'monthly' else '%Y%m%d')
+
+def plan_partitions(mode: str, first: date, last: date) -> List[Tuple[str, date]]:
+    """覆盖 first 到 last 所在周期的分区列表 [(分区名, 上界)]，上界为下一周期的起点"""
+    if mode not in MODES:
+        raise ValueError(f"不支持的分区方式: {mode}，可选: {', '.join(MODES)}")
+    partitions = []
+    start = period_start(first, mode)
+    while start <= last:
+        upper = next_period(start, mode)
+        partitions.append((partition_name(start, mode), upper))
+        start = upper
+    if len(partitions) >= MAX_PARTITIONS:
+        raise ValueError(f"分区数 {len(partitions)} 超过上限 {MAX_PARTITIONS}，请使用更粗的分区粒度")
+    return partitions
+
+def parse_bound(description: Optional[str]) -> Optional[date]:
+    """解析 information_schema 中的分区上界，如 '2024-05-01 00:00:00'；MAXVALUE 返回 None"""
+    if not description or description.upper() == 'MAXVALUE':
+        return None
+    return datetime.strptime(description.strip("'")[:10], '%Y-%m-%d').date()
+
+def plan_maintenance(
+    partitions: List[Tuple[str, Optional[str]]],
+    mode: str,
+    premake: int,
+    retention_days: int,
+    today: date
+) -> Tuple[List[Tuple[str, date]], List[str]]:
+    """根据现有分区计算需要新建的分区和过期可删除的分区"""
+    bounds = [(name, parse_bound(desc)) for name, desc in partitions if name != MAX_PARTITION]
+    bounds = [(name, bound) for name, bound in bounds if bound is not None]
+
+    # 预建：覆盖到当前周期之后第 premake 个周期
+    target = period_start(today, mode)
+    for _ in range(premake):
+        target = next_period(target, mode)
+    first = bounds[-1][1] if bounds else period_start(today, mode)
+    create = plan_partitions(mode, first, target) if first <= target else []
+
+    # 清理：上界不晚于截止日期的分区中全部是过期数据；至少保留一个有界分区
+    drop = []
+    if retention_days > 0:
+        cutoff = today - timedelta(days=retention_days)
+        expired = [name for name, bound in bounds if bound <= cutoff]
+        drop = expired[:max(len(bounds) + len(create) - 1, 0)]
+    return create, drop
+
+def _partition_clause(partitions: List[Tuple[str, date]]) -> str:
+    parts = [
+        f"PARTITION {name} VALUES LESS THAN ('{upper.isoformat()} 00:00:00')"
+        for name, upper in partitions
+    ]
+    parts.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return ", ".join(parts)
+
+def list_partitions(conn) -> List[Tuple[str, Optional[str]]]:
+    """当前分区 [(分区名, 上界描述)]，未分区时返回空列表"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'assets' AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )
+        return [(name, desc) for name, desc in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def is_partitioned(conn) -> bool:
+    return bool(list_partitions(conn))
+
+def has_fulltext_index(conn) -> bool:
+    """assets 表是否有 FULLTEXT 索引（迁移 0004）；MySQL 分区表不支持全文索引"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+            "AND TABLE_NAME = 'assets' AND INDEX_TYPE = 'FULLTEXT' LIMIT 1"
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+def enable_partitioning(conn, mode: str, premake: int, batch_size: int = 10000) -> List[str]:
+    """把 assets 转为分区表，返回创建的分区名。会重建整表，应在维护窗口执行"""
+    if is_partitioned(conn):
+        raise ValueError("assets 表已经分区")
+    if has_fulltext_index(conn):
+        raise ValueError("assets 表有 FULLTEXT 索引，MySQL 分区表不支持全文索引，需先删除该索引")
+    cursor = conn.cursor()
+    try:
+        # 分区键不能为空：缺失的更新时间用发现时间补齐，分批提交
+        while True:
+            cursor.execute(
+                "UPDATE assets SET lastupdatetime = COALESCE(`timestamp`, NOW()) "
+                "WHERE lastupdatetime IS NULL LIMIT %s",
+                (batch_size,)
+            )
+            conn.commit()
+            if cursor.rowcount < batch_size:
+                break
+
+        cursor.execute(
+            "ALTER TABLE assets "
+            "MODIFY lastupdatetime DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (id, lastupdatetime), "
+            "DROP INDEX assets_ip_port, ADD INDEX assets_ip_port (ip, port)"
+        )
+
+        cursor.execute("SELECT MIN(lastupdatetime) FROM assets")
+        oldest = cursor.fetchone()[0]
+        today = date.today()
+        last = period_start(today, mode)
+        for _ in range(premake):
+            last = next_period(last, mode)
+        partitions = plan_partitions(mode, oldest.date() if oldest else today, last)
+        cursor.execute(
+            f"ALTER TABLE assets PARTITION BY RANGE COLUMNS (lastupdatetime) ({_partition_clause(partitions)})"
+        )
+        return [name for name, _ in partitions]
+    finally:
+        cursor.close()
+
+def maintain(conn, mode: str, premake: int, retention_days: int, today: Optional[date] = None) -> Dict[str, Any]:
+    """预建后续分区并删除过期分区；表未分区时不做任何事"""
+    partitions = list_partitions(conn)
+    if not partitions:
+        return {"partitioned": False, "created": [], "dropped": []}
+    create, drop = plan_maintenance(partitions, mode, premake, retention_days, today or date.today())
+    cursor = conn.cursor()
+    try:
+        if create:
+            # 从空的兜底分区拆出新分区，只修改元数据
+            cursor.execute(
+                f"ALTER TABLE assets REORGANIZE PARTITION {MAX_PARTITION} INTO ({_partition_clause(create)})"
+            )
+        facets_state = has_state_table(conn)
+        if drop:
+            if facets_state:
+                # 删除分区不触发汇总表触发器：删除前标记失效（删除失败时保留，重建后依然正确），
+                # 删除后再标记一次，覆盖与之并发、在删除前完成的重建
+                mark_dirty(conn)
+            # 删除分区只删除对应的数据文件，耗时与行数无关
+            cursor.execute(f"ALTER TABLE assets DROP PARTITION {', '.join(drop)}")
+            if facets_state:
+                mark_dirty(conn)
+            if has_cutoffs_table(conn):
+                # 增量同步需要知道这些行已被删除：删除成功后每个分区记一条范围墓碑，不逐行读取
+                bounds = {name: parse_bound(desc) for name, desc in partitions}
+                record_partitions(conn, [(name, bounds[name]) for name in drop])
+    finally:
+        cursor.close()
+    return {
+        "partitioned": True,
+        "created": [name for name, _ in create],
+        "dropped": drop,
+        "partitions": len(partitions) + len(create) - len(drop),
+        # 汇总表失效（本次删除了分区，或之前的重建没有完成），由调用方在后台重建
+        "facets_dirty": facets_state and is_dirty(conn)
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import mysql.connector
+    from config.database import MYSQL_CONFIG, PARTITION_CONFIG
+
+    parser = argparse.ArgumentParser(description="assets 表分区管理（MySQL）")
+    parser.add_argument('command', choices=['status', 'enable', 'maintain'])
+    parser.add_argument('--mode', default=PARTITION_CONFIG['mode'], choices=MODES)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**MYSQL_CONFIG)
+    try:
+        if args.command == 'enable':
+            created = enable_partitioning(conn, args.mode, PARTITION_CONFIG['premake'])
+            print(f"已启用 {args.mode} 分区，共 {len(created)} 个分区")
+        elif args.command == 'maintain':
+            print(maintain(conn, args.mode, PARTITION_CONFIG['premake'], PARTITION_CONFIG['retention_days']))
+        for name, desc in list_partitions(conn):
+            print(f"{name:<12} < {desc}")
+    finally:
+        conn.close()
@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(Exception):
+    """在 acquire_timeout 内没有可用连接"""
+
+class MySQLConnectionPool:
+    """线程安全的 MySQL 连接池：最小/最大连接数、获取超时、空闲探活、超龄回收、断线自动重连"""
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 10.0,
+        max_lifetime: float = 3600.0,
+        ping_interval: float = 30.0,
+        name: str = "primary"
+    ):
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self.name = name
+        self._idle = deque()  # (连接, 归还时间)
+        self._created: Dict[Any, float] = {}  # 连接 -> 创建时间
+        self._size = 0  # 已创建（含借出）的连接数
+        self._cond = threading.Condition()  # 可重入锁，保护连接计数、空闲队列、创建时间和统计
+        self._closed = False
+        self._replenisher: Optional[threading.Thread] = None  # 后台补足连接的线程，同一时间最多一个
+        self._stats = {"created": 0, "recycled": 0, "reconnects": 0, "timeouts": 0, "acquired": 0}
+
+        for _ in range(min_size):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        conn = mysql.connector.connect(
+            **self.config,
+            charset='utf8mb4',
+            use_unicode=True,
+            autocommit=False
+        )
+        # 建连在锁外，只有登记在锁内：多个线程会同时在锁外建连
+        with self._cond:
+            self._created[conn] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._created.pop(conn, None)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _schedule_replenish(self):
+        """连接数低于 min_size 时在后台线程补足，借出/归还连接的线程不等待建连"""
+        with self._cond:
+            if self._closed or self._size >= self.min_size:
+                return
+            if self._replenisher is not None and self._replenisher.is_alive():
+                return
+            self._replenisher = threading.Thread(
+                target=self._replenish, name=f"pool-{self.name}-replenish", daemon=True
+            )
+            self._replenisher.start()
+
+    def _replenish(self):
+        """丢弃连接后补足到 min_size，空闲连接数不会长期低于最小值；建连失败时留待下一次借出再补"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                logger.warning(f"连接池 {self.name} 补充连接失败: {str(e)}")
+                return
+            with self._cond:
+                if self._closed:
+                    self._discard(conn)
+                    self._size -= 1
+                    return
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def _validate(self, conn, released_at: float):
+        """检查借出的连接：超龄则回收，空闲过久则探活，失败时换新连接"""
+        now = time.monotonic()
+        with self._cond:
+            created_at = self._created.get(conn, now)
+        if now - created_at > self.max_lifetime:
+            self._discard(conn)
+            with self._cond:
+                self._stats["recycled"] += 1
+            return self._connect()
+        if now - released_at > self.ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Error as e:
+                logger.warning(f"连接池 {self.name} 连接探活失败，重新连接: {str(e)}")
+                self._discard(conn)
+                with self._cond:
+                    self._stats["reconnects"] += 1
+                return self._connect()
+        return conn
+
+    def acquire(self, timeout: Optional[float] = None):
+        """借出一个连接，池满时最多等待 timeout 秒"""
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout(f"连接池 {self.name} 已关闭")
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, released_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"连接池 {self.name} 获取连接超时 ({self.max_size} 个连接均在使用中)")
+                self._cond.wait(remaining)
+
+        # 建连和探活在锁外进行，避免阻塞其他线程归还连接
+        try:
+            conn = self._connect() if conn is None else self._validate(conn, released_at)
+        except Exception:
+            # 建连失败时数据库多半不可用，不在这里补足，由之后成功的借出补足
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["acquired"] += 1
+        if self._size < self.min_size:
+            self._schedule_replenish()
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """归还连接；未提交的事务会被回滚，异常连接直接关闭"""
+        if not discard:
+            try:
+                conn.consume_results()
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error:
+                discard = True
+        with self._cond:
+            if discard or self._closed:
+                self._discard(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._schedule_replenish()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Error:
+            # 数据库错误后连接可能已断开，确认不可用时丢弃
+            discard = not conn.is_connected()
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._size - len(self._idle)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+                self._size -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
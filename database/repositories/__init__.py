@@ -0,0 +1,21 @@
+from database.repositories.base import AssetsRepository, count_existing
+from database.repositories.mysql import MySQLAssetsRepository
+from database.repositories.supabase import SupabaseAssetsRepository, PooledAsyncPostgrestClient, InsertBatcher
+from database.repositories.sqlite import SQLiteAssetsRepository
+from database.repositories.replicated import (
+    ReplicatedAssetsRepository, read_from_primary, reads_from_primary, set_read_primary
+)
+
+__all__ = [
+    'AssetsRepository',
+    'count_existing',
+    'MySQLAssetsRepository',
+    'SupabaseAssetsRepository',
+    'PooledAsyncPostgrestClient',
+    'InsertBatcher',
+    'SQLiteAssetsRepository',
+    'ReplicatedAssetsRepository',
+    'read_from_primary',
+    'reads_from_primary',
+    'set_read_primary',
+]
@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from services.query_builder import CompiledFilter
+
+def count_existing(rows: List[Dict[str, Any]], existing_keys: set) -> int:
+    """统计批次中会命中 (ip, port) 唯一索引的行数（批内重复也算更新）"""
+    seen = set(existing_keys)
+    updated = 0
+    for row in rows:
+        if row['port'] is None:  # NULL 不参与唯一约束，总是插入
+            continue
+        key = (row['ip'], row['port'])
+        if key in seen:
+            updated += 1
+        else:
+            seen.add(key)
+    return updated
+
+def split_keys(keys: List[Tuple[str, Optional[int]]]) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """把 (ip, port) 键分为参与唯一约束的键和 port 为空的 ip"""
+    keyed = [key for key in keys if key[1] is not None]
+    null_ips = list({ip for ip, port in keys if port is None})
+    return keyed, null_ips
+
+class AssetsRepository(ABC):
+    """assets 表的存储接口，服务层只通过它访问数据库"""
+
+    name: str = ""  # 展示用的后端名称
+
+    @abstractmethod
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """插入一条记录，返回带 id 的记录"""
+
+    @abstractmethod
+    async def upsert_batch(self, rows: List[Dict[str, Any]]) -> int:
+        """按 (ip, port) 批量 upsert，整批一个事务，返回更新的行数"""
+
+    @abstractmethod
+    async def select(
+        self,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """分页查询；after_id 不为空时按 id 游标翻页（忽略 skip）"""
+
+    @abstractmethod
+    def iter_chunks(
+        self,
+        compiled: CompiledFilter,
+        chunk_size: int,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """分块遍历全部符合条件的记录"""
+
+    @abstractmethod
+    async def get_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """根据标识符获取一条记录"""
+
+    @abstractmethod
+    async def get_by_keys(self, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        """按 (ip, port) 读取已写入的记录（接口字段加 id，有 updated_at 列时一并返回）；
+        port 为 None 的键匹配该 ip 下全部 port 为空的行"""
+
+    @abstractmethod
+    async def delete_batch(
+        self,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...] = ('id',)
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """删除 id > after_id 且符合条件的前 batch_size 条，返回 (被删除的行（只含 columns 列）, 本批最后一个 id)；
+        没有更多时 id 为 None。被删除的行在同一事务内写入墓碑表 asset_tombstones"""
+
+    @abstractmethod
+    async def count(self, compiled: CompiledFilter) -> int:
+        """精确计数"""
+
+    @abstractmethod
+    async def estimate_count(self, compiled: CompiledFilter) -> int:
+        """使用统计信息估算行数，不扫描数据"""
+
+    @abstractmethod
+    async def facets(
+        self,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int
+    ) -> Dict[str, Any]:
+        """按维度分组计数，返回 {"total", "source": "rollup" | "scan", "facets": {维度: [{"value", "count"}]}}；
+        过滤条件只涉及维度列时读汇总表 assets_facets"""
+
+    @abstractmethod
+    async def rebuild_facets(self) -> int:
+        """按 assets 全量重建汇总表，返回维度组合数"""
+
+    @abstractmethod
+    async def delta(
+        self,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        """增量同步：(updated_at, id) 在 updated_after 之后的符合条件的行，以及 (deleted_at, id) 在 deleted_after 之后的
+        墓碑（deleted_after 为 None 时不读），各按时间升序最多 limit 条。两者都只读到 until（数据库当前时间减 settle 秒）
+        之前，写入时间早于 until 但尚未提交的事务不会被跳过。返回 {"until", "items", "deleted"}；
+        MySQL 分区表另外返回 cutoffs：删除水位时间之后的范围墓碑（删除过期分区时写入）"""
+
+    @abstractmethod
+    async def prune_tombstones(self, retention_days: int) -> int:
+        """清理超过保留期的墓碑，返回清理条数"""
+
+    async def ping(self) -> bool:
+        """检查后端是否可用"""
+        return True
+
+    async def replication_lag(self) -> Optional[float]:
+        """作为只读副本时落后主库的秒数；不是副本或无法获取时返回 None，复制中断时返回 inf"""
+        return None
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """连接池等运行状态，没有时返回 None"""
+        return None
+
+    async def close(self):
+        """释放连接等资源"""
@@ -0,0 +1,574 @@
+import asyncio
+import functools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from mysql.connector import Error
+from database.partitions import is_partitioned, has_fulltext_index
+from database import facets as facets_table
+from database import tombstones
+from database.pool import MySQLConnectionPool
+from database.repositories.base import AssetsRepository, count_existing, split_keys
+from schemas.assets import STORED_COLUMNS
+from services.query_builder import CompiledFilter, select_clause, TIME_FORMAT, SEARCH_MATCH_SQL
+from services.facets import facet_sql, total_sql, uses_rollup, normalize_facet
+from services.delta import (
+    TOMBSTONES_TABLE, TOMBSTONE_COLUMNS, DELTA_COLUMNS, CUTOFFS_TABLE,
+    changes_sql, tombstones_sql, cutoffs_sql, delta_params, format_time
+)
+
+# DATETIME 列（迁移 0002 之后），对外仍输出 TIME_FORMAT 字符串
+TIME_COLUMNS = ('timestamp', 'lastupdatetime')
+
+def format_times(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把 DATETIME 值格式化为字符串，保持接口输出与字符串列时一致"""
+    if not rows:
+        return rows
+    columns = [c for c in TIME_COLUMNS if c in rows[0]]
+    for row in rows:
+        for column in columns:
+            value = row[column]
+            if isinstance(value, datetime):
+                row[column] = value.strftime(TIME_FORMAT)
+    return rows
+
+class MySQLAssetsRepository(AssetsRepository):
+    """MySQL 实现：阻塞的 mysql.connector 调用放到与连接池等大的线程池中执行"""
+
+    name = "MySQL"
+
+    def __init__(self, pool: MySQLConnectionPool):
+        self.pool = pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool.max_size,
+            thread_name_prefix='mysql'
+        )
+        # 分区表没有 (ip, port) 唯一索引，upsert 需要先查后写
+        with pool.connection() as conn:
+            self.partitioned = is_partitioned(conn)
+            self.fulltext = has_fulltext_index(conn)
+            # 汇总表由迁移 0007 创建，没有时统计查询扫描 assets
+            self.rollup = facets_table.has_facets_table(conn)
+            # 汇总表失效标记由迁移 0010 创建，删除过期分区后到重建完成前统计查询改为扫描 assets
+            self.rollup_state = facets_table.has_state_table(conn)
+            # updated_at 列和墓碑表由迁移 0008 创建，没有时删除不写墓碑，也不支持增量同步
+            self.tombstones = tombstones.has_tombstones_table(conn)
+            # 删除过期分区的范围墓碑表由迁移 0009 创建
+            self.cutoffs = tombstones.has_cutoffs_table(conn)
+
+    def _check_search(self, compiled: CompiledFilter):
+        if compiled.search is not None and not self.fulltext:
+            raise ValueError("MySQL 未建立全文索引，不支持 q 检索（执行迁移 0004，分区表不支持）")
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """在数据库线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _call_with_connection(self, func: Callable, *args) -> Any:
+        with self.pool.connection() as conn:
+            return func(conn, *args)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """借用一个连接，在线程池中执行 func(conn, *args)，不阻塞事件循环"""
+        return await self.run_blocking(self._call_with_connection, func, *args)
+
+    @asynccontextmanager
+    async def connection(self):
+        """异步借用连接，用于需要跨多次 await 持有连接的场景（如流式导出）"""
+        conn = await self.run_blocking(self.pool.acquire)
+        discard = False
+        try:
+            yield conn
+        except Error:
+            discard = not await self.run_blocking(conn.is_connected)
+            raise
+        finally:
+            await self.run_blocking(self.pool.release, conn, discard)
+
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self.partitioned and not row.get('lastupdatetime'):
+            row = {**row, 'lastupdatetime': datetime.now().strftime(TIME_FORMAT)}  # 分区键不能为空
+        return await self.run(self._insert, row)
+
+    @staticmethod
+    def _insert(conn, row: Dict[str, Any]) -> Dict[str, Any]:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                INSERT INTO assets (
+                    identifier, url, timestamp, search_engine, query_statements,
+                    protocol, ip, port, domain, title, product, product_category,
+                    country, country_name, region, city, os, as_organization,
+                    lastupdatetime, icp, domain_rev
+                ) VALUES (
+                    %(identifier)s, %(url)s, %(timestamp)s, %(search_engine)s,
+                    %(query_statements)s, %(protocol)s, %(ip)s, %(port)s,
+                    %(domain)s, %(title)s, %(product)s, %(product_category)s,
+                    %(country)s, %(country_name)s, %(region)s, %(city)s,
+                    %(os)s, %(as_organization)s, %(lastupdatetime)s, %(icp)s,
+                    %(domain_rev)s
+                )
+                """,
+                row
+            )
+            conn.commit()
+            return {**row, "id": cursor.lastrowid}
+        finally:
+            cursor.close()
+
+    async def upsert_batch(self, rows: List[Dict[str, Any]]) -> int:
+        if self.partitioned:
+            return await self.run(self._upsert_batch_partitioned, rows)
+        return await self.run(self._upsert_batch, rows)
+
+    @staticmethod
+    def _upsert_batch(conn, rows: List[Dict[str, Any]]) -> int:
+        """多行 INSERT ... ON DUPLICATE KEY UPDATE，整批一次提交"""
+        cursor = conn.cursor()
+        try:
+            keys = list({(row['ip'], row['port']) for row in rows if row['port'] is not None})
+            existing = set()
+            if keys:
+                placeholders = ", ".join(["(%s, %s)"] * len(keys))
+                cursor.execute(
+                    f"SELECT ip, port FROM assets WHERE (ip, port) IN ({placeholders})",
+                    [v for key in keys for v in key]
+                )
+                existing = set(cursor.fetchall())
+            updated = count_existing(rows, existing)
+
+            columns = ", ".join(STORED_COLUMNS)
+            row_placeholder = "(" + ", ".join(["%s"] * len(STORED_COLUMNS)) + ")"
+            updates = ", ".join(f"{col} = VALUES({col})" for col in STORED_COLUMNS)
+            cursor.execute(
+                f"""
+                INSERT INTO assets ({columns})
+                VALUES {", ".join([row_placeholder] * len(rows))}
+                ON DUPLICATE KEY UPDATE {updates}
+                """,
+                [row[col] for row in rows for col in STORED_COLUMNS]
+            )
+            conn.commit()
+            return updated
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _upsert_batch_partitioned(conn, rows: List[Dict[str, Any]]) -> int:
+        """分区表 upsert：按 (ip, port) 查出已有行的 id，已有的按 id 更新，其余插入"""
+        cursor = conn.cursor()
+        try:
+            now = datetime.now().strftime(TIME_FORMAT)
+            latest: Dict[Any, Dict[str, Any]] = {}
+            for i, row in enumerate(rows):
+                # 分区键不能为空
+                row = {**row, 'lastupdatetime': row['lastupdatetime'] or now}
+                # 批内重复以最后一条为准；port 为空不参与去重
+                latest[(row['ip'], row['port']) if row['port'] is not None else i] = row
+
+            keys = [key for key in latest if isinstance(key, tuple)]
+            existing: Dict[Tuple[str, int], int] = {}
+            if keys:
+                placeholders = ", ".join(["(%s, %s)"] * len(keys))
+                cursor.execute(
+                    f"SELECT ip, port, id FROM assets WHERE (ip, port) IN ({placeholders})",
+                    [v for key in keys for v in key]
+                )
+                existing = {(ip, port): id_ for ip, port, id_ in cursor.fetchall()}
+            updated = count_existing(rows, set(existing))
+
+            updates = [row for key, row in latest.items() if key in existing]
+            inserts = [row for key, row in latest.items() if key not in existing]
+            if updates:
+                assignments = ", ".join(f"{col} = %s" for col in STORED_COLUMNS)
+                cursor.executemany(
+                    f"UPDATE assets SET {assignments} WHERE id = %s",
+                    [[row[col] for col in STORED_COLUMNS] + [existing[(row['ip'], row['port'])]] for row in updates]
+                )
+            if inserts:
+                row_placeholder = "(" + ", ".join(["%s"] * len(STORED_COLUMNS)) + ")"
+                cursor.execute(
+                    f"INSERT INTO assets ({', '.join(STORED_COLUMNS)}) "
+                    f"VALUES {', '.join([row_placeholder] * len(inserts))}",
+                    [row[col] for row in inserts for col in STORED_COLUMNS]
+                )
+            conn.commit()
+            return updated
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def select(
+        self,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        self._check_search(compiled)
+        return await self.run(self._select, compiled, skip, limit, after_id, columns)
+
+    @staticmethod
+    def _select(
+        conn,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int],
+        columns: Optional[Tuple[str, ...]]
+    ) -> List[Dict[str, Any]]:
+        # 元组游标 + 预先取得的列名组装结果，比字典游标逐行构造更省
+        cursor = conn.cursor()
+        where_clause = compiled.where
+        params = dict(compiled.params)
+
+        if after_id is not None:
+            # 游标翻页：沿主键索引定位，耗时与翻到第几页无关
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets 
+                WHERE {where_clause} AND id > %(after_id)s
+                ORDER BY id
+                LIMIT %(limit)s
+            """
+            params.update({'after_id': after_id, 'limit': limit})
+        elif compiled.search is not None:
+            # 全文检索按相关度排序
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets 
+                WHERE {where_clause}
+                ORDER BY {SEARCH_MATCH_SQL} DESC, id
+                LIMIT %(limit)s OFFSET %(offset)s
+            """
+            params.update({'limit': limit, 'offset': skip})
+        else:
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets 
+                WHERE {where_clause}
+                LIMIT %(limit)s OFFSET %(offset)s
+            """
+            params.update({'limit': limit, 'offset': skip})
+
+        try:
+            cursor.execute(query, params)
+            names = cursor.column_names
+            return format_times([dict(zip(names, row)) for row in cursor.fetchall()])
+        finally:
+            cursor.close()
+
+    async def iter_chunks(
+        self,
+        compiled: CompiledFilter,
+        chunk_size: int,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        self._check_search(compiled)
+        # 非缓冲游标，导出期间独占一个连接，不影响其他请求
+        async with self.connection() as conn:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            try:
+                await self.run_blocking(
+                    cursor.execute,
+                    f"SELECT {select_clause(columns)} FROM assets WHERE {compiled.where}",
+                    compiled.params
+                )
+                while True:
+                    rows = await self.run_blocking(cursor.fetchmany, chunk_size)
+                    if not rows:
+                        break
+                    yield format_times(rows)
+            finally:
+                # 提前结束时丢弃未读完的结果，避免连接处于 "Unread result" 状态
+                await self.run_blocking(conn.consume_results)
+                cursor.close()
+
+    async def get_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self._get_by_identifier, identifier)
+
+    @staticmethod
+    def _get_by_identifier(conn, identifier: str) -> Optional[Dict[str, Any]]:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {select_clause(None)} FROM assets WHERE identifier = %s",
+                (identifier,)
+            )
+            row = cursor.fetchone()
+            return format_times([row])[0] if row else None
+        finally:
+            cursor.close()
+
+    async def get_by_keys(self, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        # updated_at 列由迁移 0008 创建
+        columns = DELTA_COLUMNS if self.tombstones else None
+        return await self.run(self._get_by_keys, keys, columns)
+
+    @staticmethod
+    def _get_by_keys(
+        conn,
+        keys: List[Tuple[str, Optional[int]]],
+        columns: Optional[Tuple[str, ...]]
+    ) -> List[Dict[str, Any]]:
+        keyed, null_ips = split_keys(keys)
+        conditions, params = [], []
+        if keyed:
+            conditions.append(f"(ip, port) IN ({', '.join(['(%s, %s)'] * len(keyed))})")
+            params += [v for key in keyed for v in key]
+        if null_ips:
+            conditions.append(f"(ip IN ({', '.join(['%s'] * len(null_ips))}) AND port IS NULL)")
+            params += null_ips
+        if not conditions:
+            return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SELECT {select_clause(columns)} FROM assets WHERE {' OR '.join(conditions)}", params)
+            rows = format_times(cursor.fetchall())
+        finally:
+            cursor.close()
+        for row in rows:
+            if 'updated_at' in row:
+                row['updated_at'] = format_time(row['updated_at'])
+        return rows
+
+    async def delete_batch(
+        self,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...] = ('id',)
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return await self.run(self._delete_batch, compiled, after_id, batch_size, columns, self.tombstones)
+
+    @staticmethod
+    def _delete_batch(
+        conn,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...],
+        write_tombstones: bool
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        returned = tuple(dict.fromkeys(('id',) + columns))
+        selected = tuple(dict.fromkeys(returned + (TOMBSTONE_COLUMNS if write_tombstones else ())))
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {select_clause(selected)} FROM assets "
+                f"WHERE {compiled.where} AND id > %(after_id)s ORDER BY id LIMIT %(limit)s",
+                {**compiled.params, 'after_id': after_id, 'limit': batch_size}
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return [], None
+            # 删除时再次校验条件，跳过选出后被并发更新、已不再符合条件的行
+            id_params = {f"id_{i}": row['id'] for i, row in enumerate(rows)}
+            id_list = ', '.join(f'%({k})s' for k in id_params)
+            cursor.execute(
+                f"DELETE FROM assets WHERE id IN ({id_list}) AND {compiled.where}",
+                {**compiled.params, **id_params}
+            )
+            if cursor.rowcount < len(rows):
+                # 有行被跳过：同一事务内查出仍然存在的行，从返回结果中去掉
+                cursor.execute(f"SELECT id FROM assets WHERE id IN ({id_list})", id_params)
+                kept = {row['id'] for row in cursor.fetchall()}
+                deleted = [row for row in rows if row['id'] not in kept]
+            else:
+                deleted = rows
+            if write_tombstones:
+                tombstones.record(cursor, deleted)
+            conn.commit()
+            if selected != returned:
+                deleted = [{c: row[c] for c in returned} for row in deleted]
+            return format_times(deleted), rows[-1]['id']
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def count(self, compiled: CompiledFilter) -> int:
+        self._check_search(compiled)
+        return await self.run(self._count, compiled)
+
+    @staticmethod
+    def _count(conn, compiled: CompiledFilter) -> int:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM assets WHERE {compiled.where}", compiled.params)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    async def estimate_count(self, compiled: CompiledFilter) -> int:
+        self._check_search(compiled)
+        return await self.run(self._estimate_count, compiled)
+
+    @staticmethod
+    def _estimate_count(conn, compiled: CompiledFilter) -> int:
+        """无条件时读 information_schema 的表行数，有条件时取 EXPLAIN 的 rows * filtered"""
+        cursor = conn.cursor(dictionary=True)
+        try:
+            if not compiled.predicates:
+                cursor.execute(
+                    "SELECT TABLE_ROWS AS estimate FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'assets'"
+                )
+                row = cursor.fetchone()
+                return int(row['estimate'] or 0) if row else 0
+            cursor.execute(f"EXPLAIN SELECT * FROM assets WHERE {compiled.where}", compiled.params)
+            plan = cursor.fetchall()
+            if not plan or plan[0].get('rows') is None:
+                return 0
+            return int(plan[0]['rows'] * float(plan[0].get('filtered') or 100) / 100)
+        finally:
+            cursor.close()
+
+    async def facets(
+        self,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int
+    ) -> Dict[str, Any]:
+        rollup = self.rollup and uses_rollup(compiled)
+        if not rollup:
+            self._check_search(compiled)
+        return await self.run(self._facets, compiled, columns, limit, rollup, self.rollup_state)
+
+    @staticmethod
+    def _facets(
+        conn,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int,
+        rollup: bool,
+        check_state: bool
+    ) -> Dict[str, Any]:
+        if rollup and check_state and facets_table.is_dirty(conn):
+            rollup = False
+        cursor = conn.cursor(dictionary=True)
+        try:
+            result = {}
+            for column in columns:
+                cursor.execute(facet_sql(column, compiled, limit, rollup), compiled.params)
+                result[column] = normalize_facet(cursor.fetchall())
+            cursor.execute(total_sql(compiled, rollup), compiled.params)
+            total = int(next(iter(cursor.fetchone().values())))
+            return {"total": total, "source": "rollup" if rollup else "scan", "facets": result}
+        finally:
+            cursor.close()
+
+    async def rebuild_facets(self) -> int:
+        if not self.rollup:
+            raise ValueError("MySQL 未创建汇总表 assets_facets，请先执行迁移 0007")
+        return await self.run(facets_table.rebuild)
+
+    async def delta(
+        self,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        if not self.tombstones:
+            raise ValueError(f"MySQL 未创建 updated_at 列和墓碑表 {TOMBSTONES_TABLE}，请先执行迁移 0008")
+        self._check_search(compiled)
+        return await self.run(self._delta, compiled, updated_after, deleted_after, limit, settle, self.cutoffs)
+
+    @staticmethod
+    def _delta(
+        conn,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float,
+        read_cutoffs: bool
+    ) -> Dict[str, Any]:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT NOW(6) - INTERVAL %s MICROSECOND AS until", (int(settle * 1000000),))
+            until = format_time(cursor.fetchone()['until'])
+            params = delta_params(compiled, updated_after, deleted_after, until)
+            cursor.execute(changes_sql(compiled, limit), params)
+            items = format_times(cursor.fetchall())
+            deleted, cutoffs = [], []
+            if deleted_after is not None:
+                cursor.execute(tombstones_sql(limit), params)
+                deleted = cursor.fetchall()
+                if read_cutoffs:
+                    cursor.execute(cutoffs_sql(), params)
+                    cutoffs = cursor.fetchall()
+            for row in items:
+                row['updated_at'] = format_time(row['updated_at'])
+            for row in deleted + cutoffs:
+                row['deleted_at'] = format_time(row['deleted_at'])
+            for row in cutoffs:
+                row['lastupdatetime_before'] = row['lastupdatetime_before'].strftime(TIME_FORMAT)
+            return {"until": until, "items": items, "deleted": deleted, "cutoffs": cutoffs}
+        finally:
+            cursor.close()
+
+    async def prune_tombstones(self, retention_days: int) -> int:
+        if not self.tombstones:
+            return 0
+        return await self.run(self._prune_tombstones, retention_days, self.cutoffs)
+
+    @staticmethod
+    def _prune_tombstones(conn, retention_days: int, prune_cutoffs: bool) -> int:
+        cursor = conn.cursor()
+        try:
+            pruned = 0
+            for table in (TOMBSTONES_TABLE, CUTOFFS_TABLE) if prune_cutoffs else (TOMBSTONES_TABLE,):
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE deleted_at < NOW(6) - INTERVAL %s DAY",
+                    (int(retention_days),)
+                )
+                pruned += cursor.rowcount
+            conn.commit()
+            return pruned
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    async def ping(self) -> bool:
+        return await self.run(lambda conn: conn.is_connected())
+
+    async def replication_lag(self) -> Optional[float]:
+        return await self.run(self._replication_lag)
+
+    @staticmethod
+    def _replication_lag(conn) -> Optional[float]:
+        """副本延迟：SHOW REPLICA STATUS（8.0.22+），旧版本使用 SHOW SLAVE STATUS"""
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Error:
+                cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        if row is None:
+            return None  # 未配置复制，不是副本
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+        # 复制线程停止时延迟为 NULL
+        return float('inf') if lag is None else float(lag)
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return self.pool.stats()
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+        self._executor.shutdown(wait=False)
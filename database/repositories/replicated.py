@@ -0,0 +1,248 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from database.repositories.base import AssetsRepository
+from services.query_builder import CompiledFilter
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('round_robin', 'least_busy')
+
+# 当前请求是否要求读主库（读己之写），由请求依赖或 read_from_primary() 设置
+_read_primary: ContextVar[bool] = ContextVar('read_primary', default=False)
+
+def reads_from_primary() -> bool:
+    return _read_primary.get()
+
+def set_read_primary(value: bool):
+    """设置当前上下文（请求）的读路由，为 True 时读请求全部走主库"""
+    _read_primary.set(value)
+
+@contextmanager
+def read_from_primary():
+    """代码块内的读请求走主库，用于写入后需要立即读到结果的场景"""
+    token = _read_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_primary.reset(token)
+
+class _Replica:
+    """只读副本的状态：最近一次测得的延迟、进行中的读请求数和读/失败计数"""
+
+    def __init__(self, repository: AssetsRepository, index: int):
+        self.repository = repository
+        self.index = index
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.in_flight = 0
+        self.reads = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def healthy(self, max_lag: float) -> bool:
+        return self.lag is None or self.lag <= max_lag
+
+    def mark_failed(self, error: Exception):
+        """读取失败后视为不可用，直到下一次延迟检查"""
+        self.errors += 1
+        self.last_error = str(error)
+        self.lag = float('inf')
+        self.checked_at = time.monotonic()
+
+    def stats(self, max_lag: float) -> Dict[str, Any]:
+        return {
+            "name": f"replica-{self.index}",
+            "healthy": self.healthy(max_lag),
+            "lag": None if self.lag is None or self.lag == float('inf') else self.lag,
+            "in_flight": self.in_flight,
+            "reads": self.reads,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "pool": self.repository.stats(),
+        }
+
+class ReplicatedAssetsRepository(AssetsRepository):
+    """读写分离：写入走主库，读取按轮询或最少进行中请求分发到只读副本；
+    副本延迟超过 max_lag 或读取失败时回退主库"""
+
+    def __init__(
+        self,
+        primary: AssetsRepository,
+        replicas: Sequence[AssetsRepository],
+        strategy: str = 'round_robin',
+        max_lag: float = 5.0,
+        lag_check_interval: float = 5.0
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"不支持的副本选择策略: {strategy}，可选: {', '.join(STRATEGIES)}")
+        self.primary = primary
+        self.replicas = [_Replica(repository, index) for index, repository in enumerate(replicas, 1)]
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.name = f"{primary.name} (+{len(self.replicas)} 只读副本)"
+        self._next = 0
+        self._primary_reads = 0
+        self._fallbacks = 0
+
+    async def _check_lag(self, replica: _Replica):
+        # 先更新检查时间，并发的读请求不会重复检查
+        replica.checked_at = time.monotonic()
+        try:
+            replica.lag = await replica.repository.replication_lag()
+        except Exception as e:
+            logger.warning(f"副本 replica-{replica.index} 延迟检查失败: {str(e)}")
+            replica.mark_failed(e)
+            return
+        if not replica.healthy(self.max_lag):
+            logger.warning(f"副本 replica-{replica.index} 延迟 {replica.lag}s 超过 {self.max_lag}s，读请求回退主库")
+
+    async def _pick(self) -> Optional[_Replica]:
+        """选择一个延迟在阈值内的副本；要求读主库或没有可用副本时返回 None"""
+        if reads_from_primary() or not self.replicas:
+            return None
+        now = time.monotonic()
+        for replica in self.replicas:
+            if replica.checked_at is None or now - replica.checked_at >= self.lag_check_interval:
+                await self._check_lag(replica)
+        candidates = [replica for replica in self.replicas if replica.healthy(self.max_lag)]
+        if not candidates:
+            self._fallbacks += 1
+            return None
+        if self.strategy == 'least_busy':
+            return min(candidates, key=lambda replica: replica.in_flight)
+        self._next += 1
+        return candidates[self._next % len(candidates)]
+
+    async def _read(self, method: str, *args) -> Any:
+        replica = await self._pick()
+        if replica is not None:
+            replica.in_flight += 1
+            try:
+                result = await getattr(replica.repository, method)(*args)
+                replica.reads += 1
+                return result
+            except Exception as e:
+                logger.error(f"副本 replica-{replica.index} 读取失败，回退主库: {str(e)}")
+                replica.mark_failed(e)
+                self._fallbacks += 1
+            finally:
+                replica.in_flight -= 1
+        self._primary_reads += 1
+        return await getattr(self.primary, method)(*args)
+
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.primary.insert(row)
+
+    async def upsert_batch(self, rows: List[Dict[str, Any]]) -> int:
+        return await self.primary.upsert_batch(rows)
+
+    async def select(
+        self,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._read('select', compiled, skip, limit, after_id, columns)
+
+    async def iter_chunks(
+        self,
+        compiled: CompiledFilter,
+        chunk_size: int,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        # 导出过程中不切换数据源：已输出部分数据后副本出错直接抛出，避免重复或遗漏
+        replica = await self._pick()
+        if replica is not None:
+            replica.in_flight += 1
+            started = False
+            try:
+                async for rows in replica.repository.iter_chunks(compiled, chunk_size, columns):
+                    started = True
+                    yield rows
+                replica.reads += 1
+                return
+            except Exception as e:
+                replica.mark_failed(e)
+                if started:
+                    raise
+                logger.error(f"副本 replica-{replica.index} 读取失败，回退主库: {str(e)}")
+                self._fallbacks += 1
+            finally:
+                replica.in_flight -= 1
+        self._primary_reads += 1
+        async for rows in self.primary.iter_chunks(compiled, chunk_size, columns):
+            yield rows
+
+    async def get_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
+        return await self._read('get_by_identifier', identifier)
+
+    async def get_by_keys(self, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        # 读回刚写入的行，副本可能尚未同步，固定读主库
+        return await self.primary.get_by_keys(keys)
+
+    async def delete_batch(
+        self,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...] = ('id',)
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return await self.primary.delete_batch(compiled, after_id, batch_size, columns)
+
+    async def count(self, compiled: CompiledFilter) -> int:
+        return await self._read('count', compiled)
+
+    async def estimate_count(self, compiled: CompiledFilter) -> int:
+        return await self._read('estimate_count', compiled)
+
+    async def facets(
+        self,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int
+    ) -> Dict[str, Any]:
+        return await self._read('facets', compiled, columns, limit)
+
+    async def delta(
+        self,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        # 读主库：副本的当前时间领先于已复制的数据，按副本时间推进水位会跳过尚未复制的写入
+        return await self.primary.delta(compiled, updated_after, deleted_after, limit, settle)
+
+    async def prune_tombstones(self, retention_days: int) -> int:
+        return await self.primary.prune_tombstones(retention_days)
+
+    async def rebuild_facets(self) -> int:
+        return await self.primary.rebuild_facets()
+
+    async def ping(self) -> bool:
+        return await self.primary.ping()
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return {
+            "primary": self.primary.stats(),
+            "strategy": self.strategy,
+            "max_lag": self.max_lag,
+            "primary_reads": self._primary_reads,
+            "fallbacks": self._fallbacks,
+            "replicas": [replica.stats(self.max_lag) for replica in self.replicas],
+        }
+
+    async def close(self):
+        for replica in self.replicas:
+            try:
+                await replica.repository.close()
+            except Exception as e:
+                logger.error(f"关闭副本 replica-{replica.index} 失败: {str(e)}")
+        await self.primary.close()
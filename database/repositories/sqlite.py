@@ -0,0 +1,561 @@
+import asyncio
+import functools
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from database.repositories.base import AssetsRepository, count_existing, split_keys
+from schemas.assets import STORED_COLUMNS
+from services.query_builder import CompiledFilter, select_clause, SEARCH_MATCH_SQL, SEARCH_PARAM
+from services.search import search_text, fts5_query
+from services.network import ip_to_bytes, reverse_domain
+from services.facets import FACET_COLUMNS, FACETS_TABLE, COUNT_COLUMN, facet_sql, total_sql, uses_rollup, normalize_facet
+from services.delta import TOMBSTONES_TABLE, TOMBSTONE_COLUMNS, DELTA_COLUMNS, changes_sql, tombstones_sql, delta_params
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    identifier TEXT NOT NULL,
+    url TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    search_engine TEXT NOT NULL,
+    query_statements TEXT NOT NULL,
+    protocol TEXT,
+    ip TEXT NOT NULL,
+    port INTEGER,
+    domain TEXT,
+    title TEXT,
+    product TEXT,
+    product_category TEXT,
+    country TEXT,
+    country_name TEXT,
+    region TEXT,
+    city TEXT,
+    os TEXT,
+    as_organization TEXT,
+    lastupdatetime TEXT,
+    icp TEXT,
+    ip_bin BLOB,
+    domain_rev TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_assets_ip_port ON assets (ip, port);
+CREATE INDEX IF NOT EXISTS idx_assets_identifier ON assets (identifier);
+CREATE INDEX IF NOT EXISTS idx_assets_search_engine ON assets (search_engine);
+CREATE INDEX IF NOT EXISTS idx_assets_country_name ON assets (country_name);
+CREATE INDEX IF NOT EXISTS idx_assets_region ON assets (region);
+CREATE INDEX IF NOT EXISTS idx_assets_lastupdatetime ON assets (lastupdatetime);
+CREATE INDEX IF NOT EXISTS idx_assets_domain ON assets (domain);
+CREATE INDEX IF NOT EXISTS idx_assets_country ON assets (country);
+"""
+
+# 全文检索：词元由 Python 切分（assets_search_text，只注册在写连接上），FTS5 按空格分词；
+# 由触发器随 assets 同步，ON CONFLICT DO UPDATE 会触发 UPDATE 触发器
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE assets_fts USING fts5(body, tokenize = 'unicode61');
+CREATE TRIGGER assets_fts_insert AFTER INSERT ON assets BEGIN
+    INSERT INTO assets_fts (rowid, body) VALUES (new.id, assets_search_text(new.title, new.product, new.domain));
+END;
+CREATE TRIGGER assets_fts_delete AFTER DELETE ON assets BEGIN
+    DELETE FROM assets_fts WHERE rowid = old.id;
+END;
+CREATE TRIGGER assets_fts_update AFTER UPDATE OF title, product, domain ON assets BEGIN
+    UPDATE assets_fts SET body = assets_search_text(new.title, new.product, new.domain) WHERE rowid = new.id;
+END;
+INSERT INTO assets_fts (rowid, body) SELECT id, assets_search_text(title, product, domain) FROM assets;
+"""
+
+# 增量同步的时间戳：UTC，毫秒精度，文本按字典序比较即按时间比较
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+_NOW_OFFSET = "strftime('%Y-%m-%d %H:%M:%f', 'now', ?)"
+
+# 后来增加的列 -> (类型, 旧数据库补列后的回填表达式)；函数只注册在写连接上
+# ip_bin 为 ip 的 16 字节二进制形式，用于 CIDR 范围查询；domain_rev 为倒序域名，用于子域名查询；
+# updated_at 为插入或内容变化的时间，用于增量同步
+_ADDED_COLUMNS = {
+    'ip_bin': ('BLOB', 'assets_ip_bin(ip)'),
+    'domain_rev': ('TEXT', 'assets_domain_rev(domain)'),
+    'updated_at': ('TEXT', _NOW),
+}
+# domain_rev 按 LIKE 前缀查询，SQLite 的 LIKE 不区分大小写，索引需要 NOCASE 才能用于范围扫描
+_ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_assets_ip_bin_port ON assets (ip_bin, port);
+CREATE INDEX IF NOT EXISTS idx_assets_domain_rev ON assets (domain_rev COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_assets_updated_at_id ON assets (updated_at, id);
+"""
+
+# 墓碑表：删除资产时在同一写事务内写入，供增量同步报告删除
+_TOMBSTONES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TOMBSTONES_TABLE} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_id INTEGER NOT NULL,
+    identifier TEXT,
+    ip TEXT,
+    port INTEGER,
+    deleted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_{TOMBSTONES_TABLE}_deleted_at_id ON {TOMBSTONES_TABLE} (deleted_at, id);
+"""
+
+# 统计汇总表：每种维度组合一行及其资产数，由触发器在写事务内增减；
+# dims 为各维度值 quote() 后的拼接，区分 NULL 与字符串 'NULL'，空字符串计为 NULL
+def _facet_values(ref: str = '') -> List[str]:
+    return [f"{ref}{c}" if c == 'port' else f"nullif({ref}{c}, '')" for c in FACET_COLUMNS]
+
+def _facet_key(ref: str = '') -> str:
+    return " || ',' || ".join(f"quote({v})" for v in _facet_values(ref))
+
+_FACET_COLUMN_LIST = f"dims, {', '.join(FACET_COLUMNS)}, {COUNT_COLUMN}"
+
+def _facet_increment(ref: str) -> str:
+    return (
+        f"INSERT INTO {FACETS_TABLE} ({_FACET_COLUMN_LIST}) "
+        f"VALUES ({_facet_key(ref)}, {', '.join(_facet_values(ref))}, 1) "
+        f"ON CONFLICT (dims) DO UPDATE SET {COUNT_COLUMN} = {COUNT_COLUMN} + 1;"
+    )
+
+def _facet_decrement(ref: str) -> str:
+    return f"UPDATE {FACETS_TABLE} SET {COUNT_COLUMN} = {COUNT_COLUMN} - 1 WHERE dims = {_facet_key(ref)};"
+
+_FACETS_REBUILD = (
+    f"INSERT INTO {FACETS_TABLE} ({_FACET_COLUMN_LIST}) "
+    f"SELECT {_facet_key()} AS dims, {', '.join(_facet_values())}, COUNT(*) FROM assets GROUP BY dims;"
+)
+
+_FACETS_SCHEMA = f"""
+CREATE TABLE {FACETS_TABLE} (
+    dims TEXT PRIMARY KEY,
+    country_name TEXT,
+    product TEXT,
+    port INTEGER,
+    protocol TEXT,
+    search_engine TEXT,
+    {COUNT_COLUMN} INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER assets_facets_insert AFTER INSERT ON assets BEGIN
+    {_facet_increment('new.')}
+END;
+CREATE TRIGGER assets_facets_update AFTER UPDATE OF {', '.join(FACET_COLUMNS)} ON assets BEGIN
+    {_facet_decrement('old.')}
+    {_facet_increment('new.')}
+END;
+CREATE TRIGGER assets_facets_delete AFTER DELETE ON assets BEGIN
+    {_facet_decrement('old.')}
+END;
+{_FACETS_REBUILD}
+"""
+
+_INSERT_SQL = (
+    f"INSERT INTO assets ({', '.join(STORED_COLUMNS)}, ip_bin, updated_at) "
+    f"VALUES ({', '.join(':' + col for col in STORED_COLUMNS)}, assets_ip_bin(:ip), {_NOW})"
+)
+# 内容没有变化的行不更新，updated_at 保持不变（与 MySQL 的 ON UPDATE CURRENT_TIMESTAMP 一致）
+_UPSERT_COLUMNS = [col for col in STORED_COLUMNS if col not in ('ip', 'port')]
+_UPSERT_SQL = (
+    _INSERT_SQL + " ON CONFLICT (ip, port) DO UPDATE SET "
+    + ", ".join(f"{col} = excluded.{col}" for col in _UPSERT_COLUMNS + ['updated_at'])
+    + " WHERE " + " OR ".join(f"{col} IS NOT excluded.{col}" for col in _UPSERT_COLUMNS)
+)
+
+_KEY_CHUNK = 1000  # 预查已存在 (ip, port) 时每条语句的键数，避免超过 SQLite 参数上限
+
+_PARAM = re.compile(r"%\((\w+)\)s")
+_LIKE_PARAM = re.compile(r"LIKE %\((\w+)\)s")
+_FTS_MATCH = f"id IN (SELECT rowid FROM assets_fts WHERE assets_fts MATCH %({SEARCH_PARAM})s)"
+
+@lru_cache(maxsize=512)
+def to_sqlite(sql: str, ranked: bool = False) -> str:
+    """把 MySQL 风格的命名参数 %(name)s 转为 SQLite 的 :name，LIKE 补上反斜杠转义，全文检索改查 FTS5 表；
+    ranked 时检索条件由调用方 JOIN assets_fts 实现"""
+    sql = sql.replace(SEARCH_MATCH_SQL, "1=1" if ranked else _FTS_MATCH)
+    sql = _LIKE_PARAM.sub(r"LIKE :\1 ESCAPE '\\'", sql)
+    return _PARAM.sub(r":\1", sql)
+
+def _filter(compiled: CompiledFilter, ranked: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """SQLite 条件和参数，全文检索参数替换为 FTS5 查询串"""
+    params = dict(compiled.params)
+    if compiled.search is not None:
+        params[SEARCH_PARAM] = fts5_query(compiled.search)
+    return to_sqlite(compiled.where, ranked), params
+
+def _fetch_dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+class SQLiteAssetsRepository(AssetsRepository):
+    """嵌入式 SQLite 实现（WAL 模式）：单写连接加锁串行写入，每个工作线程一个只读连接并发读取"""
+
+    name = "SQLite"
+
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        busy_timeout: float = 5.0,
+        cache_size_kb: int = 65536,
+        mmap_size: int = 268435456
+    ):
+        self.path = str(path)
+        self.readers = max(readers, 1)
+        self.busy_timeout = busy_timeout
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='sqlite')
+
+        self._writer = self._open()
+        self._writer.create_function('assets_search_text', 3, search_text, deterministic=True)
+        self._writer.create_function('assets_ip_bin', 1, ip_to_bytes, deterministic=True)
+        self._writer.create_function('assets_domain_rev', 1, reverse_domain, deterministic=True)
+        # WAL：读不阻塞写、写不阻塞读，设置会持久化在数据库文件中
+        self.journal_mode = self._writer.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        self._writer.executescript(_SCHEMA)
+        existing = {row[1] for row in self._writer.execute("PRAGMA table_info(assets)")}
+        for column, (column_type, backfill) in _ADDED_COLUMNS.items():
+            if column not in existing:
+                # 旧数据库首次打开时补列并回填
+                self._writer.executescript(
+                    f"BEGIN; ALTER TABLE assets ADD COLUMN {column} {column_type}; "
+                    f"UPDATE assets SET {column} = {backfill}; COMMIT;"
+                )
+        self._writer.executescript(_ADDED_INDEXES)
+        self._writer.executescript(_TOMBSTONES_SCHEMA)
+        has_fts = self._writer.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'assets_fts'"
+        ).fetchone()
+        if not has_fts:
+            # 旧数据库首次打开时建立全文索引并回填已有记录
+            self._writer.executescript(f"BEGIN; {_FTS_SCHEMA} COMMIT;")
+        has_facets = self._writer.execute(
+            f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{FACETS_TABLE}'"
+        ).fetchone()
+        if not has_facets:
+            # 旧数据库首次打开时建立汇总表并按已有记录计数
+            self._writer.executescript(f"BEGIN; {_FACETS_SCHEMA} COMMIT;")
+
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        # isolation_level=None：自动提交，写事务由 _with_writer 显式控制
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL 下提交不再 fsync，只在 checkpoint 时同步
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        if readonly:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open(readonly=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def _with_reader(self, func: Callable, *args) -> Any:
+        return func(self._reader(), *args)
+
+    def _with_writer(self, func: Callable, *args) -> Any:
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn, *args)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    async def _run(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def _read(self, func: Callable, *args) -> Any:
+        return await self._run(self._with_reader, func, *args)
+
+    async def _write(self, func: Callable, *args) -> Any:
+        return await self._run(self._with_writer, func, *args)
+
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._write(self._insert, row)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, row: Dict[str, Any]) -> Dict[str, Any]:
+        cursor = conn.execute(_INSERT_SQL, row)
+        return {**row, "id": cursor.lastrowid}
+
+    async def upsert_batch(self, rows: List[Dict[str, Any]]) -> int:
+        return await self._write(self._upsert_batch, rows)
+
+    @staticmethod
+    def _upsert_batch(conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> int:
+        keys = list({(row['ip'], row['port']) for row in rows if row['port'] is not None})
+        existing = set()
+        for start in range(0, len(keys), _KEY_CHUNK):
+            chunk = keys[start:start + _KEY_CHUNK]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            cursor = conn.execute(
+                f"SELECT ip, port FROM assets WHERE (ip, port) IN (VALUES {placeholders})",
+                [v for key in chunk for v in key]
+            )
+            existing.update(cursor.fetchall())
+        updated = count_existing(rows, existing)
+        conn.executemany(_UPSERT_SQL, rows)
+        return updated
+
+    async def select(
+        self,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._read(self._select, compiled, skip, limit, after_id, columns)
+
+    @staticmethod
+    def _select(
+        conn: sqlite3.Connection,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int],
+        columns: Optional[Tuple[str, ...]]
+    ) -> List[Dict[str, Any]]:
+        ranked = compiled.search is not None and after_id is None
+        where_clause, params = _filter(compiled, ranked)
+        if ranked:
+            # 全文检索按 bm25 相关度排序（rank 越小越相关）
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets
+                JOIN (
+                    SELECT rowid AS fts_id, rank AS fts_rank FROM assets_fts WHERE assets_fts MATCH :{SEARCH_PARAM}
+                ) AS hits ON hits.fts_id = assets.id
+                WHERE {where_clause}
+                ORDER BY hits.fts_rank, assets.id
+                LIMIT :limit OFFSET :offset
+            """
+            params.update({'limit': limit, 'offset': skip})
+        elif after_id is not None:
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets
+                WHERE {where_clause} AND id > :after_id
+                ORDER BY id
+                LIMIT :limit
+            """
+            params.update({'after_id': after_id, 'limit': limit})
+        else:
+            query = f"""
+                SELECT {select_clause(columns)} FROM assets
+                WHERE {where_clause}
+                LIMIT :limit OFFSET :offset
+            """
+            params.update({'limit': limit, 'offset': skip})
+        return _fetch_dicts(conn.execute(query, params))
+
+    async def iter_chunks(
+        self,
+        compiled: CompiledFilter,
+        chunk_size: int,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        # 按 id 游标分段读取，不跨 await 持有游标；未请求 id 时在输出前去掉
+        strip_id = columns is not None and 'id' not in columns
+        select_columns = ('id',) + columns if strip_id else columns
+        after_id = 0
+        while True:
+            rows = await self.select(compiled, 0, chunk_size, after_id, select_columns)
+            if not rows:
+                break
+            after_id = rows[-1]['id']
+            if strip_id:
+                for row in rows:
+                    del row['id']
+            yield rows
+            if len(rows) < chunk_size:
+                break
+
+    async def get_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
+        return await self._read(self._get_by_identifier, identifier)
+
+    @staticmethod
+    def _get_by_identifier(conn: sqlite3.Connection, identifier: str) -> Optional[Dict[str, Any]]:
+        rows = _fetch_dicts(conn.execute(
+            f"SELECT {select_clause(None)} FROM assets WHERE identifier = ? LIMIT 1", (identifier,)
+        ))
+        return rows[0] if rows else None
+
+    async def get_by_keys(self, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        return await self._read(self._get_by_keys, keys)
+
+    @staticmethod
+    def _get_by_keys(conn: sqlite3.Connection, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        keyed, null_ips = split_keys(keys)
+        rows: List[Dict[str, Any]] = []
+        for start in range(0, len(keyed), _KEY_CHUNK):
+            chunk = keyed[start:start + _KEY_CHUNK]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            rows += _fetch_dicts(conn.execute(
+                f"SELECT {select_clause(DELTA_COLUMNS)} FROM assets WHERE (ip, port) IN (VALUES {placeholders})",
+                [v for key in chunk for v in key]
+            ))
+        for start in range(0, len(null_ips), _KEY_CHUNK):
+            chunk = null_ips[start:start + _KEY_CHUNK]
+            rows += _fetch_dicts(conn.execute(
+                f"SELECT {select_clause(DELTA_COLUMNS)} FROM assets "
+                f"WHERE ip IN ({', '.join(['?'] * len(chunk))}) AND port IS NULL",
+                chunk
+            ))
+        return rows
+
+    async def delete_batch(
+        self,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...] = ('id',)
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        return await self._write(self._delete_batch, compiled, after_id, batch_size, columns)
+
+    @staticmethod
+    def _delete_batch(
+        conn: sqlite3.Connection,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...]
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        # 选出与删除在同一个写事务内，选出的行就是被删除的行
+        returned = tuple(dict.fromkeys(('id',) + columns))
+        where_clause, params = _filter(compiled)
+        rows = _fetch_dicts(conn.execute(
+            f"SELECT {select_clause(tuple(dict.fromkeys(returned + TOMBSTONE_COLUMNS)))} FROM assets "
+            f"WHERE {where_clause} AND id > :after_id ORDER BY id LIMIT :limit",
+            {**params, 'after_id': after_id, 'limit': batch_size}
+        ))
+        if not rows:
+            return [], None
+        ids = [row['id'] for row in rows]
+        conn.execute(f"DELETE FROM assets WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        conn.executemany(
+            f"INSERT INTO {TOMBSTONES_TABLE} (asset_id, identifier, ip, port, deleted_at) "
+            f"VALUES (:id, :identifier, :ip, :port, {_NOW})",
+            rows
+        )
+        return [{c: row[c] for c in returned} for row in rows], ids[-1]
+
+    async def count(self, compiled: CompiledFilter) -> int:
+        return await self._read(self._count, compiled)
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection, compiled: CompiledFilter) -> int:
+        where_clause, params = _filter(compiled)
+        cursor = conn.execute(f"SELECT COUNT(*) FROM assets WHERE {where_clause}", params)
+        return cursor.fetchone()[0]
+
+    async def estimate_count(self, compiled: CompiledFilter) -> int:
+        # SQLite 没有可用的行数估算，本地计数不经过网络，直接精确计数
+        return await self.count(compiled)
+
+    async def facets(
+        self,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int
+    ) -> Dict[str, Any]:
+        return await self._read(self._facets, compiled, columns, limit)
+
+    @staticmethod
+    def _facets(conn: sqlite3.Connection, compiled: CompiledFilter, columns: Tuple[str, ...], limit: int) -> Dict[str, Any]:
+        rollup = uses_rollup(compiled)
+        _, params = _filter(compiled)
+        result = {}
+        for column in columns:
+            cursor = conn.execute(to_sqlite(facet_sql(column, compiled, limit, rollup)), params)
+            result[column] = normalize_facet(_fetch_dicts(cursor))
+        total = conn.execute(to_sqlite(total_sql(compiled, rollup)), params).fetchone()[0]
+        return {"total": total, "source": "rollup" if rollup else "scan", "facets": result}
+
+    async def rebuild_facets(self) -> int:
+        return await self._write(self._rebuild_facets)
+
+    @staticmethod
+    def _rebuild_facets(conn: sqlite3.Connection) -> int:
+        conn.execute(f"DELETE FROM {FACETS_TABLE}")
+        return conn.execute(_FACETS_REBUILD).rowcount
+
+    async def delta(
+        self,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        return await self._read(self._delta, compiled, updated_after, deleted_after, limit, settle)
+
+    @staticmethod
+    def _delta(
+        conn: sqlite3.Connection,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        until = conn.execute(f"SELECT {_NOW_OFFSET}", (f"-{float(settle)} seconds",)).fetchone()[0]
+        # 全文检索参数使用 _filter 转换后的 FTS5 查询串
+        params = {**delta_params(compiled, updated_after, deleted_after, until), **_filter(compiled)[1]}
+        items = _fetch_dicts(conn.execute(to_sqlite(changes_sql(compiled, limit)), params))
+        deleted = []
+        if deleted_after is not None:
+            deleted = _fetch_dicts(conn.execute(to_sqlite(tombstones_sql(limit)), params))
+        return {"until": until, "items": items, "deleted": deleted}
+
+    async def prune_tombstones(self, retention_days: int) -> int:
+        return await self._write(self._prune_tombstones, retention_days)
+
+    @staticmethod
+    def _prune_tombstones(conn: sqlite3.Connection, retention_days: int) -> int:
+        return conn.execute(
+            f"DELETE FROM {TOMBSTONES_TABLE} WHERE deleted_at < {_NOW_OFFSET}",
+            (f"-{int(retention_days)} days",)
+        ).rowcount
+
+    async def ping(self) -> bool:
+        return await self._read(lambda conn: conn.execute("SELECT 1").fetchone()[0] == 1)
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return {
+            "path": self.path,
+            "journal_mode": self.journal_mode,
+            "readers": len(self._readers),
+            "max_readers": self.readers
+        }
+
+    def _close(self):
+        self._executor.shutdown(wait=True)
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._writer.execute("PRAGMA optimize")  # 关闭前按查询情况更新统计信息
+            self._writer.close()
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._close)
@@ -0,0 +1,418 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from httpx import AsyncClient, Limits, Timeout
+from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
+from database.repositories.base import AssetsRepository, count_existing, split_keys
+from services.query_builder import CompiledFilter, apply_postgrest, select_clause
+from services.search import tsquery
+from services.facets import FACET_COLUMNS, FACETS_TABLE, COUNT_COLUMN, uses_rollup, normalize_facet
+from services.delta import TOMBSTONES_TABLE, DELTA_COLUMNS
+
+# 按 ip 预查已存在的行时每个请求的 ip 数，in.(...) 列表放在 URL 中，避免超过网关的 URL 长度上限
+KEY_LOOKUP_CHUNK = 100
+
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """PostgREST 客户端，底层 httpx 连接池的大小、keep-alive、HTTP/2 和超时均可配置"""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 60,
+        connect_timeout: float = 5,
+        **kwargs
+    ):
+        # create_session 在父类 __init__ 中调用，需要先保存配置
+        self.http2 = http2
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connect_timeout = connect_timeout
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> AsyncClient:
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=Timeout(timeout, connect=self.connect_timeout),
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=self.http2,
+            limits=self.limits
+        )
+
+class InsertBatcher:
+    """把短时间内并发的单条插入合并为一次批量请求，按提交顺序分发结果"""
+
+    def __init__(
+        self,
+        send: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+        max_batch: int = 100,
+        max_delay: float = 0.005
+    ):
+        self._send = send
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._spawn(self._flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+        # 发送在独立任务中进行，单个提交方取消不会中断整批
+        return await future
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        try:
+            created = await self._send([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], error=e)
+                return
+            # 整批失败时逐条重试，只让真正出错的记录失败
+            for row, future in batch:
+                try:
+                    result = (await self._send([row]))[0]
+                except Exception as row_error:
+                    self._resolve(future, error=row_error)
+                else:
+                    self._resolve(future, result)
+            return
+        for (_, future), result in zip(batch, created):
+            self._resolve(future, result)
+
+    async def close(self):
+        """发送剩余记录并等待进行中的批次完成"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, error: Optional[Exception] = None):
+        if future.done():  # 提交方已取消
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "pending": len(self._pending),
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0.0
+        }
+
+class SupabaseAssetsRepository(AssetsRepository):
+    """Supabase 实现：通过异步 PostgREST 客户端访问"""
+
+    name = "Supabase"
+
+    def __init__(
+        self,
+        client: AsyncPostgrestClient,
+        table: str = 'assets',
+        read_chunk_size: int = 1000,
+        parallel_reads: int = 4,
+        insert_batch_size: int = 100,
+        insert_batch_delay: float = 0.005
+    ):
+        self.client = client
+        self.table = table
+        # PostgREST 单次响应有 max-rows 上限（Supabase 默认 1000），更大的读取拆成多个 range
+        self.read_chunk_size = max(read_chunk_size, 1)
+        self.parallel_reads = max(parallel_reads, 1)
+        self._batcher = None
+        if insert_batch_size > 1 and insert_batch_delay > 0:
+            self._batcher = InsertBatcher(self._insert_many, insert_batch_size, insert_batch_delay)
+
+    def _table(self):
+        return self.client.table(self.table)
+
+    def _source(self, compiled: CompiledFilter):
+        """查询来源：全文检索走 search_assets 函数（按相关度排序，database/sql/supabase_fulltext.sql），其余直接查表"""
+        if compiled.search is None:
+            return self._table(), compiled
+        rest = compiled._replace(predicates=tuple(p for p in compiled.predicates if p[1] != 'search'))
+        return self.client.rpc('search_assets', {'query': tsquery(compiled.search)}), rest
+
+    async def _insert_many(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        query = self._table().insert(rows)
+        # insert 默认返回整行，与查询一样显式列出返回的字段，不返回 search_vector、ip_inet 生成列
+        query.params = query.params.set('select', select_clause(None, ','))
+        result = await query.execute()
+        return result.data
+
+    async def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._batcher is not None:
+            return await self._batcher.submit(row)
+        created = await self._insert_many([row])
+        return created[0] if created else None
+
+    async def _select_by_ips(self, ips: List[str], select: str) -> List[Dict[str, Any]]:
+        """读取这些 ip 下的全部行（select 需包含 id）：ip 分组控制 URL 长度，组内按 id 键集翻页，不受 max-rows 截断"""
+        rows: List[Dict[str, Any]] = []
+        for start in range(0, len(ips), KEY_LOOKUP_CHUNK):
+            chunk = ips[start:start + KEY_LOOKUP_CHUNK]
+            after_id = 0
+            while True:
+                query = self._table().select(select).in_('ip', chunk).gt('id', after_id)
+                part = (await query.order('id').limit(self.read_chunk_size).execute()).data
+                rows.extend(part)
+                if len(part) < self.read_chunk_size:
+                    break
+                after_id = part[-1]['id']
+        return rows
+
+    async def upsert_batch(self, rows: List[Dict[str, Any]]) -> int:
+        ips = list({row['ip'] for row in rows})
+        found = await self._select_by_ips(ips, 'id,ip,port')
+        existing = {(r['ip'], r['port']) for r in found if r['port'] is not None}
+        updated = count_existing(rows, existing)
+        await self._table().upsert(
+            rows, on_conflict='ip,port', returning=ReturnMethod.minimal
+        ).execute()
+        return updated
+
+    async def select(
+        self,
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        # 显式列出字段，不返回 search_vector、ip_inet 生成列
+        select = select_clause(columns, ',')
+        if after_id is not None:
+            return await self._select_after(compiled, select, after_id, limit)
+        if limit <= self.read_chunk_size:
+            return await self._read_range(compiled, select, skip, skip + limit - 1)
+
+        # 大页拆成多个 range 并行读取，排序一致保证各段互不重叠
+        semaphore = asyncio.Semaphore(self.parallel_reads)
+
+        async def read_range(start: int, end: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._read_range(compiled, select, start, end)
+
+        parts = await asyncio.gather(*[
+            read_range(start, min(start + self.read_chunk_size, skip + limit) - 1)
+            for start in range(skip, skip + limit, self.read_chunk_size)
+        ])
+        return [row for part in parts for row in part]
+
+    async def _read_range(self, compiled: CompiledFilter, select: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """按偏移读取一段；始终按 id（全文检索时按相关度）排序，偏移翻页结果确定，大小页的顺序一致"""
+        source, rest = self._source(compiled)
+        query = apply_postgrest(source.select(select), rest)
+        if compiled.search is None:
+            query = query.order('id')
+        return (await query.range(start, end).execute()).data
+
+    async def _select_after(
+        self,
+        compiled: CompiledFilter,
+        select: str,
+        after_id: int,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """游标翻页；超过单次上限时依次读取（下一段依赖上一段的最后一个 id）"""
+        rows: List[Dict[str, Any]] = []
+        while len(rows) < limit:
+            size = min(limit - len(rows), self.read_chunk_size)
+            query = apply_postgrest(self._table().select(select), compiled)
+            part = (await query.gt('id', after_id).order('id').limit(size).execute()).data
+            rows.extend(part)
+            if len(part) < size:
+                break
+            after_id = part[-1]['id']
+        return rows
+
+    async def iter_chunks(
+        self,
+        compiled: CompiledFilter,
+        chunk_size: int,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        # 按 id 游标分段读取；分段需要读取 id，未请求时在输出前去掉
+        strip_id = columns is not None and 'id' not in columns
+        select = select_clause(('id',) + columns if strip_id else columns, ',')
+        after_id = 0
+        while True:
+            query = apply_postgrest(self._table().select(select), compiled)
+            rows = (await query.gt('id', after_id).order('id').limit(chunk_size).execute()).data
+            if not rows:
+                break
+            after_id = rows[-1]['id']
+            if strip_id:
+                for row in rows:
+                    del row['id']
+            yield rows
+            if len(rows) < chunk_size:
+                break
+
+    async def get_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
+        result = await self._table().select(select_clause(None, ',')).eq('identifier', identifier).execute()
+        return result.data[0] if result.data else None
+
+    async def get_by_keys(self, keys: List[Tuple[str, Optional[int]]]) -> List[Dict[str, Any]]:
+        keyed, null_ips = split_keys(keys)
+        wanted = set(keyed)
+        ips = list({ip for ip, _ in keyed} | set(null_ips))
+        if not ips:
+            return []
+        # 与 upsert_batch 一样按 ip 读取后在本地按 (ip, port) 精确过滤
+        found = await self._select_by_ips(ips, select_clause(DELTA_COLUMNS, ','))
+        return [
+            row for row in found
+            if (row['ip'], row['port']) in wanted or (row['port'] is None and row['ip'] in null_ips)
+        ]
+
+    async def delete_batch(
+        self,
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int,
+        columns: Tuple[str, ...] = ('id',)
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        query = apply_postgrest(self._table().select('id'), compiled)
+        rows = (await query.gt('id', after_id).order('id').limit(batch_size).execute()).data
+        if not rows:
+            return [], None
+        ids = [row['id'] for row in rows]
+        # 删除时再次带上条件，跳过选出后被并发更新、已不再符合条件的行；
+        # 返回实际被删除的行，只保留需要的列。墓碑由触发器写入（database/sql/supabase_delta_sync.sql）
+        query = apply_postgrest(
+            self._table().delete(returning=ReturnMethod.representation), compiled
+        )
+        deleted = (await query.in_('id', ids).execute()).data or []
+        return [{c: row.get(c) for c in dict.fromkeys(('id',) + columns)} for row in deleted], ids[-1]
+
+    async def count(self, compiled: CompiledFilter) -> int:
+        # head=True 只取计数，不传输行数据
+        query = apply_postgrest(self._table().select('*', count='exact', head=True), compiled)
+        return (await query.execute()).count
+
+    async def estimate_count(self, compiled: CompiledFilter) -> int:
+        # estimated: 小结果集精确计数，超过阈值时使用 planner 估算
+        query = apply_postgrest(self._table().select('*', count='estimated', head=True), compiled)
+        return (await query.execute()).count or 0
+
+    async def facets(
+        self,
+        compiled: CompiledFilter,
+        columns: Tuple[str, ...],
+        limit: int
+    ) -> Dict[str, Any]:
+        # PostgREST 不能分组聚合，按 dims 游标读出汇总表中符合条件的维度组合后在本地求和；
+        # 汇总表行数只与维度组合数有关（database/sql/supabase_facets.sql）
+        if not uses_rollup(compiled):
+            raise ValueError(f"Supabase 的统计只支持按维度列过滤: {', '.join(FACET_COLUMNS)}")
+        select = ','.join(('dims',) + columns + (COUNT_COLUMN,))
+        rows: List[Dict[str, Any]] = []
+        after = ''
+        while True:
+            query = apply_postgrest(self.client.table(FACETS_TABLE).select(select), compiled)
+            chunk = (await query.gt('dims', after).gt(COUNT_COLUMN, 0)
+                     .order('dims').limit(self.read_chunk_size).execute()).data
+            rows.extend(chunk)
+            if len(chunk) < self.read_chunk_size:
+                break
+            after = chunk[-1]['dims']
+        result = {
+            column: normalize_facet([{"value": row[column], "count": row[COUNT_COLUMN]} for row in rows])[:limit]
+            for column in columns
+        }
+        total = sum(row[COUNT_COLUMN] for row in rows)
+        return {"total": total, "source": "rollup", "facets": result}
+
+    async def rebuild_facets(self) -> int:
+        return (await self.client.rpc('rebuild_assets_facets', {}).execute()).data
+
+    @staticmethod
+    def _after(column: str, position: Tuple[str, int]) -> str:
+        """(column, id) 在 position 之后的 or 条件，时间值加引号避免其中的符号被解析"""
+        value, after_id = position
+        return f'{column}.gt."{value}",and({column}.eq."{value}",id.gt.{int(after_id)})'
+
+    async def delta(
+        self,
+        compiled: CompiledFilter,
+        updated_after: Tuple[str, int],
+        deleted_after: Optional[Tuple[str, int]],
+        limit: int,
+        settle: float
+    ) -> Dict[str, Any]:
+        # PostgREST 取不到数据库时间，使用本机时间（UTC），settle 同时吸收两者之间的少量时钟偏差
+        until = (datetime.now(timezone.utc) - timedelta(seconds=settle)).isoformat()
+        query = apply_postgrest(self._table().select(','.join(DELTA_COLUMNS)), compiled)
+        items = (await query.or_(self._after('updated_at', updated_after)).lt('updated_at', until)
+                 .order('updated_at').order('id').limit(limit).execute()).data
+        deleted = []
+        if deleted_after is not None:
+            query = self.client.table(TOMBSTONES_TABLE).select('id,asset_id,identifier,ip,port,deleted_at')
+            deleted = (await query.or_(self._after('deleted_at', deleted_after)).lt('deleted_at', until)
+                       .order('deleted_at').order('id').limit(limit).execute()).data
+        return {"until": until, "items": items, "deleted": deleted}
+
+    async def prune_tombstones(self, retention_days: int) -> int:
+        return (await self.client.rpc('prune_asset_tombstones', {'retention_days': retention_days}).execute()).data
+
+    async def ping(self) -> bool:
+        await self._table().select('id').limit(1).execute()
+        return True
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        limits = getattr(self.client, 'limits', None)
+        return {
+            "http2": getattr(self.client, 'http2', True),
+            "max_connections": limits.max_connections if limits else None,
+            "max_keepalive": limits.max_keepalive_connections if limits else None,
+            "read_chunk_size": self.read_chunk_size,
+            "parallel_reads": self.parallel_reads,
+            "insert_batching": self._batcher.stats() if self._batcher else None
+        }
+
+    async def close(self):
+        if self._batcher is not None:
+            await self._batcher.close()
+        await self.client.aclose()
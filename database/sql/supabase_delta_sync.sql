@@ -0,0 +1,66 @@
+-- assets 增量同步（Supabase / PostgreSQL），在 SQL Editor 中执行一次，可重复执行
+-- updated_at 为插入或内容变化的时间，asset_tombstones 记录被删除的资产；
+-- GET /assets/delta 按 (updated_at, id)、(deleted_at, id) 键集读取水位之后的变更。
+-- 时间取 clock_timestamp()（语句执行时刻）而不是 now()（事务开始时刻），长事务的写入不会落在更早的时间上
+
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT clock_timestamp();
+
+CREATE INDEX IF NOT EXISTS assets_updated_at_id_idx ON assets (updated_at, id);
+
+-- 只有内容变化时才更新时间（upsert 命中内容相同的行不算变更），应用写入时不传 updated_at
+CREATE OR REPLACE FUNCTION assets_touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW IS DISTINCT FROM OLD THEN
+        NEW.updated_at := clock_timestamp();
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS assets_touch_updated_at ON assets;
+CREATE TRIGGER assets_touch_updated_at BEFORE UPDATE ON assets
+    FOR EACH ROW EXECUTE FUNCTION assets_touch_updated_at();
+
+CREATE TABLE IF NOT EXISTS asset_tombstones (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    asset_id bigint NOT NULL,
+    identifier text,
+    ip text,
+    port integer,
+    deleted_at timestamptz NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS asset_tombstones_deleted_at_id_idx ON asset_tombstones (deleted_at, id);
+
+-- 删除经由 PostgREST，无法与写墓碑放在同一个请求的事务中，由语句级触发器在删除事务内写入
+CREATE OR REPLACE FUNCTION assets_write_tombstones()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO asset_tombstones (asset_id, identifier, ip, port)
+    SELECT id, identifier, ip, port FROM old_rows;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS assets_write_tombstones ON assets;
+CREATE TRIGGER assets_write_tombstones AFTER DELETE ON assets
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION assets_write_tombstones();
+
+-- 清理超过保留期的墓碑，返回清理条数（删除资产时由应用调用）
+CREATE OR REPLACE FUNCTION prune_asset_tombstones(retention_days integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    pruned integer;
+BEGIN
+    DELETE FROM asset_tombstones WHERE deleted_at < clock_timestamp() - make_interval(days => retention_days);
+    GET DIAGNOSTICS pruned = ROW_COUNT;
+    RETURN pruned;
+END
+$$;
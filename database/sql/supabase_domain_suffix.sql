@@ -0,0 +1,22 @@
+-- assets 子域名查询（Supabase / PostgreSQL），在 SQL Editor 中执行一次，可重复执行
+-- domain_rev 为倒序域名（www.example.com -> com.example.www.），由应用在写入时计算（services/network.py 的 reverse_domain）；
+-- domain_suffix= 过滤转换为 domain_rev LIKE 'com.example.%'，text_pattern_ops 索引使前缀匹配走范围扫描
+
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS domain_rev text;
+
+CREATE INDEX IF NOT EXISTS assets_domain_rev_idx ON assets (domain_rev text_pattern_ops);
+
+-- 回填已有数据，规则与 reverse_domain 一致：小写、去掉首尾的点和开头的 *.，IP 地址不回填
+-- （IP 判断使用 supabase_ip_range.sql 中的 assets_ip_inet，需先执行该文件）
+CREATE OR REPLACE FUNCTION assets_domain_rev(domain text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT string_agg(label, '.' ORDER BY n DESC) || '.'
+    FROM unnest(string_to_array(regexp_replace(btrim(lower(btrim(domain)), '.'), '^\*\.', ''), '.'))
+        WITH ORDINALITY AS t(label, n)
+    WHERE label <> ''
+$$;
+
+UPDATE assets SET domain_rev = assets_domain_rev(domain)
+WHERE domain_rev IS NULL AND domain IS NOT NULL AND assets_ip_inet(domain) IS NULL;
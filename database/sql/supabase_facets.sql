@@ -0,0 +1,82 @@
+-- assets 统计汇总表（Supabase / PostgreSQL），在 SQL Editor 中执行一次，可重复执行
+-- 每种维度组合 (country_name, product, port, protocol, search_engine) 一行及其资产数，
+-- 由 assets 上的语句级触发器在写入事务内按批增减；GET /assets/stats 读取本表，
+-- POST /assets/stats/rebuild 调用 rebuild_assets_facets() 全量重建。空字符串计为 NULL
+
+CREATE TABLE IF NOT EXISTS assets_facets (
+    dims text PRIMARY KEY,  -- 各维度值 quote_nullable() 后以逗号拼接，区分 NULL 与字符串 'NULL'
+    country_name text,
+    product text,
+    port integer,
+    protocol text,
+    search_engine text,
+    asset_count bigint NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION assets_facet_key(country_name text, product text, port integer, protocol text, search_engine text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT concat_ws(',', quote_nullable(nullif(country_name, '')), quote_nullable(nullif(product, '')),
+                     quote_nullable(port), quote_nullable(nullif(protocol, '')), quote_nullable(nullif(search_engine, '')))
+$$;
+
+-- 语句级触发器：整条语句涉及的行按维度组合合并后一次写入，UPDATE（含 upsert 命中已有行）先扣旧值再加新值
+CREATE OR REPLACE FUNCTION assets_facets_sync()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE assets_facets AS f SET asset_count = f.asset_count - d.n
+        FROM (
+            SELECT assets_facet_key(country_name, product, port, protocol, search_engine) AS dims, count(*) AS n
+            FROM old_rows GROUP BY 1
+        ) AS d
+        WHERE f.dims = d.dims;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO assets_facets AS f (dims, country_name, product, port, protocol, search_engine, asset_count)
+        SELECT assets_facet_key(country_name, product, port, protocol, search_engine),
+               nullif(country_name, ''), nullif(product, ''), port, nullif(protocol, ''), nullif(search_engine, ''),
+               count(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4, 5, 6
+        ON CONFLICT (dims) DO UPDATE SET asset_count = f.asset_count + excluded.asset_count;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS assets_facets_insert ON assets;
+CREATE TRIGGER assets_facets_insert AFTER INSERT ON assets
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION assets_facets_sync();
+DROP TRIGGER IF EXISTS assets_facets_update ON assets;
+CREATE TRIGGER assets_facets_update AFTER UPDATE ON assets
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION assets_facets_sync();
+DROP TRIGGER IF EXISTS assets_facets_delete ON assets;
+CREATE TRIGGER assets_facets_delete AFTER DELETE ON assets
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION assets_facets_sync();
+
+-- 全量重建：阻塞 assets 的写入，清空后按维度组合重新计数，返回维度组合数
+CREATE OR REPLACE FUNCTION rebuild_assets_facets()
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    groups integer;
+BEGIN
+    LOCK TABLE assets IN SHARE MODE;
+    DELETE FROM assets_facets;
+    INSERT INTO assets_facets (dims, country_name, product, port, protocol, search_engine, asset_count)
+    SELECT assets_facet_key(country_name, product, port, protocol, search_engine),
+           nullif(country_name, ''), nullif(product, ''), port, nullif(protocol, ''), nullif(search_engine, ''),
+           count(*)
+    FROM assets
+    GROUP BY 1, 2, 3, 4, 5, 6;
+    GET DIAGNOSTICS groups = ROW_COUNT;
+    RETURN groups;
+END
+$$;
+
+SELECT rebuild_assets_facets();
@@ -0,0 +1,39 @@
+-- assets 全文检索（Supabase / PostgreSQL），在 SQL Editor 中执行一次，可重复执行
+-- 词元切分与 services/search.py 的 tokens() 一致：拉丁字母/数字按单词，
+-- 中日韩连续字符切为重叠的二元组并补上末尾单字；查询串由应用生成，交给 to_tsquery('simple', ...)
+
+CREATE OR REPLACE FUNCTION assets_search_text(VARIADIC parts text[])
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT coalesce(string_agg(t.token, ' ' ORDER BY runs.run_no, t.token_no), '')
+    FROM regexp_matches(
+        lower(array_to_string(parts, ' ')),
+        '[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[0-9a-z]+',
+        'g'
+    ) WITH ORDINALITY AS runs(m, run_no)
+    CROSS JOIN LATERAL (
+        SELECT substr(runs.m[1], i, 2) AS token, i AS token_no
+        FROM generate_series(1, length(runs.m[1]) - 1) AS i
+        WHERE runs.m[1] !~ '^[0-9a-z]'
+        UNION ALL
+        SELECT CASE WHEN runs.m[1] ~ '^[0-9a-z]' THEN runs.m[1] ELSE right(runs.m[1], 1) END,
+               length(runs.m[1])
+    ) AS t
+$$;
+
+-- 生成列随 title/product/domain 自动更新；添加时会重写整表
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', assets_search_text(title, product, domain))) STORED;
+
+CREATE INDEX IF NOT EXISTS assets_search_vector_idx ON assets USING gin (search_vector);
+
+-- 按相关度排序的检索，PostgREST 在其结果上继续应用其他过滤条件和分页
+CREATE OR REPLACE FUNCTION search_assets(query text)
+RETURNS SETOF assets
+LANGUAGE sql STABLE
+AS $$
+    SELECT * FROM assets
+    WHERE search_vector @@ to_tsquery('simple', query)
+    ORDER BY ts_rank_cd(search_vector, to_tsquery('simple', query)) DESC, id
+$$;
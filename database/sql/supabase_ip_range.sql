@@ -0,0 +1,20 @@
+-- assets 网段查询（Supabase / PostgreSQL），在 SQL Editor 中执行一次，可重复执行
+-- ip 为文本列，生成 inet 列 ip_inet 后 cidr= 过滤转换为 ip_inet 的范围条件，走 (ip_inet, port) 索引
+
+-- 非法地址（如域名）返回 NULL，不影响写入
+CREATE OR REPLACE FUNCTION assets_ip_inet(ip text)
+RETURNS inet
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+AS $$
+BEGIN
+    RETURN host(trim(ip)::inet)::inet;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$$;
+
+-- 生成列随 ip 自动更新；添加时会重写整表
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS ip_inet inet
+    GENERATED ALWAYS AS (assets_ip_inet(ip)) STORED;
+
+CREATE INDEX IF NOT EXISTS assets_ip_inet_port_idx ON assets (ip_inet, port);
@@ -0,0 +1,67 @@
+from datetime import date
+from typing import Any, Dict, List, Tuple
+from services.delta import TOMBSTONES_TABLE, CUTOFFS_TABLE
+
+# asset_tombstones 墓碑表（MySQL）：删除资产时在同一事务内写入，供增量同步接口报告删除；
+# 超过保留期（DELTA_TOMBSTONE_RETENTION_DAYS）的记录由删除路径顺带清理
+CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TOMBSTONES_TABLE} (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    asset_id INT NOT NULL,
+    identifier VARCHAR(255) NULL,
+    ip VARCHAR(255) NULL,
+    port INT NULL,
+    deleted_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    KEY {TOMBSTONES_TABLE}_deleted_at_id (deleted_at, id)
+)
+"""
+
+# 范围墓碑（迁移 0009）：删除过期分区后每个分区记一条，表示 lastupdatetime 早于上界的行已全部删除
+CREATE_CUTOFFS_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {CUTOFFS_TABLE} (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    partition_name VARCHAR(64) NOT NULL,
+    lastupdatetime_before DATETIME NOT NULL,
+    deleted_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    KEY {CUTOFFS_TABLE}_deleted_at_id (deleted_at, id)
+)
+"""
+
+INSERT_SQL = f"INSERT INTO {TOMBSTONES_TABLE} (asset_id, identifier, ip, port) VALUES (%s, %s, %s, %s)"
+
+def _has_table(conn, table: str) -> bool:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+def has_tombstones_table(conn) -> bool:
+    return _has_table(conn, TOMBSTONES_TABLE)
+
+def has_cutoffs_table(conn) -> bool:
+    return _has_table(conn, CUTOFFS_TABLE)
+
+def record(cursor, rows: List[Dict[str, Any]]):
+    """为被删除的行写入墓碑，由调用方在删除所在的事务内提交"""
+    if rows:
+        cursor.executemany(INSERT_SQL, [(row['id'], row['identifier'], row['ip'], row['port']) for row in rows])
+
+def record_partitions(conn, partitions: List[Tuple[str, date]]):
+    """已删除的分区 [(分区名, 上界)] 各记一条范围墓碑，不读取分区中的行；在 DROP PARTITION 成功之后调用"""
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            f"INSERT INTO {CUTOFFS_TABLE} (partition_name, lastupdatetime_before) VALUES (%s, %s)",
+            [(name, f"{bound.isoformat()} 00:00:00") for name, bound in partitions]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
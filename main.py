@@ -1,12 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.v1.router import api_router
+from config.settings import settings
+from services.ingest_queue import ingest_queue
+from services.delete_jobs import delete_jobs
+from services.retention import partition_maintainer
+from services.change_feed import change_feed
+from database.connection import close_db
 import logging
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Assets API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WRITE_BEHIND_ENABLED:
+        await ingest_queue.start()
+    await partition_maintainer.start()
+    yield
+    # 关闭前把写后队列中的记录全部落库
+    await ingest_queue.stop()
+    change_feed.close_all()
+    await delete_jobs.stop()
+    await partition_maintainer.stop()
+    await close_db()
+
+app = FastAPI(title="Assets API", lifespan=lifespan)
 
 # 注册路由
 app.include_router(api_router, prefix="/api/v1")
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from services.times import normalize_time
 
 class AssetsCreate(BaseModel):
     identifier: str
@@ -23,6 +24,18 @@ class AssetsCreate(BaseModel):
     lastupdatetime: Optional[str] = None
     icp: Optional[str] = None
 
+    @field_validator('timestamp', 'lastupdatetime', mode='before')
+    @classmethod
+    def _normalize_time(cls, value):
+        """时间列为 DATETIME（迁移 0002），写入前统一为 YYYY-MM-DD HH:MM:SS，无法解析的值返回 422"""
+        return normalize_time(value)
+
+# assets 表可写入的列（不含自增 id）
+ASSET_COLUMNS = tuple(AssetsCreate.model_fields)
+# 服务层由接口字段派生、随记录一起写入的内部列，不在接口中返回
+DERIVED_COLUMNS = ('domain_rev',)
+STORED_COLUMNS = ASSET_COLUMNS + DERIVED_COLUMNS
+
 class AssetsResponse(AssetsCreate):
     id: int
 
@@ -32,8 +45,10 @@ class AssetsResponse(AssetsCreate):
 class AssetsFilter(BaseModel):
     id: Optional[str] = Field(None, alias='identifier')
     ip: Optional[str] = None
+    cidr: Optional[str] = None  # 网段，如 203.0.113.0/22，支持 IPv6
     port: Optional[int] = None
     domain: Optional[str] = None
+    domain_suffix: Optional[str] = None  # 域名及其全部子域名，如 example.com
     title: Optional[str] = None
     product: Optional[str] = None
     country: Optional[str] = None
@@ -42,7 +57,31 @@ class AssetsFilter(BaseModel):
     org: Optional[str] = None
     before: Optional[str] = None
     after: Optional[str] = None
+    q: Optional[str] = None  # 全文检索 title/product/domain，空格分隔的多个词需同时匹配
 
     class Config:
         populate_by_name = True
-        allow_population_by_field_name = True  # 添加这个配置
\ No newline at end of file
+        allow_population_by_field_name = True  # 添加这个配置
+
+class AssetsBulkError(BaseModel):
+    index: int
+    error: str
+
+class AssetsBulkResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[AssetsBulkError] = []
+
+
+class AssetsIngestError(BaseModel):
+    line: int
+    error: str
+
+class AssetsIngestResult(BaseModel):
+    lines: int = 0
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[AssetsIngestError] = []
+    errors_truncated: bool = False
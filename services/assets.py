@@ -1,183 +1,357 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 from database.connection import get_db
+from database.repositories import reads_from_primary
 from schemas.assets import AssetsCreate, AssetsFilter
-from datetime import datetime
+from config.settings import settings
+from services.query_builder import compile_filters, parse_datetime, CompiledFilter, SELECTABLE_COLUMNS, TIME_FORMAT
+from services.network import reverse_domain
+from services.facets import DEFAULT_FACET_LIMIT
+from services.cache import ResultCache, MISSING
+from services.singleflight import SingleFlight
+from services.change_feed import change_feed
+from services.delta import (
+    EPOCH, Watermark, WatermarkExpired, encode_watermark, decode_watermark, format_time, is_expired,
+    cutoffs_in_range
+)
+from collections import Counter
+from pydantic import ValidationError
 import logging
-from cachetools import TTLCache
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 class AssetsService:
-    _cache = TTLCache(maxsize=10000, ttl=300)  # 5分钟过期
-
-    @staticmethod
-    def _parse_datetime(date_str: str) -> datetime:
-        """解析时间字符串，支持多种格式"""
-        formats = [
-            "%Y%m%d",
-            "%Y-%m-%d",
-            "%Y-%m-%d %H:%M",
-            "%Y%m%d%H%M",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y%m%d%H%M%S"
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        raise ValueError(f"无法解析时间格式: {date_str}，支持的格式有：YYYYMMDD, YYYY-MM-DD, YYYY-MM-DD HH:MM, YYYYMMDDHHMM")
+    _cache = ResultCache(
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        ttl=settings.RESULT_CACHE_TTL
+    )
+    _singleflight = SingleFlight()
+    _generation = 0  # 写入代数，每次写入/删除后递增，使旧的缓存失效
+
+    @staticmethod
+    def _bump_generation():
+        """数据发生变更，使依赖写入代数的缓存失效"""
+        AssetsService._generation += 1
+
+    @staticmethod
+    async def _cached(key, loader):
+        """查询结果缓存：命中直接返回，否则合并并发的相同查询，执行一次 loader 并写入缓存"""
+        # 在查询前取代数，查询期间发生写入时结果会以旧代数入库并在下次读取时失效；
+        # 代数也是合并键的一部分，写入之后发起的读不会复用写入之前开始的查询
+        generation = AssetsService._generation
+        # 读己之写：缓存中可能是落后副本的结果，跳过缓存直接读主库，也不与读副本的查询合并
+        primary = reads_from_primary()
+        if settings.RESULT_CACHE_ENABLED and not primary:
+            value = AssetsService._cache.get(key, generation)
+            if value is not MISSING:
+                return value
+
+        async def load():
+            value = await loader()
+            if settings.RESULT_CACHE_ENABLED:
+                AssetsService._cache.set(key, value, generation)
+            return value
+
+        return await AssetsService._singleflight.do((generation, primary, key), load)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """结果缓存命中/未命中/淘汰统计及合并查询统计"""
+        return {
+            "enabled": settings.RESULT_CACHE_ENABLED,
+            "generation": AssetsService._generation,
+            **AssetsService._cache.stats(),
+            "singleflight": AssetsService._singleflight.stats()
+        }
+
+    @staticmethod
+    def to_row(asset: AssetsCreate) -> Dict[str, Any]:
+        """写入数据库的一行：接口字段加上派生列（DERIVED_COLUMNS），所有写入路径都经过这里"""
+        row = asset.model_dump()
+        row['domain_rev'] = reverse_domain(row['domain'])
+        return row
 
     @staticmethod
     async def create_asset(asset: AssetsCreate) -> Dict[str, Any]:
         """创建资产记录"""
-        db = get_db()
-        conn = db.get_connection()
+        repository = get_db().repository
         
         try:
-            if hasattr(conn, 'table'):  # Supabase
-                result = conn.table('assets').insert(asset.model_dump()).execute()
-                return result.data[0] if result.data else None
-            else:  # MySQL
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute(
-                    """
-                    INSERT INTO assets (
-                        identifier, url, timestamp, search_engine, query_statements,
-                        protocol, ip, port, domain, title, product, product_category,
-                        country, country_name, region, city, os, as_organization,
-                        lastupdatetime, icp
-                    ) VALUES (
-                        %(identifier)s, %(url)s, %(timestamp)s, %(search_engine)s,
-                        %(query_statements)s, %(protocol)s, %(ip)s, %(port)s,
-                        %(domain)s, %(title)s, %(product)s, %(product_category)s,
-                        %(country)s, %(country_name)s, %(region)s, %(city)s,
-                        %(os)s, %(as_organization)s, %(lastupdatetime)s, %(icp)s
-                    )
-                    """,
-                    asset.model_dump()
-                )
-                conn.commit()
-                return {**asset.model_dump(), "id": cursor.lastrowid}
+            created = await repository.insert(AssetsService.to_row(asset))
+            created.pop('domain_rev', None)
+            AssetsService._bump_generation()
+            change_feed.publish("created", [created])
+            return created
         except Exception as e:
             logger.error(f"创建资产失败: {str(e)}")
             raise
 
+    @staticmethod
+    async def _stored_rows(repository, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """读回刚 upsert 的行（带 id 和 updated_at），推送的内容与查询接口返回的记录一致"""
+        counts = Counter((row['ip'], row['port']) for row in rows)
+        try:
+            stored = await repository.get_by_keys(list(counts))
+        except Exception as e:
+            logger.error(f"读取已写入的资产失败，跳过变更推送: {str(e)}")
+            return []
+        matched: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in sorted(stored, key=lambda row: row['id'], reverse=True):
+            matched.setdefault((row['ip'], row['port']), []).append(row)
+        result = []
+        for key, candidates in matched.items():
+            # port 为空的行不参与唯一约束、总是插入，取最新插入的与本批同样多的行
+            result += candidates[:counts[key]] if key[1] is None else candidates[:1]
+        return sorted(result, key=lambda row: row['id'])
+
+    @staticmethod
+    async def bulk_upsert_assets(
+        assets: List[AssetsCreate],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """批量写入资产，按 (ip, port) 去重更新，每个批次提交一次"""
+        repository = get_db().repository
+        batch_size = batch_size or settings.BULK_BATCH_SIZE
+        result = {"inserted": 0, "updated": 0, "rejected": 0, "errors": []}
+
+        for start in range(0, len(assets), batch_size):
+            rows = [AssetsService.to_row(asset) for asset in assets[start:start + batch_size]]
+            try:
+                updated = await repository.upsert_batch(rows)
+                AssetsService._bump_generation()
+                if change_feed.active:
+                    # 批量写入不区分新增与更新的行，统一作为 upserted 推送
+                    change_feed.publish("upserted", await AssetsService._stored_rows(repository, rows))
+                result["updated"] += updated
+                result["inserted"] += len(rows) - updated
+            except Exception as e:
+                logger.error(f"批量写入资产失败 (第 {start} 条起 {len(rows)} 条): {str(e)}")
+                result["rejected"] += len(rows)
+                result["errors"].append({"index": start, "error": f"批次写入失败 ({len(rows)} 条): {str(e)}"})
+
+        return result
+
+    @staticmethod
+    async def ingest_ndjson(
+        chunks: AsyncIterator[bytes],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """流式导入 NDJSON：逐行校验，攒满一批即写入，内存占用与上传大小无关"""
+        batch_size = batch_size or settings.BULK_BATCH_SIZE
+        result = {
+            "lines": 0, "inserted": 0, "updated": 0, "rejected": 0,
+            "errors": [], "errors_truncated": False
+        }
+        batch: List[AssetsCreate] = []
+        batch_lines: List[int] = []
+
+        def add_error(line_no: int, error: str):
+            result["rejected"] += 1
+            if len(result["errors"]) < settings.NDJSON_MAX_ERRORS:
+                result["errors"].append({"line": line_no, "error": error})
+            else:
+                result["errors_truncated"] = True
+
+        async def flush():
+            written = await AssetsService.bulk_upsert_assets(batch, batch_size=len(batch))
+            result["inserted"] += written["inserted"]
+            result["updated"] += written["updated"]
+            for error in written["errors"]:
+                # 批次失败时整批记为拒绝，错误挂在批次第一行上
+                add_error(batch_lines[error["index"]], error["error"])
+                result["rejected"] += len(batch) - error["index"] - 1
+            batch.clear()
+            batch_lines.clear()
+
+        def handle_line(line_no: int, line: bytes):
+            if not line.strip():
+                return
+            try:
+                batch.append(AssetsCreate.model_validate_json(line))
+                batch_lines.append(line_no)
+            except ValidationError as e:
+                add_error(line_no, str(e))
+
+        buffer = b""
+        skipping = False  # 当前行超长，丢弃到下一个换行符
+        line_no = 0
+        async for chunk in chunks:
+            buffer += chunk
+            if b"\n" in chunk:
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    line_no += 1
+                    if skipping or len(line) > settings.NDJSON_MAX_LINE_BYTES:
+                        # 超长行可能跨多个块（已丢弃），也可能完整地落在同一个块中
+                        skipping = False
+                        add_error(line_no, f"单行超过 {settings.NDJSON_MAX_LINE_BYTES} 字节")
+                    else:
+                        handle_line(line_no, line)
+                    if len(batch) >= batch_size:
+                        await flush()
+            if len(buffer) > settings.NDJSON_MAX_LINE_BYTES:
+                skipping = True
+                buffer = b""
+
+        if skipping or buffer:
+            line_no += 1
+            if skipping:
+                add_error(line_no, f"单行超过 {settings.NDJSON_MAX_LINE_BYTES} 字节")
+            else:
+                handle_line(line_no, buffer)
+        if batch:
+            await flush()
+
+        result["lines"] = line_no
+        return result
+
     @staticmethod
     async def get_assets(
         skip: int = 0,
         limit: int = 10,
-        filters: Optional[AssetsFilter] = None
+        filters: Optional[AssetsFilter] = None,
+        after_id: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> List[Dict[str, Any]]:
+        """获取资产列表；传入 after_id 时按 id 游标翻页（忽略 skip），columns 为返回的列（默认全部）"""
+        compiled = compile_filters(filters)
+        return await AssetsService._cached(
+            ("list", compiled.key, skip, limit, after_id, columns),
+            lambda: AssetsService._query_assets(compiled, skip, limit, after_id, columns)
+        )
+
+    @staticmethod
+    async def _query_assets(
+        compiled: CompiledFilter,
+        skip: int,
+        limit: int,
+        after_id: Optional[int],
+        columns: Optional[Tuple[str, ...]] = None
     ) -> List[Dict[str, Any]]:
-        """获取资产列表"""
-        db = get_db()
-        conn = db.get_connection()
-        
         try:
-            logger.info(f"当前使用的数据库连接类型: {'Supabase' if hasattr(conn, 'table') else 'MySQL'}")
-            if hasattr(conn, 'table'):  # Supabase
-                query = conn.table('assets').select('*')
-                
-                # 添加过滤条件
-                if filters:
-                    if filters.id:
-                        query = query.eq('identifier', filters.id)
-                    if filters.ip:
-                        query = query.eq('ip', filters.ip)
-                    # ... 其他过滤条件 ...
-                
-                result = query.range(skip, skip + limit - 1).execute()
-                return result.data
-            else:  # MySQL
-                cursor = conn.cursor(dictionary=True)
-                where_conditions = []
-                params = {}
-                
-                if filters:
-                    if filters.id:
-                        where_conditions.append("identifier = %(identifier)s")
-                        params['identifier'] = filters.id
-                    # ... 其他过滤条件 ...
-                
-                where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-                
-                query = f"""
-                    SELECT * FROM assets 
-                    WHERE {where_clause}
-                    LIMIT %(limit)s OFFSET %(offset)s
-                """
-                params.update({'limit': limit, 'offset': skip})
-                
-                cursor.execute(query, params)
-                return cursor.fetchall()
+            return await get_db().repository.select(compiled, skip, limit, after_id, columns)
         except Exception as e:
             logger.error(f"获取资产列表失败: {str(e)}")
             raise
 
+    @staticmethod
+    async def iter_assets(
+        filters: Optional[AssetsFilter] = None,
+        chunk_size: Optional[int] = None,
+        columns: Optional[Tuple[str, ...]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """分块遍历全部符合条件的资产，每块 chunk_size 条"""
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        compiled = compile_filters(filters)
+        async for rows in get_db().repository.iter_chunks(compiled, chunk_size, columns):
+            yield rows
+
     @staticmethod
     async def get_asset_by_identifier(identifier: str) -> Optional[Dict[str, Any]]:
         """根据标识符获取资产"""
-        db = get_db()
-        conn = db.get_connection()
-        
+        return await AssetsService._cached(
+            ("lookup", identifier),
+            lambda: AssetsService._query_asset_by_identifier(identifier)
+        )
+
+    @staticmethod
+    async def _query_asset_by_identifier(identifier: str) -> Optional[Dict[str, Any]]:
         try:
-            if hasattr(conn, 'table'):  # Supabase
-                result = conn.table('assets').select('*').eq('identifier', identifier).execute()
-                return result.data[0] if result.data else None
-            else:  # MySQL
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute(
-                    "SELECT * FROM assets WHERE identifier = %s",
-                    (identifier,)
-                )
-                return cursor.fetchone()
+            return await get_db().repository.get_by_identifier(identifier)
         except Exception as e:
             logger.error(f"获取资产失败: {str(e)}")
             raise
 
     @staticmethod
-    async def delete_assets(
-        title: Optional[str] = None,
-        search_engine: Optional[str] = None,
-        before: Optional[str] = None,
-        date_limit: Optional[datetime] = None,
-        country_name: Optional[str] = None,
-        region: Optional[str] = None
-    ) -> int:
-        query = Assets.delete()
-        conditions = []
-
-        if title:
-            conditions.append(Assets.title.contains(title))
-        if search_engine:
-            conditions.append(Assets.search_engine == search_engine)
-        if before:
-            before_date = AssetsService._parse_datetime(before)
-            conditions.append(Assets.lastupdatetime < before_date)
-        if date_limit:
-            # 删除超过 date_limit 天的数据
-            conditions.append(Assets.lastupdatetime < date_limit)
-        if country_name:
-            conditions.append(Assets.country_name.contains(country_name))
-        if region:
-            conditions.append(Assets.region.contains(region))
-
-        for condition in conditions:
-            query = query.where(condition)
-
-        deleted_count = query.execute()
-        return deleted_count
-
-    @staticmethod
-    async def get_assets_with_cache(skip: int, limit: int, filters_hash: str):
-        """带缓存的资产获取"""
-        cache_key = f"{skip}:{limit}:{filters_hash}"
-        if cache_key not in AssetsService._cache:
-            AssetsService._cache[cache_key] = await AssetsService.get_assets(skip, limit, filters)
-        return AssetsService._cache[cache_key]
+    async def delete_assets_batch(
+        compiled: CompiledFilter,
+        after_id: int,
+        batch_size: int
+    ) -> Tuple[int, Optional[int]]:
+        """按主键顺序删除一批符合条件的资产，返回 (删除条数, 本批最后一个 id)"""
+        repository = get_db().repository
+        try:
+            if after_id == 0:
+                # 每次删除开始时顺带清理过期墓碑
+                pruned = await repository.prune_tombstones(settings.DELTA_TOMBSTONE_RETENTION_DAYS)
+                if pruned:
+                    logger.info(f"清理过期墓碑 {pruned} 条")
+            # 有变更推送订阅者时取回被删除行的全部字段，供订阅者按自己的条件匹配
+            columns = SELECTABLE_COLUMNS if change_feed.active else ('id',)
+            deleted, last_id = await repository.delete_batch(compiled, after_id, batch_size, columns)
+            if deleted:
+                AssetsService._bump_generation()
+                change_feed.publish("deleted", deleted)
+            return len(deleted), last_id
+        except Exception as e:
+            logger.error(f"分批删除资产失败: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_delta(
+        filters: AssetsFilter,
+        watermark: Optional[str] = None,
+        updated_since: Optional[str] = None,
+        limit: int = 1000
+    ) -> Dict[str, Any]:
+        """增量同步：返回水位之后新增/更新的符合条件的资产和被删除的资产，以及新的水位。
+        没有水位时从 updated_since（默认从头）开始读；删除记录不按条件过滤"""
+        compiled = compile_filters(filters)
+        if watermark:
+            position = decode_watermark(watermark)
+            updated_after, deleted_after = position.updated, position.deleted
+        elif updated_since:
+            start = (parse_datetime(updated_since).strftime(TIME_FORMAT), 0)
+            updated_after, deleted_after = start, start
+        else:
+            # 从头同步：同步开始前删除的行已不在 assets 中，从本次的 until 开始读墓碑即可
+            updated_after, deleted_after = (EPOCH, 0), None
+
+        result = await get_db().repository.delta(
+            compiled, updated_after, deleted_after, limit, settings.DELTA_SETTLE_SECONDS
+        )
+        until = result["until"]
+        if deleted_after is not None and is_expired(
+            deleted_after[0], until, settings.DELTA_TOMBSTONE_RETENTION_DAYS
+        ):
+            raise WatermarkExpired(
+                f"水位早于墓碑保留期 ({settings.DELTA_TOMBSTONE_RETENTION_DAYS} 天)，请全量重新同步"
+            )
+
+        items, tombstones = result["items"], result["deleted"]
+        # 读满 limit 时从最后一条之后继续，否则下次从 until 开始（until 本身不在本次范围内）
+        if len(items) == limit:
+            updated_after = (format_time(items[-1]["updated_at"]), items[-1]["id"])
+        else:
+            updated_after = (until, 0)
+        if deleted_after is not None and len(tombstones) == limit:
+            next_deleted = (format_time(tombstones[-1]["deleted_at"]), tombstones[-1]["id"])
+        else:
+            next_deleted = (until, 0)
+        # 范围墓碑与逐行墓碑共用删除水位，只返回落在本次删除读取范围内的
+        cutoffs = cutoffs_in_range(result.get("cutoffs", []), deleted_after, next_deleted) if deleted_after is not None else []
+        deleted_after = next_deleted
+        return {
+            "items": items,
+            "deleted": [
+                {
+                    "id": row["asset_id"],
+                    "identifier": row["identifier"],
+                    "ip": row["ip"],
+                    "port": row["port"],
+                    "deleted_at": format_time(row["deleted_at"]),
+                }
+                for row in tombstones
+            ],
+            # 过期分区整体删除：lastupdatetime 早于 before 的资产均已删除，客户端应按此删除本地副本
+            "cutoffs": [
+                {"before": row["lastupdatetime_before"], "deleted_at": row["deleted_at"]}
+                for row in cutoffs
+            ],
+            "watermark": encode_watermark(Watermark(updated_after, deleted_after)),
+            "has_more": len(items) == limit or len(tombstones) == limit,
+        }
 
     @staticmethod
     async def get_large_dataset(skip: int, limit: int, filters: AssetsFilter):
@@ -195,41 +369,65 @@ class AssetsService:
         return [item for chunk in results for item in chunk]
 
     @staticmethod
-    async def get_assets_count(filters: Optional[AssetsFilter] = None) -> int:
-        """获取资产总数"""
-        db = get_db()
-        conn = db.get_connection()
-        
+    async def get_assets_count(
+        filters: Optional[AssetsFilter] = None,
+        mode: str = "exact"
+    ) -> int:
+        """获取资产总数；mode=estimate 时缓存未命中则使用查询计划的估算行数"""
+        compiled = compile_filters(filters)
+        key = ("count", compiled.key)
+        if mode == "estimate":
+            cached = MISSING if reads_from_primary() else AssetsService._cache.get(key, AssetsService._generation)
+            if cached is not MISSING:
+                return cached
+            return await AssetsService._estimate_count(compiled)
+        return await AssetsService._cached(key, lambda: AssetsService._query_count(compiled))
+
+    @staticmethod
+    async def _query_count(compiled: CompiledFilter) -> int:
         try:
-            if hasattr(conn, 'table'):  # Supabase
-                query = conn.table('assets').select('*', count='exact')
-                
-                # 添加过滤条件
-                if filters:
-                    if filters.id:
-                        query = query.eq('identifier', filters.id)
-                    if filters.ip:
-                        query = query.eq('ip', filters.ip)
-                    # ... 其他过滤条件 ...
-                
-                result = query.execute()
-                return result.count
-            else:  # MySQL
-                cursor = conn.cursor()
-                where_conditions = []
-                params = {}
-                
-                if filters:
-                    if filters.id:
-                        where_conditions.append("identifier = %(identifier)s")
-                        params['identifier'] = filters.id
-                    # ... 其他过滤条件 ...
-                
-                where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-                
-                query = f"SELECT COUNT(*) FROM assets WHERE {where_clause}"
-                cursor.execute(query, params)
-                return cursor.fetchone()[0]
+            return await get_db().repository.count(compiled)
         except Exception as e:
             logger.error(f"获取资产总数失败: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    async def get_stats(
+        group_by: Tuple[str, ...],
+        filters: Optional[AssetsFilter] = None,
+        limit: int = DEFAULT_FACET_LIMIT
+    ) -> Dict[str, Any]:
+        """按维度分组计数；过滤条件只涉及维度列时读取由写入路径增量维护的汇总表"""
+        compiled = compile_filters(filters)
+        return await AssetsService._cached(
+            ("stats", compiled.key, group_by, limit),
+            lambda: AssetsService._query_stats(compiled, group_by, limit)
+        )
+
+    @staticmethod
+    async def _query_stats(compiled: CompiledFilter, group_by: Tuple[str, ...], limit: int) -> Dict[str, Any]:
+        try:
+            return await get_db().repository.facets(compiled, group_by, limit)
+        except Exception as e:
+            logger.error(f"获取资产统计失败: {str(e)}")
+            raise
+
+    @staticmethod
+    async def rebuild_stats() -> int:
+        """按 assets 全量重建统计汇总表（如手工修改过数据后），返回维度组合数"""
+        try:
+            groups = await get_db().repository.rebuild_facets()
+        except Exception as e:
+            logger.error(f"重建统计汇总表失败: {str(e)}")
+            raise
+        AssetsService._bump_generation()
+        return groups
+
+    @staticmethod
+    async def _estimate_count(compiled: CompiledFilter) -> int:
+        """使用数据库统计信息/查询计划估算行数，不扫描数据"""
+        try:
+            return await get_db().repository.estimate_count(compiled)
+        except Exception as e:
+            logger.error(f"估算资产总数失败: {str(e)}")
+            raise
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import orjson
+
+# 缓存未命中的标记（None 本身是合法的缓存值，如查询不到的资产）
+MISSING = object()
+
+class ResultCache:
+    """按字节数限制容量的 LRU + TTL 查询结果缓存，以写入代数判断是否失效"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (过期时间, 写入代数, 字节数, 值)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """估算缓存值占用的字节数（按 JSON 序列化长度计）；使用 orjson，
+        不在每次缓存未命中时重新付出标准库 json 的序列化开销"""
+        return len(orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS))
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def get(self, key: Hashable, generation: int) -> Any:
+        """读取缓存，未命中、过期或写入代数不一致时返回 MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISSING
+            expires_at, entry_generation, _, value = entry
+            if entry_generation != generation:
+                self._remove(key)
+                self._stats["invalidations"] += 1
+                self._stats["misses"] += 1
+                return MISSING
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int, ttl: Optional[float] = None):
+        """写入缓存，超出字节上限时按 LRU 淘汰"""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), generation, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
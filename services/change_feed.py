@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from config.settings import settings
+from schemas.assets import AssetsFilter, DERIVED_COLUMNS
+from services.query_builder import compile_filters, matches, CompiledFilter
+
+logger = logging.getLogger(__name__)
+
+class ChangeFeedFull(Exception):
+    """订阅者数量已达上限"""
+
+class FeedSubscription:
+    """一个订阅者：按自己的过滤条件接收事件，缓冲区有界"""
+
+    def __init__(self, compiled: CompiledFilter, maxsize: int):
+        self.compiled = compiled
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+        self.close_reason: Optional[str] = None
+
+    def close(self, reason: str):
+        """结束订阅：丢弃未发送的事件，只留一个 dropped 事件告知客户端需要重新订阅并补齐数据"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait({"type": "dropped", "reason": reason})
+
+    async def events(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """依次产出事件；超过 heartbeat 秒没有事件时产出 None，供调用方发送心跳并检查连接"""
+        while True:
+            if self.closed and self.queue.empty():
+                return
+            try:
+                yield await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+class ChangeFeed:
+    """进程内变更推送：写入路径发布新增/更新/删除的资产，逐个订阅者在内存中匹配过滤条件后放入其缓冲区。
+    发布不等待任何订阅者，缓冲区已满（消费过慢）的订阅者直接断开，不拖慢写入也不无限占用内存"""
+
+    def __init__(self, buffer_size: Optional[int] = None, max_subscribers: Optional[int] = None):
+        self.buffer_size = buffer_size or settings.CHANGE_FEED_BUFFER
+        self.max_subscribers = max_subscribers or settings.CHANGE_FEED_MAX_SUBSCRIBERS
+        self._subscribers: Set[FeedSubscription] = set()
+        self._sequence = 0
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+    @property
+    def active(self) -> bool:
+        """是否有订阅者；没有时写入路径可以跳过为推送准备数据"""
+        return bool(self._subscribers)
+
+    def subscribe(self, filters: Optional[AssetsFilter] = None) -> FeedSubscription:
+        """新增订阅者；过滤条件无效时抛出 ValueError"""
+        if len(self._subscribers) >= self.max_subscribers:
+            raise ChangeFeedFull(f"订阅者数量已达上限 {self.max_subscribers}")
+        subscription = FeedSubscription(compile_filters(filters), self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription):
+        self._subscribers.discard(subscription)
+        if not subscription.closed:
+            subscription.close("unsubscribed")
+
+    def publish(self, event_type: str, rows: List[Dict[str, Any]]):
+        """发布一批变更，每个订阅者收到一个只含其匹配行的事件；在事件循环线程中调用"""
+        if not self._subscribers or not rows:
+            return
+        self._sequence += 1
+        self._stats["published"] += 1
+        assets = [{k: v for k, v in row.items() if k not in DERIVED_COLUMNS} for row in rows]
+        for subscription in list(self._subscribers):
+            matched = [asset for row, asset in zip(rows, assets) if matches(subscription.compiled, row)]
+            if not matched:
+                continue
+            try:
+                subscription.queue.put_nowait({"type": event_type, "seq": self._sequence, "assets": matched})
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                self._subscribers.discard(subscription)
+                subscription.close("slow consumer")
+                self._stats["dropped"] += 1
+                logger.warning(f"变更推送订阅者消费过慢，缓冲区已满 ({self.buffer_size} 个事件)，已断开")
+
+    def close_all(self, reason: str = "server shutdown"):
+        """关闭全部订阅（服务停止时调用），各连接发送完 dropped 事件后结束"""
+        for subscription in list(self._subscribers):
+            subscription.close(reason)
+        self._subscribers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "buffer_size": self.buffer_size,
+            "max_subscribers": self.max_subscribers,
+            **self._stats,
+        }
+
+# 全局变更推送实例
+change_feed = ChangeFeed()
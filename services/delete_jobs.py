@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config.settings import settings
+from services.assets import AssetsService
+from services.query_builder import CompiledFilter
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ('completed', 'cancelled', 'failed')
+
+class DeleteJob:
+    """一个后台删除任务：按主键顺序分批删除符合条件的资产"""
+
+    def __init__(self, compiled: CompiledFilter, conditions: Dict[str, Any], batch_size: int, pause: float):
+        self.id = uuid.uuid4().hex
+        self.compiled = compiled
+        self.conditions = conditions
+        self.batch_size = batch_size
+        self.pause = pause
+        self.status = 'pending'  # pending / running / completed / cancelled / failed
+        self.deleted_count = 0
+        self.batches = 0
+        self.last_id = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = asyncio.Event()
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "conditions": self.conditions,
+            "deleted_count": self.deleted_count,
+            "batches": self.batches,
+            "last_id": self.last_id,
+            "batch_size": self.batch_size,
+            "cancel_requested": self.cancel_requested.is_set(),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": elapsed,
+        }
+
+class DeleteJobManager:
+    """后台删除任务：限制并发，批间暂停让出数据库给写入，可查询进度和取消"""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        history: Optional[int] = None,
+        delete_batch: Optional[Callable[[CompiledFilter, int, int], Awaitable[Tuple[int, Optional[int]]]]] = None
+    ):
+        self.batch_size = batch_size or settings.DELETE_BATCH_SIZE
+        self.pause = settings.DELETE_BATCH_PAUSE if pause is None else pause
+        self.concurrency = concurrency or settings.DELETE_JOB_CONCURRENCY
+        self.history = history or settings.DELETE_JOB_HISTORY
+        self._delete_batch = delete_batch or AssetsService.delete_assets_batch
+        self._jobs: "OrderedDict[str, DeleteJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def submit(self, compiled: CompiledFilter, conditions: Dict[str, Any], batch_size: Optional[int] = None) -> DeleteJob:
+        """创建删除任务并在后台执行"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # 信号量与事件循环绑定
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        job = DeleteJob(compiled, conditions, batch_size or self.batch_size, self.pause)
+        self._jobs[job.id] = job
+        self._trim()
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        logger.info(f"删除任务 {job.id} 已创建: {conditions}")
+        return job
+
+    def _trim(self):
+        """只保留最近 history 个已结束的任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    async def _run(self, job: DeleteJob):
+        async with self._semaphore:
+            if job.cancel_requested.is_set():
+                self._finish(job, 'cancelled')
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+            try:
+                while True:
+                    deleted, last_id = await self._delete_batch(job.compiled, job.last_id, job.batch_size)
+                    if last_id is None:
+                        self._finish(job, 'completed')
+                        return
+                    job.deleted_count += deleted
+                    job.batches += 1
+                    job.last_id = last_id
+                    # 批间暂停；等待期间收到取消立即结束
+                    try:
+                        await asyncio.wait_for(job.cancel_requested.wait(), job.pause or 0)
+                    except asyncio.TimeoutError:
+                        pass
+                    if job.cancel_requested.is_set():
+                        self._finish(job, 'cancelled')
+                        return
+            except asyncio.CancelledError:
+                self._finish(job, 'cancelled')
+                raise
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, 'failed')
+                logger.error(f"删除任务 {job.id} 失败: {str(e)}")
+
+    def _finish(self, job: DeleteJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job.done.set()
+        logger.info(f"删除任务 {job.id} {status}: 删除 {job.deleted_count} 条, {job.batches} 批")
+
+    def get(self, job_id: str) -> Optional[DeleteJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id: str) -> Optional[DeleteJob]:
+        """请求取消；正在执行的批次完成后停止"""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_requested.set()
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[DeleteJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    async def stop(self):
+        """应用关闭时取消所有未结束的任务，等待当前批次完成"""
+        for job in self._jobs.values():
+            if not job.finished:
+                job.cancel_requested.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+# 全局删除任务管理器
+delete_jobs = DeleteJobManager()
@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from services.query_builder import CompiledFilter, SELECTABLE_COLUMNS
+
+# 增量同步：assets.updated_at 由数据库在插入和内容变化时写入（迁移 0008），
+# 删除记录写入墓碑表 asset_tombstones；两者都按 (时间, id) 键集分页，走 (时间, id) 索引
+TOMBSTONES_TABLE = 'asset_tombstones'
+# 墓碑记录的被删除行的列，id 存为 asset_id
+TOMBSTONE_COLUMNS = ('id', 'identifier', 'ip', 'port')
+# 删除过期分区（MySQL）不逐行写墓碑，每个分区记一条范围墓碑：lastupdatetime 早于分区上界的行已全部删除，
+# 增量同步以 cutoffs 返回，与逐行墓碑共用删除水位
+CUTOFFS_TABLE = 'asset_tombstone_ranges'
+DELTA_COLUMNS = SELECTABLE_COLUMNS + ('updated_at',)
+
+DEFAULT_DELTA_LIMIT = 1000
+MAX_DELTA_LIMIT = 10000
+
+EPOCH = '1970-01-01 00:00:00'
+DELTA_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+Position = Tuple[str, int]  # (时间, id)，下一次读取其后的记录
+
+class WatermarkExpired(Exception):
+    """水位早于墓碑保留期，期间的删除可能已被清理，需要全量重新同步"""
+
+class Watermark(NamedTuple):
+    updated: Position
+    deleted: Position
+
+def format_time(value: Any) -> str:
+    """数据库返回的时间统一为字符串，保留微秒，原样用作下一次查询的参数"""
+    if isinstance(value, datetime):
+        return value.strftime(DELTA_TIME_FORMAT)
+    return str(value)
+
+def parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+def is_expired(position_time: str, until: str, retention_days: int) -> bool:
+    """读取位置早于墓碑保留期：期间的墓碑可能已被清理"""
+    position, cutoff = parse_time(position_time), parse_time(until) - timedelta(days=retention_days)
+    if (position.tzinfo is None) != (cutoff.tzinfo is None):
+        # updated_since 是不带时区的时间，按数据库时钟（Supabase 为 UTC）解释
+        position = position.replace(tzinfo=cutoff.tzinfo)
+    return position < cutoff
+
+def encode_watermark(watermark: Watermark) -> str:
+    """把读取位置编码为不透明的水位"""
+    payload = json.dumps({"u": list(watermark.updated), "d": list(watermark.deleted)}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_watermark(token: str) -> Watermark:
+    """解析水位，返回上一次同步的读取位置"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        (u_time, u_id), (d_time, d_id) = payload["u"], payload["d"]
+        parse_time(u_time)
+        parse_time(d_time)
+    except Exception:
+        raise ValueError(f"无效的水位: {token}")
+    if not all(isinstance(v, int) and v >= 0 for v in (u_id, d_id)):
+        raise ValueError(f"无效的水位: {token}")
+    return Watermark((u_time, u_id), (d_time, d_id))
+
+def changes_sql(compiled: CompiledFilter, limit: int) -> str:
+    """(updated_at, id) 在水位之后、早于 until 的符合条件的行（MySQL 风格的命名参数）"""
+    return (
+        f"SELECT {', '.join(DELTA_COLUMNS)} FROM assets WHERE {compiled.where} "
+        f"AND (updated_at > %(w_updated_at)s OR (updated_at = %(w_updated_at)s AND id > %(w_updated_id)s)) "
+        f"AND updated_at < %(w_until)s ORDER BY updated_at, id LIMIT {int(limit)}"
+    )
+
+def tombstones_sql(limit: int) -> str:
+    """(deleted_at, id) 在水位之后、早于 until 的删除记录"""
+    return (
+        f"SELECT id, asset_id, identifier, ip, port, deleted_at FROM {TOMBSTONES_TABLE} "
+        f"WHERE (deleted_at > %(w_deleted_at)s OR (deleted_at = %(w_deleted_at)s AND id > %(w_deleted_id)s)) "
+        f"AND deleted_at < %(w_until)s ORDER BY deleted_at, id LIMIT {int(limit)}"
+    )
+
+def cutoffs_sql() -> str:
+    """删除水位时间之后、早于 until 的范围墓碑，数量为删除的分区数，不分页；由服务层按本次的删除读取范围筛选"""
+    return (
+        f"SELECT id, partition_name, lastupdatetime_before, deleted_at FROM {CUTOFFS_TABLE} "
+        f"WHERE deleted_at >= %(w_deleted_at)s AND deleted_at < %(w_until)s ORDER BY deleted_at, id"
+    )
+
+def cutoffs_in_range(cutoffs: List[Dict[str, Any]], after: Position, upto: Position) -> List[Dict[str, Any]]:
+    """选出落在本次删除读取范围内的范围墓碑：从 after 之后到 upto（新的删除水位）为止。
+    水位 id 为 0 表示上一次读到 until 为止（不含），否则表示读到该时间的某条墓碑（含该时间）"""
+    after_time, upto_time = parse_time(after[0]), parse_time(upto[0])
+    selected = []
+    for cutoff in cutoffs:
+        deleted_at = parse_time(cutoff['deleted_at'])
+        if after[1] and deleted_at <= after_time:
+            continue
+        if deleted_at > upto_time or (not upto[1] and deleted_at == upto_time):
+            continue
+        selected.append(cutoff)
+    return selected
+
+def delta_params(
+    compiled: CompiledFilter,
+    updated_after: Position,
+    deleted_after: Optional[Position],
+    until: str
+) -> Dict[str, Any]:
+    params = {**compiled.params, 'w_updated_at': updated_after[0], 'w_updated_id': updated_after[1], 'w_until': until}
+    if deleted_after is not None:
+        params.update(w_deleted_at=deleted_after[0], w_deleted_id=deleted_after[1])
+    return params
@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional, Tuple
+from services.query_builder import CompiledFilter
+
+# 可统计的维度，也是汇总表 assets_facets 的维度列；空字符串与 NULL 一样计为 NULL
+FACET_COLUMNS = ('country_name', 'product', 'port', 'protocol', 'search_engine')
+FACETS_TABLE = 'assets_facets'
+COUNT_COLUMN = 'asset_count'
+
+DEFAULT_FACET_LIMIT = 20
+MAX_FACET_LIMIT = 1000
+
+def parse_group_by(group_by: Optional[str]) -> Tuple[str, ...]:
+    """解析逗号分隔的统计维度，去重并保持顺序"""
+    columns = tuple(dict.fromkeys(c.strip() for c in (group_by or '').split(',') if c.strip()))
+    if not columns:
+        raise ValueError(f"group_by 不能为空，可选维度: {', '.join(FACET_COLUMNS)}")
+    unknown = [c for c in columns if c not in FACET_COLUMNS]
+    if unknown:
+        raise ValueError(f"不支持的统计维度: {', '.join(unknown)}，可选维度: {', '.join(FACET_COLUMNS)}")
+    return columns
+
+def uses_rollup(compiled: CompiledFilter) -> bool:
+    """过滤条件只涉及维度列时，可以直接在汇总表上按同样的条件求和"""
+    return all(column in FACET_COLUMNS for column, _, _ in compiled.predicates)
+
+def facet_sql(column: str, compiled: CompiledFilter, limit: int, rollup: bool) -> str:
+    """单个维度的分组计数（MySQL 风格的命名参数），按数量降序；rollup 为 False 时扫描 assets"""
+    if rollup:
+        return (
+            f"SELECT {column} AS value, SUM({COUNT_COLUMN}) AS count FROM {FACETS_TABLE} "
+            f"WHERE {compiled.where} GROUP BY {column} HAVING SUM({COUNT_COLUMN}) > 0 "
+            f"ORDER BY count DESC, value LIMIT {int(limit)}"
+        )
+    return (
+        f"SELECT {column} AS value, COUNT(*) AS count FROM assets WHERE {compiled.where} "
+        f"GROUP BY {column} ORDER BY count DESC, value LIMIT {int(limit)}"
+    )
+
+def total_sql(compiled: CompiledFilter, rollup: bool) -> str:
+    """符合条件的总数，汇总表上为计数之和"""
+    if rollup:
+        return f"SELECT COALESCE(SUM({COUNT_COLUMN}), 0) FROM {FACETS_TABLE} WHERE {compiled.where}"
+    return f"SELECT COUNT(*) FROM assets WHERE {compiled.where}"
+
+def normalize_facet(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """汇总表把空字符串存为 NULL，扫描原表时也合并两者，数量转为 int"""
+    merged: Dict[Any, int] = {}
+    for row in rows:
+        value = None if row['value'] == '' else row['value']
+        merged[value] = merged.get(value, 0) + int(row['count'])
+    ordered = sorted(merged.items(), key=lambda item: -item[1])
+    return [{"value": value, "count": count} for value, count in ordered]
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from config.settings import settings
+from schemas.assets import AssetsCreate
+from services.assets import AssetsService
+
+logger = logging.getLogger(__name__)
+
+class IngestQueueFull(Exception):
+    """写后队列已满"""
+
+class IngestQueue:
+    """进程内有界写后队列，后台任务按数量或时间批量落库"""
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        backpressure: Optional[str] = None
+    ):
+        self.maxsize = maxsize or settings.WRITE_BEHIND_QUEUE_SIZE
+        self.batch_size = batch_size or settings.WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WRITE_BEHIND_FLUSH_INTERVAL
+        self.backpressure = backpressure or settings.WRITE_BEHIND_BACKPRESSURE
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._pending_puts: Set[asyncio.Task] = set()  # block 策略下等待队列空位的入队
+        self._stats = {
+            "enqueued": 0,
+            "rejected": 0,
+            "flushes": 0,
+            "flushed_rows": 0,
+            "failed_rows": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "last_flush_rows": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_flush_at": None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """启动后台刷写任务"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"写后队列已启动: 容量 {self.maxsize}, 批大小 {self.batch_size}, "
+            f"刷写间隔 {self.flush_interval}s, 背压策略 {self.backpressure}"
+        )
+
+    async def stop(self, timeout: Optional[float] = None):
+        """停止接收新记录，把队列中剩余的记录全部落库后退出"""
+        if not self.running:
+            return
+        self._closing = True
+        # 仍在等待空位的入队直接拒绝，否则它们可能排在哨兵之后被丢弃，而调用方已经收到 202
+        for put_task in list(self._pending_puts):
+            put_task.cancel()
+        try:
+            # 队列已满且刷写卡住时放入哨兵也会阻塞，一并受排空超时限制
+            await asyncio.wait_for(self._drain(), timeout or settings.WRITE_BEHIND_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)  # 被取消的批次由 _flush 写入死信
+            remaining = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    remaining.append(item)
+            logger.error(f"写后队列排空超时，{len(remaining)} 条未落库的记录写入死信")
+            self._dead_letter(remaining)
+        logger.info("写后队列已停止")
+
+    async def _drain(self):
+        await self._queue.put(None)  # 哨兵，刷写任务读到后完成收尾
+        await self._task
+
+    async def put(self, asset: AssetsCreate):
+        """入队；队列满时按背压策略阻塞等待或抛出 IngestQueueFull"""
+        if not self.running or self._closing:
+            raise IngestQueueFull("写后队列未运行")
+        if self.backpressure == 'block':
+            await self._put_blocking(asset)
+        else:
+            try:
+                self._queue.put_nowait(asset)
+            except asyncio.QueueFull:
+                self._stats["rejected"] += 1
+                raise IngestQueueFull(f"写后队列已满 ({self.maxsize})")
+        self._stats["enqueued"] += 1
+
+    async def _put_blocking(self, asset: AssetsCreate):
+        """等待空位入队；超时或队列开始停止时抛出 IngestQueueFull，被取消的入队不会写入队列"""
+        put_task = asyncio.ensure_future(self._queue.put(asset))
+        self._pending_puts.add(put_task)
+        try:
+            done, _ = await asyncio.wait({put_task}, timeout=settings.WRITE_BEHIND_BLOCK_TIMEOUT)
+        finally:
+            self._pending_puts.discard(put_task)
+            if not put_task.done():
+                put_task.cancel()
+        if not done:
+            self._stats["rejected"] += 1
+            raise IngestQueueFull(f"写后队列已满 ({self.maxsize})")
+        if put_task.cancelled():
+            self._stats["rejected"] += 1
+            raise IngestQueueFull("写后队列正在停止")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch: List[AssetsCreate] = []
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch.append(first)
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[AssetsCreate]):
+        started = time.perf_counter()
+        try:
+            await self._write(batch)
+        except asyncio.CancelledError:
+            # 排空超时被取消：调用方已经收到 202，未确认落库的整批写入死信
+            self._dead_letter(batch)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["flushes"] += 1
+        self._stats["last_flush_rows"] = len(batch)
+        self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+        self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 3)
+        self._stats["total_flush_ms"] += elapsed_ms
+        self._stats["last_flush_at"] = time.time()
+
+    async def _write(self, batch: List[AssetsCreate]):
+        """整批一个事务落库，失败时按退避时间重试；重试耗尽后写入死信"""
+        attempts = max(settings.WRITE_BEHIND_RETRY_ATTEMPTS, 0) + 1
+        for attempt in range(attempts):
+            try:
+                result = await AssetsService.bulk_upsert_assets(batch, batch_size=len(batch))
+                error = result["errors"][0]["error"] if result["rejected"] else None
+            except Exception as e:
+                error = str(e)
+            if error is None:
+                self._stats["flushed_rows"] += result["inserted"] + result["updated"]
+                return
+            if attempt + 1 < attempts:
+                delay = settings.WRITE_BEHIND_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"写后队列刷写失败 ({len(batch)} 条)，{delay:.1f}s 后第 {attempt + 1} 次重试: {error}")
+                self._stats["retries"] += 1
+                await asyncio.sleep(delay)
+        logger.error(f"写后队列刷写失败 ({len(batch)} 条)，已重试 {attempts - 1} 次: {error}")
+        self._stats["failed_rows"] += len(batch)
+        self._dead_letter(batch)
+
+    def _dead_letter(self, batch: List[AssetsCreate]):
+        """把未能落库的记录逐行追加到死信文件；未配置路径或写入失败时逐条记录到错误日志"""
+        if not batch:
+            return
+        lines = [asset.model_dump_json() for asset in batch]
+        self._stats["dead_lettered"] += len(lines)
+        path = settings.WRITE_BEHIND_DEAD_LETTER_PATH
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(line + '\n' for line in lines))
+                logger.error(f"{len(lines)} 条记录已写入死信文件 {path}")
+                return
+            except OSError as e:
+                logger.error(f"写入死信文件 {path} 失败: {str(e)}")
+        for line in lines:
+            logger.error(f"写后队列死信: {line}")
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度与刷写耗时统计"""
+        flushes = self._stats["flushes"]
+        return {
+            "enabled": settings.WRITE_BEHIND_ENABLED,
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "maxsize": self.maxsize,
+            "backpressure": self.backpressure,
+            **{k: v for k, v in self._stats.items() if k != "total_flush_ms"},
+            "avg_flush_ms": round(self._stats["total_flush_ms"] / flushes, 3) if flushes else 0.0,
+        }
+
+# 全局写后队列实例
+ingest_queue = IngestQueue()
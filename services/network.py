@@ -0,0 +1,54 @@
+import ipaddress
+from typing import List, Optional, Tuple
+
+# IP 的二进制形式：统一为 16 字节，IPv4 按 IPv4 映射的 IPv6 地址（::ffff:a.b.c.d）存储，
+# 两个地址族落在不重叠的区间内，CIDR 过滤只需一次按字节比较的范围扫描
+_V4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+def ip_to_bytes(ip: Optional[str]) -> Optional[bytes]:
+    """把 IP 字符串转为 16 字节；不是合法 IP（如域名）时返回 None"""
+    try:
+        address = ipaddress.ip_address((ip or '').strip())
+    except ValueError:
+        return None
+    if address.version == 4:
+        return _V4_MAPPED_PREFIX + address.packed
+    return address.packed
+
+def cidr_bounds(cidr: str) -> Tuple[str, bytes, bytes]:
+    """解析 CIDR（主机位可以不为 0），返回 (规范化的网段, 起始地址, 结束地址) 的二进制形式"""
+    try:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"无效的 CIDR: {cidr}，示例: 203.0.113.0/22 或 2001:db8::/32")
+    return (
+        str(network),
+        ip_to_bytes(str(network.network_address)),
+        ip_to_bytes(str(network.broadcast_address))
+    )
+
+def cidr_addresses(cidr: str) -> Tuple[str, str]:
+    """网段的起止地址字符串，供 PostgREST 对 inet 列做范围过滤"""
+    network = ipaddress.ip_network(cidr, strict=False)
+    return str(network.network_address), str(network.broadcast_address)
+
+def _domain_labels(domain: Optional[str]) -> List[str]:
+    """域名的各级标签（小写，去掉开头的 *. 通配和末尾的根点）；为空或是 IP 时返回空列表"""
+    value = (domain or '').strip().lower().strip('.')
+    if not value or ip_to_bytes(value) is not None:
+        return []
+    labels = [label for label in value.split('.') if label]
+    return labels[1:] if labels[0] == '*' else labels
+
+def reverse_domain(domain: Optional[str]) -> Optional[str]:
+    """域名按标签倒序并以 '.' 结尾（www.example.com -> com.example.www.），
+    某个域名及其全部子域名共享同一前缀，后缀查询变为索引上的前缀范围扫描"""
+    labels = _domain_labels(domain)
+    return ".".join(reversed(labels)) + "." if labels else None
+
+def domain_suffix_prefix(suffix: str) -> str:
+    """domain_suffix 过滤对应的 domain_rev 前缀，匹配该域名本身及其全部子域名"""
+    prefix = reverse_domain(suffix)
+    if prefix is None:
+        raise ValueError(f"无效的域名后缀: {suffix}，示例: example.com")
+    return prefix
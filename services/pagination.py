@@ -0,0 +1,18 @@
+import base64
+import json
+
+def encode_cursor(last_id: int) -> str:
+    """把最后一条记录的 id 编码为不透明游标"""
+    payload = json.dumps({"id": last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> int:
+    """解析游标，返回上一页最后一条记录的 id"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except Exception:
+        raise ValueError(f"无效的游标: {cursor}")
+    if not isinstance(last_id, int) or last_id < 0:
+        raise ValueError(f"无效的游标: {cursor}")
+    return last_id
@@ -0,0 +1,245 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+from schemas.assets import AssetsFilter, ASSET_COLUMNS
+from services.search import parse_query, mysql_boolean_query, tsquery, tokens, search_text, SEARCH_COLUMNS
+from services.network import cidr_bounds, cidr_addresses, domain_suffix_prefix, ip_to_bytes, reverse_domain
+from services.times import TIME_FORMAT, parse_datetime
+
+# 过滤字段 -> (列名, 运算)
+# 能用等值/范围/前缀匹配的字段都不用 '%x%'，保证条件可以走索引
+FILTER_RULES: Dict[str, Tuple[str, str]] = {
+    'id': ('identifier', 'eq'),
+    'ip': ('ip', 'eq'),
+    # 网段过滤：ip_bin 为 ip 的 16 字节二进制形式（迁移 0005），按 (ip_bin, port) 索引范围扫描
+    'cidr': ('ip_bin', 'cidr'),
+    'port': ('port', 'eq'),
+    'domain': ('domain', 'eq'),
+    # 子域名查询：domain_rev 为倒序域名（com.example.www.），后缀匹配转为前缀范围扫描
+    'domain_suffix': ('domain_rev', 'suffix'),
+    'title': ('title', 'contains'),
+    'product': ('product', 'contains'),
+    'country': ('country', 'eq'),
+    's': ('search_engine', 'eq'),
+    'search_engine': ('search_engine', 'eq'),
+    'protocol': ('protocol', 'eq'),
+    'org': ('as_organization', 'prefix'),
+    'before': ('lastupdatetime', 'lt'),
+    'after': ('lastupdatetime', 'gte'),
+    # 全文检索 title/product/domain，列名为 Postgres 的 tsvector 生成列
+    'q': ('search_vector', 'search'),
+    # 删除接口使用的条件
+    'country_name': ('country_name', 'contains'),
+    'region': ('region', 'contains'),
+    'date_limit': ('lastupdatetime', 'lt'),
+}
+
+SEARCH_PARAM = 'f_q'
+# MySQL ngram 全文索引（迁移 0004）的匹配表达式，同时用作相关度排序
+SEARCH_MATCH_SQL = f"MATCH (title, product, domain) AGAINST (%({SEARCH_PARAM})s IN BOOLEAN MODE)"
+
+# 可通过 fields= 选择返回的列
+SELECTABLE_COLUMNS = ('id',) + ASSET_COLUMNS
+
+_SQL_OPERATORS = {
+    'eq': "{column} = %({param})s",
+    'lt': "{column} < %({param})s",
+    'gte': "{column} >= %({param})s",
+    'contains': "{column} LIKE %({param})s",
+    'prefix': "{column} LIKE %({param})s",
+    'suffix': "{column} LIKE %({param})s",
+    'search': SEARCH_MATCH_SQL,
+    'cidr': "{column} BETWEEN %({param}_lo)s AND %({param}_hi)s",
+}
+
+class CompiledFilter(NamedTuple):
+    where: str                                   # SQL 条件，无过滤时为 "1=1"
+    params: Dict[str, Any]                       # SQL 命名参数
+    predicates: Tuple[Tuple[str, str, Any], ...]  # (列名, 运算, 值)，供 PostgREST 使用
+
+    @property
+    def key(self) -> Tuple:
+        """规范化的过滤条件，可作为缓存键"""
+        return self.predicates
+
+    @property
+    def search(self) -> Optional[Tuple[str, ...]]:
+        """全文检索词（q 参数），没有时为 None"""
+        for _, op, value in self.predicates:
+            if op == 'search':
+                return value
+        return None
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _normalize_value(op: str, value: Any) -> Any:
+    if op in ('lt', 'gte'):
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        if isinstance(value, datetime):
+            return value.strftime(TIME_FORMAT)
+    if op == 'contains':
+        return f"%{_escape_like(str(value))}%"
+    if op == 'prefix':
+        return f"{_escape_like(str(value))}%"
+    if op == 'suffix':
+        return f"{_escape_like(domain_suffix_prefix(str(value)))}%"
+    return value
+
+@lru_cache(maxsize=512)
+def _compile_where(shape: Tuple[Tuple[str, str, str], ...]) -> str:
+    """按查询形状（设置了哪些字段）生成 SQL 条件，结果与参数值无关，可以缓存"""
+    if not shape:
+        return "1=1"
+    return " AND ".join(
+        _SQL_OPERATORS[op].format(column=column, param=param)
+        for param, column, op in shape
+    )
+
+def compile_filters(filters: Optional[AssetsFilter] = None, **conditions: Any) -> CompiledFilter:
+    """把 AssetsFilter 及额外条件（删除接口的 country_name/region/date_limit 等）编译为查询条件"""
+    values: Dict[str, Any] = {}
+    if filters is not None:
+        values.update(filters.model_dump(exclude_none=True))
+    values.update({k: v for k, v in conditions.items() if v is not None})
+
+    shape = []
+    params = {}
+    predicates = []
+    for field, (column, op) in FILTER_RULES.items():
+        value = values.get(field)
+        if value is None or value == '':
+            continue
+        param = f"f_{field}"
+        shape.append((param, column, op))
+        if op == 'search':
+            # SQL 参数是 MySQL 的检索串，谓词中保留检索词，由其他后端转换为各自的语法
+            terms = parse_query(str(value))
+            params[param] = mysql_boolean_query(terms)
+            predicates.append((column, op, terms))
+            continue
+        if op == 'cidr':
+            network, params[f"{param}_lo"], params[f"{param}_hi"] = cidr_bounds(str(value))
+            predicates.append((column, op, network))
+            continue
+        normalized = _normalize_value(op, value)
+        params[param] = normalized
+        predicates.append((column, op, normalized))
+
+    unknown = set(values) - set(FILTER_RULES)
+    if unknown:
+        raise ValueError(f"不支持的过滤条件: {', '.join(sorted(unknown))}")
+
+    return CompiledFilter(_compile_where(tuple(shape)), params, tuple(predicates))
+
+def apply_postgrest(query, compiled: CompiledFilter):
+    """把编译后的条件应用到 PostgREST 查询上"""
+    for column, op, value in compiled.predicates:
+        if op == 'eq':
+            query = query.eq(column, value)
+        elif op == 'lt':
+            query = query.lt(column, value)
+        elif op == 'gte':
+            query = query.gte(column, value)
+        elif op == 'search':
+            query = query.filter(column, 'fts(simple)', tsquery(value))
+        elif op == 'cidr':
+            # Supabase 使用 inet 生成列 ip_inet（database/sql/supabase_ip_range.sql）
+            first, last = cidr_addresses(value)
+            query = query.gte('ip_inet', first).lte('ip_inet', last)
+        elif op == 'suffix':
+            # domain_rev 已规范为小写，区分大小写的 like 可以使用 text_pattern_ops 索引
+            query = query.like(column, value)
+        else:  # contains / prefix
+            query = query.ilike(column, value)
+    return query
+
+@lru_cache(maxsize=512)
+def _like_regex(pattern: str) -> re.Pattern:
+    """LIKE 模式（反斜杠转义）转为正则，与 MySQL 默认排序规则一样不区分大小写"""
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+def _row_time(value: Any) -> Optional[str]:
+    """行中的时间值规范为 TIME_FORMAT 字符串，无法解析时返回 None"""
+    if isinstance(value, datetime):
+        return value.strftime(TIME_FORMAT)
+    if not value:
+        return None
+    try:
+        return parse_datetime(str(value)).strftime(TIME_FORMAT)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(str(value)).strftime(TIME_FORMAT)
+        except ValueError:
+            return None
+
+def _search_matches(terms: Tuple[str, ...], row: Mapping[str, Any]) -> bool:
+    """与 FTS 相同的语义：每个检索词的词元在文本中连续出现，最后一个词元按前缀匹配"""
+    text = search_text(*(row.get(c) for c in SEARCH_COLUMNS)).split()
+    for term in terms:
+        wanted = tokens(term)
+        head, last = wanted[:-1], wanted[-1]
+        if not any(
+            text[i:i + len(head)] == head and text[i + len(head)].startswith(last)
+            for i in range(len(text) - len(head))
+        ):
+            return False
+    return True
+
+def _predicate_matches(column: str, op: str, value: Any, row: Mapping[str, Any]) -> bool:
+    if op == 'search':
+        return _search_matches(value, row)
+    if op == 'cidr':
+        address = ip_to_bytes(row.get('ip'))
+        _, low, high = cidr_bounds(value)
+        return address is not None and low <= address <= high
+    actual = row.get(column)
+    if column == 'domain_rev' and actual is None:
+        actual = reverse_domain(row.get('domain'))
+    if actual is None:
+        return False
+    if op in ('lt', 'gte'):
+        actual = _row_time(actual)
+        if actual is None:
+            return False
+        return actual < value if op == 'lt' else actual >= value
+    if op == 'eq':
+        if isinstance(actual, str) and isinstance(value, str):
+            return actual.casefold() == value.casefold()
+        return str(actual) == str(value)
+    # contains / prefix / suffix：值已是转义后的 LIKE 模式
+    return _like_regex(value).fullmatch(str(actual)) is not None
+
+def matches(compiled: CompiledFilter, row: Mapping[str, Any]) -> bool:
+    """在内存中判断一行是否符合编译后的条件，语义与 SQL 条件一致，用于变更推送等不经过数据库的场景"""
+    return all(_predicate_matches(column, op, value, row) for column, op, value in compiled.predicates)
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """解析逗号分隔的 fields 参数，返回去重后的列名；未指定时返回 None（全部列）"""
+    if not fields:
+        return None
+    columns = tuple(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [c for c in columns if c not in SELECTABLE_COLUMNS]
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(unknown)}，可选字段: {', '.join(SELECTABLE_COLUMNS)}")
+    return columns or None
+
+def select_clause(columns: Optional[Tuple[str, ...]], separator: str = ", ") -> str:
+    """生成 SELECT 列表；列名已经过 parse_fields 白名单校验，未指定时为全部接口字段（不含 ip_bin 等内部列）"""
+    return separator.join(columns or SELECTABLE_COLUMNS)
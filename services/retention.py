@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from config.database import PARTITION_CONFIG
+from database.connection import get_db
+from database.partitions import maintain
+from database.repositories import MySQLAssetsRepository
+from services.assets import AssetsService
+
+logger = logging.getLogger(__name__)
+
+class PartitionMaintainer:
+    """定时预建 assets 表的后续分区，并按保留天数删除过期分区（仅 MySQL 分区表）"""
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        premake: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        interval: Optional[float] = None
+    ):
+        self.mode = mode or PARTITION_CONFIG['mode']
+        self.premake = PARTITION_CONFIG['premake'] if premake is None else premake
+        self.retention_days = PARTITION_CONFIG['retention_days'] if retention_days is None else retention_days
+        self.interval = interval or PARTITION_CONFIG['interval']
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Any] = {
+            "runs": 0,
+            "failures": 0,
+            "created": [],
+            "dropped": [],
+            "last_run_at": None,
+            "last_run_ms": 0.0,
+            "last_error": None,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'none'
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """启动定时维护任务"""
+        if self.running or not self.enabled:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"分区维护已启动: {self.mode}, 预建 {self.premake} 个周期, "
+            f"保留 {self.retention_days or '不限'} 天, 间隔 {self.interval}s"
+        )
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # run_once 已处理维护本身的错误，这里兜底，任何异常都不能结束定时任务
+                logger.error(f"分区维护任务异常: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Optional[Dict[str, Any]]:
+        """执行一次维护；后端不是 MySQL 时跳过。出错时记录并返回 None，下一个周期重试"""
+        started = time.perf_counter()
+        try:
+            repository = get_db().primary
+            if not isinstance(repository, MySQLAssetsRepository):
+                logger.warning(f"{repository.name} 不支持分区维护，已跳过")
+                return None
+            self._stats["runs"] += 1
+            result = await repository.run(maintain, self.mode, self.premake, self.retention_days)
+            repository.partitioned = result["partitioned"]
+            if result["dropped"]:
+                AssetsService._bump_generation()
+                logger.info(f"已删除过期分区: {', '.join(result['dropped'])}")
+            if result["created"]:
+                logger.info(f"已预建分区: {', '.join(result['created'])}")
+            self._stats["created"] = result["created"]
+            self._stats["dropped"] = result["dropped"]
+            if result.get("facets_dirty"):
+                # 汇总表在删除分区后失效，在维护任务中全量重建，不占用请求路径
+                groups = await repository.rebuild_facets()
+                logger.info(f"删除分区后已重建汇总表: {groups} 个维度组合")
+        except Exception as e:
+            self._stats["failures"] += 1
+            self._stats["last_error"] = str(e)
+            logger.error(f"分区维护失败: {str(e)}")
+            return None
+        finally:
+            self._stats["last_run_at"] = time.time()
+            self._stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self._stats["last_error"] = None
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "premake": self.premake,
+            "retention_days": self.retention_days,
+            "interval": self.interval,
+            **self._stats,
+        }
+
+# 全局分区维护实例
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,52 @@
+import re
+from typing import List, Optional, Tuple
+
+# 全文检索覆盖的列（MySQL FULLTEXT 索引、Postgres search_vector、SQLite assets_fts 保持一致）
+SEARCH_COLUMNS = ('title', 'product', 'domain')
+MAX_SEARCH_TERMS = 8
+
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'  # 假名、中日韩统一表意文字、谚文
+_TOKEN = re.compile(f'[{_CJK}]+|[0-9a-z]+')
+
+def tokens(text: Optional[str]) -> List[str]:
+    """切分检索词元：拉丁字母/数字按单词，中日韩连续字符切为重叠的二元组，末尾再补一个单字，
+    这样任意单字都是某个词元的开头，可以用前缀匹配检索"""
+    result = []
+    for run in _TOKEN.findall((text or '').lower()):
+        if len(run) > 1 and not run[0].isascii():
+            result.extend(run[i:i + 2] for i in range(len(run) - 1))
+        result.append(run[-1] if not run[0].isascii() else run)
+    return result
+
+def search_text(*values: Optional[str]) -> str:
+    """建索引用的文本：各列词元以空格连接，供 SQLite FTS5 的 unicode61 分词器按空格切分"""
+    return " ".join(token for value in values for token in tokens(value))
+
+def parse_query(q: str) -> Tuple[str, ...]:
+    """把 q 按空白切分为检索词，每个词规范化为以空格分隔的连续片段；全部条件同时满足"""
+    terms = tuple(dict.fromkeys(
+        " ".join(_TOKEN.findall(term.lower())) for term in q.split()
+    ))
+    terms = tuple(term for term in terms if term)
+    if not terms:
+        raise ValueError("q 中没有可检索的文字或数字")
+    if len(terms) > MAX_SEARCH_TERMS:
+        raise ValueError(f"q 最多 {MAX_SEARCH_TERMS} 个检索词")
+    return terms
+
+def mysql_boolean_query(terms: Tuple[str, ...]) -> str:
+    """MySQL BOOLEAN MODE：每个词作为必须出现的短语，由 ngram 解析器切分"""
+    return " ".join(f'+"{term}"' for term in terms)
+
+def fts5_query(terms: Tuple[str, ...]) -> str:
+    """SQLite FTS5：每个词的词元组成短语，最后一个词元按前缀匹配"""
+    return " AND ".join(f'"{" ".join(tokens(term))}"*' for term in terms)
+
+def tsquery(terms: Tuple[str, ...]) -> str:
+    """Postgres to_tsquery('simple', ...)：词元按 <-> 相邻连接，最后一个按前缀匹配"""
+    phrases = []
+    for term in terms:
+        parts = [f"'{token}'" for token in tokens(term)]
+        parts[-1] += ':*'
+        phrases.append("(" + " <-> ".join(parts) + ")")
+    return " & ".join(phrases)
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Any, Optional
+
+# 时间列（timestamp / lastupdatetime）写入数据库的统一格式
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def parse_datetime(date_str: str) -> datetime:
+    """解析时间字符串，支持多种格式"""
+    formats = [
+        "%Y%m%d",
+        "%Y-%m-%d",
+        "%Y-%m-%d %H:%M",
+        "%Y%m%d%H%M",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y%m%d%H%M%S"
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析时间格式: {date_str}，支持的格式有：YYYYMMDD, YYYY-MM-DD, YYYY-MM-DD HH:MM, YYYYMMDDHHMM")
+
+def parse_time_value(value: Any) -> Optional[datetime]:
+    """宽松解析写入的时间值：parse_datetime 支持的格式及 ISO 8601（T 分隔、Z/时区偏移，保留原始的本地时间）；
+    空值返回 None，无法解析时抛出 ValueError。迁移 0002 的回填与写入路径使用同一规则"""
+    if value is None or isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f"无法解析时间格式: {value}，支持 YYYY-MM-DD HH:MM:SS、YYYYMMDDHHMMSS 及 ISO 8601 等格式")
+
+def normalize_time(value: Any) -> Optional[str]:
+    """写入前把时间值规范为 TIME_FORMAT 字符串，使 DATETIME 列在严格模式下也能接受"""
+    parsed = parse_time_value(value)
+    return parsed.strftime(TIME_FORMAT) if parsed is not None else None
@@ -2,6 +2,7 @@ import os
 import sys
 from pathlib import Path
 import time
+import json
 
 # 添加项目根目录到系统路径
 project_root = Path(__file__).parent.parent
@@ -47,5 +48,419 @@ def test_create_asset():
     data = response.json()
     assert data["identifier"] == test_asset["identifier"]
 
+def test_bulk_create_assets():
+    """测试批量创建资产"""
+    suffix = int(time.time())
+    records = [
+        {
+            "identifier": f"bulk_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": "10.0.0.1",
+            "port": 10000 + i
+        }
+        for i in range(3)
+    ]
+    records.append({"identifier": "invalid"})
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] + data["updated"] == 3
+    assert data["rejected"] == 1
+    assert data["errors"][0]["index"] == 3
+
+def test_create_asset_iso_timestamp():
+    """测试 ISO 8601 时间写入前规范为 DATETIME 格式，无法解析的时间返回 422"""
+    test_asset = {
+        "identifier": f"iso_{int(time.time())}",
+        "url": "http://test.com",
+        "timestamp": "2024-03-19T12:30:00Z",
+        "lastupdatetime": "2024-03-20T08:00:00+08:00",
+        "search_engine": "test",
+        "query_statements": "test query",
+        "ip": "1.1.1.2"
+    }
+    response = client.post("/api/v1/assets/", json=test_asset, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["timestamp"] == "2024-03-19 12:30:00"
+    assert data["lastupdatetime"] == "2024-03-20 08:00:00"
+
+    response = client.post("/api/v1/assets/", json={**test_asset, "timestamp": "yesterday"}, headers=headers)
+    assert response.status_code == 422
+
+def test_bulk_create_assets_bad_timestamp():
+    """测试批量写入中时间无法解析的记录单独拒绝，不影响同批其他记录"""
+    suffix = int(time.time())
+    records = [
+        {
+            "identifier": f"bulk_time_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": timestamp,
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": "10.0.0.3",
+            "port": 10000 + i
+        }
+        for i, timestamp in enumerate(["2024-03-19T12:00:00Z", "not a time", "20240319120000"])
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] + data["updated"] == 2
+    assert data["rejected"] == 1
+    assert data["errors"][0]["index"] == 1
+
+def test_stream_create_assets():
+    """测试 NDJSON 流式导入"""
+    suffix = int(time.time())
+    lines = [
+        json.dumps({
+            "identifier": f"stream_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": "10.0.0.2",
+            "port": 10000 + i
+        })
+        for i in range(3)
+    ]
+    lines.insert(1, "{not json")
+    response = client.post(
+        "/api/v1/assets/stream",
+        content="\n".join(lines),
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["lines"] == 4
+    assert data["inserted"] + data["updated"] == 3
+    assert data["errors"][0]["line"] == 2
+
+def test_stream_rejects_oversize_line_in_single_chunk(monkeypatch):
+    """测试超长行与其他行在同一个块中到达时同样按单行上限拒绝"""
+    from config.settings import settings
+    suffix = int(time.time())
+    lines = [
+        json.dumps({
+            "identifier": f"stream_long_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": "10.0.0.4",
+            "port": 10000 + i,
+            "title": "x" * (2000 if i == 1 else 10)
+        })
+        for i in range(3)
+    ]
+    monkeypatch.setattr(settings, "NDJSON_MAX_LINE_BYTES", 1024)
+    response = client.post(
+        "/api/v1/assets/stream",
+        content="\n".join(lines) + "\n",
+        headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["lines"] == 3
+    assert data["inserted"] + data["updated"] == 2
+    assert data["rejected"] == 1
+    assert data["errors"][0]["line"] == 2
+    assert "1024" in data["errors"][0]["error"]
+
+def test_ingest_stats():
+    """测试写后队列统计"""
+    response = client.get("/api/v1/assets/ingest/stats", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert "depth" in data
+    assert "last_flush_ms" in data
+
+def test_get_assets_cursor():
+    """测试游标翻页"""
+    response = client.get("/api/v1/assets/?pagination=cursor&limit=1", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert "next_cursor" in data
+    if data["next_cursor"]:
+        next_page = client.get(f"/api/v1/assets/?cursor={data['next_cursor']}&limit=1", headers=headers)
+        assert next_page.status_code == 200
+        next_items = next_page.json()["items"]
+        if next_items:
+            assert next_items[0]["id"] > data["items"][0]["id"]
+
+def test_get_assets_invalid_cursor():
+    """测试无效游标"""
+    response = client.get("/api/v1/assets/?cursor=bad-cursor", headers=headers)
+    assert response.status_code == 400
+
+def test_export_assets():
+    """测试流式导出"""
+    response = client.get("/api/v1/assets/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert all("identifier" in row for row in exported)
+    # 导出与列表接口的序列化结果一致
+    listed = client.get("/api/v1/assets/?pagination=cursor&limit=1", headers=headers).json()["items"]
+    assert exported[0] == listed[0]
+
+    response = client.get("/api/v1/assets/export?format=csv", headers=headers)
+    assert response.status_code == 200
+    assert response.text.splitlines()[0].startswith("id,identifier")
+
+def test_get_assets_total_modes():
+    """测试总数计算方式"""
+    response = client.get("/api/v1/assets/?total=estimate", headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json()["total"], int)
+
+    response = client.get("/api/v1/assets/?total=none&limit=1", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert "has_more" in data
+
+def test_get_assets_fields():
+    """测试字段投影"""
+    response = client.get("/api/v1/assets/?fields=ip,port,domain&limit=5", headers=headers)
+    assert response.status_code == 200
+    for item in response.json()["items"]:
+        assert set(item) == {"ip", "port", "domain"}
+
+    response = client.get("/api/v1/assets/?fields=ip,unknown", headers=headers)
+    assert response.status_code == 400
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
+def test_delete_assets_job():
+    """测试后台分批删除任务及进度查询"""
+    search_engine = f"purge_{int(time.time())}"
+    records = [
+        {
+            "identifier": f"{search_engine}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": search_engine,
+            "query_statements": "test query",
+            "ip": "10.0.1.1",
+            "port": 20000 + i
+        }
+        for i in range(5)
+    ]
+    client.post("/api/v1/assets/bulk", json=records, headers=headers)
+
+    response = client.delete(
+        f"/api/v1/assets/?search_engine={search_engine}&batch_size=2&wait=true", headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["deleted_count"] == 5
+    assert data["batches"] == 3
+
+    response = client.get(f"/api/v1/assets/delete-jobs/{data['job_id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted_count"] == 5
+
+def test_delete_job_not_found():
+    """测试查询和取消不存在的删除任务"""
+    response = client.get("/api/v1/assets/delete-jobs/missing", headers=headers)
+    assert response.status_code == 404
+    response = client.delete("/api/v1/assets/delete-jobs/missing", headers=headers)
+    assert response.status_code == 404
+
+def test_search_assets():
+    """测试 q 全文检索"""
+    suffix = int(time.time())
+    records = [
+        {
+            "identifier": f"search_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": f"10.20.{suffix % 250}.{i}",
+            "port": 443,
+            "title": title
+        }
+        for i, title in enumerate([f"统一身份认证 {suffix}", f"统一认证平台 {suffix}"])
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/assets/", params={"q": f"身份认证 {suffix}"}, headers=headers)
+    assert response.status_code == 200
+    assert [item["identifier"] for item in response.json()["items"]] == [f"search_{suffix}_0"]
+
+    response = client.get("/api/v1/assets/", params={"q": "!!"}, headers=headers)
+    assert response.status_code == 400
+
+def test_get_assets_by_cidr():
+    """测试 cidr 网段过滤"""
+    suffix = int(time.time()) % 250
+    records = [
+        {
+            "identifier": f"cidr_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": ip,
+            "port": 8443
+        }
+        for i, ip in enumerate([f"172.31.{suffix}.1", f"172.31.{suffix}.254", f"172.30.{suffix}.1"])
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/assets/", params={"cidr": f"172.31.{suffix}.0/24", "port": 8443}, headers=headers)
+    assert response.status_code == 200
+    assert sorted(item["ip"] for item in response.json()["items"]) == [f"172.31.{suffix}.1", f"172.31.{suffix}.254"]
+
+    response = client.get("/api/v1/assets/", params={"cidr": "172.31.0.0/40"}, headers=headers)
+    assert response.status_code == 400
+
+def test_get_assets_by_domain_suffix():
+    """测试 domain_suffix 子域名查询"""
+    suffix = int(time.time())
+    records = [
+        {
+            "identifier": f"suffix_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": "test",
+            "query_statements": "test query",
+            "ip": f"10.30.{suffix % 250}.{i}",
+            "port": 443,
+            "domain": domain
+        }
+        for i, domain in enumerate([f"s{suffix}.example.net", f"a.b.s{suffix}.example.net", f"xs{suffix}.example.net"])
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/assets/", params={"domain_suffix": f"s{suffix}.example.net"}, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert sorted(item["identifier"] for item in items) == [f"suffix_{suffix}_0", f"suffix_{suffix}_1"]
+    assert "domain_rev" not in items[0]
+
+    response = client.get("/api/v1/assets/", params={"domain_suffix": "."}, headers=headers)
+    assert response.status_code == 400
+
+def test_get_assets_stats():
+    """测试按维度统计"""
+    suffix = int(time.time())
+    engine = f"stats_{suffix}"
+    records = [
+        {
+            "identifier": f"stats_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": engine,
+            "query_statements": "test query",
+            "ip": f"10.40.{suffix % 250}.{i}",
+            "port": port,
+            "protocol": "http"
+        }
+        for i, port in enumerate([80, 80, 8080])
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/assets/stats", params={"group_by": "port,protocol", "search_engine": engine}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["group_by"] == ["port", "protocol"]
+    assert data["total"] == 3
+    assert data["facets"]["port"] == [{"value": 80, "count": 2}, {"value": 8080, "count": 1}]
+    assert data["facets"]["protocol"] == [{"value": "http", "count": 3}]
+
+    response = client.get("/api/v1/assets/stats", params={"group_by": "title"}, headers=headers)
+    assert response.status_code == 400
+
+def test_assets_feed_ws():
+    """测试 WebSocket 变更推送：按条件收到批量写入和删除的资产"""
+    suffix = int(time.time())
+    engine = f"feed_{suffix}"
+    records = [
+        {
+            "identifier": f"feed_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": engine,
+            "query_statements": "test query",
+            "ip": f"10.50.{suffix % 250}.{i}",
+            "port": 80 if i < 2 else None
+        }
+        for i in range(3)
+    ]
+    # 在同一个事件循环中处理 WebSocket 和其他请求
+    with TestClient(app) as feed_client:
+        with feed_client.websocket_connect(f"/api/v1/assets/feed/ws?search_engine={engine}", headers=headers) as ws:
+            response = feed_client.post("/api/v1/assets/bulk", json=records, headers=headers)
+            assert response.status_code == 200
+            event = ws.receive_json()
+            assert event["type"] == "upserted"
+            assert sorted(a["identifier"] for a in event["assets"]) == [r["identifier"] for r in records]
+            # 推送的是读回的存储行，与查询接口返回的 id 一致
+            stored = feed_client.get("/api/v1/assets/", params={"search_engine": engine}, headers=headers).json()
+            assert sorted(a["id"] for a in event["assets"]) == sorted(a["id"] for a in stored["items"])
+            assert all(a["updated_at"] for a in event["assets"])
+
+            response = feed_client.delete("/api/v1/assets/", params={"search_engine": engine, "wait": True}, headers=headers)
+            assert response.status_code == 200
+            event = ws.receive_json()
+            assert event["type"] == "deleted"
+            assert sorted(a["identifier"] for a in event["assets"]) == [r["identifier"] for r in records]
+            assert all(a["id"] for a in event["assets"])
+
+def test_get_assets_delta(monkeypatch):
+    """测试增量同步：从头读取符合条件的资产，删除后用水位读到墓碑"""
+    from config.settings import settings
+    monkeypatch.setattr(settings, "DELTA_SETTLE_SECONDS", 0)
+    suffix = int(time.time())
+    engine = f"delta_{suffix}"
+    records = [
+        {
+            "identifier": f"delta_{suffix}_{i}",
+            "url": "http://test.com",
+            "timestamp": "2024-03-19",
+            "search_engine": engine,
+            "query_statements": "test query",
+            "ip": f"10.60.{suffix % 250}.{i}",
+            "port": 80
+        }
+        for i in range(3)
+    ]
+    response = client.post("/api/v1/assets/bulk", json=records, headers=headers)
+    assert response.status_code == 200
+    time.sleep(0.01)
+
+    response = client.get("/api/v1/assets/delta", params={"search_engine": engine, "limit": 2}, headers=headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert page["has_more"] is True
+    identifiers = [item["identifier"] for item in page["items"]]
+    response = client.get("/api/v1/assets/delta", params={"search_engine": engine, "limit": 2, "watermark": page["watermark"]}, headers=headers)
+    page = response.json()
+    identifiers += [item["identifier"] for item in page["items"]]
+    assert identifiers == [r["identifier"] for r in records]
+    assert page["has_more"] is False
+
+    response = client.delete("/api/v1/assets/", params={"search_engine": engine, "wait": True}, headers=headers)
+    assert response.status_code == 200
+    time.sleep(0.01)
+    response = client.get("/api/v1/assets/delta", params={"search_engine": engine, "watermark": page["watermark"]}, headers=headers)
+    assert response.status_code == 200
+    delta = response.json()
+    assert delta["items"] == []
+    assert {r["identifier"] for r in records} <= {d["identifier"] for d in delta["deleted"]}
+
+    response = client.get("/api/v1/assets/delta", params={"watermark": "invalid"}, headers=headers)
+    assert response.status_code == 400
+    response = client.get("/api/v1/assets/delta", params={"updated_since": "2000-01-01"}, headers=headers)
+    assert response.status_code == 410
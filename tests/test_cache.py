@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+import time
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from services.cache import ResultCache, MISSING
+
+def test_cache_hit_and_miss():
+    """测试命中与未命中"""
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    assert cache.get("a", 0) is MISSING
+    cache.set("a", [1, 2, 3], 0)
+    assert cache.get("a", 0) == [1, 2, 3]
+    cache.set("none", None, 0)
+    assert cache.get("none", 0) is None
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_cache_generation_invalidation():
+    """测试写入代数变化后缓存失效"""
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    cache.set("a", 1, 0)
+    assert cache.get("a", 1) is MISSING
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_cache_ttl_expiration():
+    """测试过期"""
+    cache = ResultCache(max_bytes=1024, ttl=0.01)
+    cache.set("a", 1, 0)
+    time.sleep(0.02)
+    assert cache.get("a", 0) is MISSING
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_evicts_lru_by_bytes():
+    """测试按字节上限淘汰最久未使用的条目"""
+    cache = ResultCache(max_bytes=25, ttl=60)
+    cache.set("a", "x" * 8, 0)
+    cache.set("b", "y" * 8, 0)
+    cache.get("a", 0)
+    cache.set("c", "z" * 8, 0)
+    assert cache.get("b", 0) is MISSING
+    assert cache.get("a", 0) == "x" * 8
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 25
+
+def test_cache_skips_oversized_values():
+    """测试超过上限的值不会写入"""
+    cache = ResultCache(max_bytes=10, ttl=60)
+    cache.set("a", "x" * 100, 0)
+    assert cache.get("a", 0) is MISSING
+
+def test_cache_sizing_does_not_use_stdlib_json(monkeypatch):
+    """测试写入缓存时估算大小不经过标准库 json 序列化"""
+    import json
+    from datetime import datetime
+
+    def fail(*args, **kwargs):
+        raise AssertionError("缓存写入不应使用 json.dumps")
+
+    monkeypatch.setattr(json, "dumps", fail)
+    rows = [{"id": i, "title": "登录", "lastupdatetime": datetime(2024, 3, 19)} for i in range(1000)]
+    cache = ResultCache(max_bytes=1024 * 1024, ttl=60)
+    cache.set("page", {"total": 1000, "items": rows}, 0)
+    assert cache.get("page", 0)["total"] == 1000
+    assert cache.stats()["bytes"] > 1000 * len('"title":"登录"'.encode())
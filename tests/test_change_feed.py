@@ -0,0 +1,125 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsFilter
+from services.change_feed import ChangeFeed, ChangeFeedFull
+from services.query_builder import compile_filters, matches
+
+def make_row(**values):
+    row = {
+        "identifier": "a1", "ip": "203.0.113.7", "port": 443, "domain": "www.Example.com",
+        "title": "Apache Tomcat 登录页面", "product": "Tomcat", "country": "CN",
+        "search_engine": "fofa", "as_organization": "Example Org",
+        "lastupdatetime": "2024-03-19 10:00:00", "domain_rev": "com.example.www."
+    }
+    row.update(values)
+    return row
+
+@pytest.mark.parametrize("conditions,expected", [
+    ({}, True),
+    ({"ip": "203.0.113.7", "port": 443}, True),
+    ({"port": 80}, False),
+    ({"search_engine": "FOFA"}, True),
+    ({"cidr": "203.0.112.0/22"}, True),
+    ({"cidr": "2001:db8::/32"}, False),
+    ({"domain_suffix": "example.com"}, True),
+    ({"domain_suffix": "ample.com"}, False),
+    ({"title": "tomcat"}, True),
+    ({"title": "100%"}, False),
+    ({"product": "tom"}, True),
+    ({"product": "cat"}, True),
+    ({"product": "nginx"}, False),
+    ({"org": "example"}, True),
+    ({"after": "2024-03-19"}, True),
+    ({"before": "2024-03-19"}, False),
+    ({"q": "apache tom"}, True),
+    ({"q": "登录"}, True),
+    ({"q": "tomcat apache"}, True),
+    ({"q": "nginx"}, False),
+])
+def test_matches(conditions, expected):
+    """测试内存中的条件匹配与 SQL 条件语义一致"""
+    assert matches(compile_filters(**conditions), make_row()) is expected
+
+def test_matches_derives_domain_rev_and_handles_missing_values():
+    """测试缺少派生列时按域名计算，缺失的列不匹配"""
+    row = make_row(domain_rev=None, lastupdatetime=None)
+    assert matches(compile_filters(domain_suffix="example.com"), row)
+    assert not matches(compile_filters(after="2024-01-01"), row)
+    assert not matches(compile_filters(cidr="10.0.0.0/8"), make_row(ip="not-an-ip"))
+
+def test_publish_fans_out_by_filter():
+    """测试每个订阅者只收到符合自己条件的行，派生列不推送"""
+    feed = ChangeFeed(buffer_size=10, max_subscribers=10)
+
+    async def main():
+        everything = feed.subscribe()
+        port_80 = feed.subscribe(AssetsFilter(port=80))
+        feed.publish("upserted", [make_row(identifier="a"), make_row(identifier="b", port=80)])
+        return everything.queue.get_nowait(), port_80.queue.get_nowait()
+
+    everything, port_80 = asyncio.run(main())
+    assert everything["type"] == "upserted"
+    assert [a["identifier"] for a in everything["assets"]] == ["a", "b"]
+    assert [a["identifier"] for a in port_80["assets"]] == ["b"]
+    assert "domain_rev" not in port_80["assets"][0]
+    assert everything["seq"] == port_80["seq"]
+
+def test_slow_consumer_is_dropped():
+    """测试缓冲区写满的订阅者被断开，只收到 dropped 事件，其他订阅者不受影响"""
+    feed = ChangeFeed(buffer_size=2, max_subscribers=10)
+
+    async def main():
+        slow = feed.subscribe()
+        fast = feed.subscribe()
+        received = []
+        for i in range(3):
+            feed.publish("created", [make_row(identifier=f"a{i}")])
+            received.append(fast.queue.get_nowait())
+        events = [event async for event in slow.events(heartbeat=0.1)]
+        return slow, received, events
+
+    slow, received, events = asyncio.run(main())
+    assert slow.closed and slow.close_reason == "slow consumer"
+    assert events == [{"type": "dropped", "reason": "slow consumer"}]
+    assert len(received) == 3
+    assert feed.stats()["subscribers"] == 1
+    assert feed.stats()["dropped"] == 1
+
+def test_subscriber_limit_and_invalid_filter():
+    """测试订阅者上限和无效的过滤条件"""
+    feed = ChangeFeed(buffer_size=1, max_subscribers=1)
+
+    async def main():
+        with pytest.raises(ValueError):
+            feed.subscribe(AssetsFilter(cidr="not-a-network"))
+        subscription = feed.subscribe()
+        with pytest.raises(ChangeFeedFull):
+            feed.subscribe()
+        feed.unsubscribe(subscription)
+        assert not feed.active
+        feed.publish("created", [make_row()])
+
+    asyncio.run(main())
+
+def test_heartbeat_when_idle():
+    """测试空闲时产出 None 作为心跳，关闭后结束"""
+    feed = ChangeFeed(buffer_size=1, max_subscribers=1)
+
+    async def main():
+        subscription = feed.subscribe()
+        events = subscription.events(heartbeat=0.01)
+        first = await events.__anext__()
+        feed.close_all()
+        rest = [event async for event in events]
+        return first, rest
+
+    first, rest = asyncio.run(main())
+    assert first is None
+    assert rest == [{"type": "dropped", "reason": "server shutdown"}]
@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from services.delete_jobs import DeleteJobManager
+from services.query_builder import compile_filters
+
+def make_table(ids):
+    """模拟按主键分批删除的数据表"""
+    rows = sorted(ids)
+    calls = []
+
+    async def delete_batch(compiled, after_id, batch_size):
+        calls.append(after_id)
+        await asyncio.sleep(0)
+        batch = [i for i in rows if i > after_id][:batch_size]
+        if not batch:
+            return 0, None
+        for i in batch:
+            rows.remove(i)
+        return len(batch), batch[-1]
+
+    return rows, calls, delete_batch
+
+def test_job_deletes_in_batches():
+    """测试任务按主键分批删除直到没有符合条件的行"""
+    rows, calls, delete_batch = make_table(range(1, 8))
+    manager = DeleteJobManager(batch_size=3, pause=0, delete_batch=delete_batch)
+
+    async def main():
+        job = manager.submit(compile_filters(), {})
+        await manager.wait(job.id, timeout=1)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "completed"
+    assert job.deleted_count == 7
+    assert job.batches == 3
+    assert calls == [0, 3, 6, 7]
+    assert rows == []
+
+def test_job_cancel_stops_between_batches():
+    """测试取消后在当前批次完成后停止"""
+    rows, _, delete_batch = make_table(range(1, 101))
+    manager = DeleteJobManager(batch_size=10, pause=10, delete_batch=delete_batch)
+
+    async def main():
+        job = manager.submit(compile_filters(), {})
+        await asyncio.sleep(0.01)
+        manager.cancel(job.id)
+        await manager.wait(job.id, timeout=1)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "cancelled"
+    assert job.deleted_count == 10
+    assert len(rows) == 90
+
+def test_job_failure_recorded():
+    """测试删除出错时任务标记为失败并记录错误"""
+    async def delete_batch(compiled, after_id, batch_size):
+        raise RuntimeError("lock wait timeout")
+
+    manager = DeleteJobManager(pause=0, delete_batch=delete_batch)
+
+    async def main():
+        job = manager.submit(compile_filters(), {})
+        await manager.wait(job.id, timeout=1)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == "failed"
+    assert "lock wait timeout" in job.error
+
+def test_jobs_run_one_at_a_time():
+    """测试并发上限内排队执行"""
+    _, _, delete_batch = make_table(range(1, 5))
+    manager = DeleteJobManager(batch_size=1, pause=0.01, concurrency=1, delete_batch=delete_batch)
+
+    async def main():
+        first = manager.submit(compile_filters(), {})
+        second = manager.submit(compile_filters(), {})
+        await asyncio.sleep(0.005)
+        statuses = (first.status, second.status)
+        await manager.wait(second.id, timeout=1)
+        return statuses
+
+    assert asyncio.run(main()) == ("running", "pending")
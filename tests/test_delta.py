@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from datetime import datetime
+from services.delta import (
+    Watermark, encode_watermark, decode_watermark, format_time, is_expired, changes_sql, cutoffs_in_range
+)
+from services.query_builder import compile_filters
+
+def test_watermark_round_trip():
+    """测试水位编码后可以原样解析"""
+    watermark = Watermark(("2024-03-19 10:00:00.123456", 42), ("2024-03-19T10:00:00+00:00", 7))
+    assert decode_watermark(encode_watermark(watermark)) == watermark
+
+@pytest.mark.parametrize("token", ["", "not-a-watermark", "eyJ1IjpbIngiLDFdLCJkIjpbIngiLDFdfQ"])
+def test_invalid_watermark(token):
+    """测试无效的水位"""
+    with pytest.raises(ValueError):
+        decode_watermark(token)
+
+def test_format_time_keeps_microseconds():
+    """测试数据库返回的时间保留微秒"""
+    assert format_time(datetime(2024, 3, 19, 10, 0, 0, 5)) == "2024-03-19 10:00:00.000005"
+    assert format_time("2024-03-19 10:00:00.123") == "2024-03-19 10:00:00.123"
+
+def test_is_expired():
+    """测试水位早于墓碑保留期"""
+    assert is_expired("2024-01-01 00:00:00", "2024-03-19 10:00:00.000", 30)
+    assert not is_expired("2024-03-01 00:00:00", "2024-03-19 10:00:00.000", 30)
+    assert not is_expired("2024-03-01 00:00:00", "2024-03-19T10:00:00+00:00", 30)
+
+def test_changes_sql_uses_keyset():
+    """测试按 (updated_at, id) 键集读取并带上过滤条件"""
+    sql = changes_sql(compile_filters(port=80), 100)
+    assert "port = %(f_port)s" in sql
+    assert "updated_at > %(w_updated_at)s OR (updated_at = %(w_updated_at)s AND id > %(w_updated_id)s)" in sql
+    assert sql.endswith("ORDER BY updated_at, id LIMIT 100")
+
+def test_cutoffs_in_range():
+    """测试范围墓碑按删除读取范围筛选，连续两次读取既不重复也不遗漏"""
+    cutoffs = [
+        {"id": 1, "deleted_at": "2024-03-19 10:00:00.000000"},
+        {"id": 2, "deleted_at": "2024-03-19 11:00:00.000000"},
+        {"id": 3, "deleted_at": "2024-03-19 12:00:00.000000"},
+    ]
+    ids = lambda selected: [c["id"] for c in selected]
+    # 上一次读到 until 10:00（不含），本次读到 until 12:00（不含）
+    assert ids(cutoffs_in_range(cutoffs, ("2024-03-19 10:00:00.000000", 0), ("2024-03-19 12:00:00.000000", 0))) == [1, 2]
+    # 逐行墓碑读满一页、停在 11:00 的某条墓碑：11:00 归本次，下一次从 11:00 之后开始
+    assert ids(cutoffs_in_range(cutoffs, ("2024-03-19 10:00:00", 0), ("2024-03-19 11:00:00.000000", 5))) == [1, 2]
+    assert ids(cutoffs_in_range(cutoffs, ("2024-03-19 11:00:00.000000", 5), ("2024-03-19 13:00:00.000000", 0))) == [3]
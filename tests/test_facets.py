@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsFilter
+from services.query_builder import compile_filters
+from services.facets import parse_group_by, uses_rollup, facet_sql, normalize_facet
+from database import facets
+
+def test_parse_group_by():
+    """测试统计维度解析、去重和校验"""
+    assert parse_group_by("port, country_name,port") == ("port", "country_name")
+    with pytest.raises(ValueError):
+        parse_group_by("")
+    with pytest.raises(ValueError):
+        parse_group_by("port,title")
+
+def test_rollup_only_for_facet_filters():
+    """测试只按维度列过滤时读汇总表，其他条件扫描 assets"""
+    compiled = compile_filters(AssetsFilter(port=80, s="fofa", protocol="http"))
+    assert uses_rollup(compiled)
+    assert "FROM assets_facets" in facet_sql("country_name", compiled, 10, True)
+    assert not uses_rollup(compile_filters(AssetsFilter(port=80, title="登录")))
+    assert "FROM assets WHERE" in facet_sql("country_name", compiled, 10, False)
+
+def test_normalize_facet_merges_empty_values():
+    """测试空字符串与 NULL 合并为同一分组并按数量排序"""
+    rows = [{"value": "CN", "count": 2}, {"value": "", "count": 2}, {"value": None, "count": 1}]
+    assert normalize_facet(rows) == [{"value": None, "count": 3}, {"value": "CN", "count": 2}]
+
+def test_mysql_triggers_cover_all_writes():
+    """测试 MySQL 触发器覆盖插入、更新和删除，更新只在维度变化时调整计数"""
+    insert, update, delete = facets.trigger_statements()
+    assert "AFTER INSERT" in insert and "asset_count + 1" in insert
+    assert "AFTER UPDATE" in update and "NOT (NEW.port <=> OLD.port)" in update
+    assert "AFTER DELETE" in delete and "asset_count - 1" in delete
@@ -0,0 +1,131 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsCreate
+from services.assets import AssetsService
+from services.ingest_queue import IngestQueue, IngestQueueFull
+
+def make_asset(i: int) -> AssetsCreate:
+    return AssetsCreate(
+        identifier=f"queue_{i}", url="http://test.com", timestamp="2024-03-19",
+        search_engine="test", query_statements="test query", ip="10.0.0.9", port=10000 + i
+    )
+
+def test_stop_rejects_blocked_puts(monkeypatch):
+    """测试停止时仍在等待空位的入队被拒绝，已入队（返回成功）的记录全部落库"""
+    flushed = []
+    release = asyncio.Event()
+
+    async def fake_bulk_upsert(batch, batch_size=None):
+        await release.wait()
+        flushed.extend(asset.identifier for asset in batch)
+        return {"inserted": len(batch), "updated": 0, "rejected": 0}
+
+    monkeypatch.setattr(AssetsService, "bulk_upsert_assets", fake_bulk_upsert)
+
+    async def main():
+        queue = IngestQueue(maxsize=1, batch_size=1, flush_interval=60, backpressure='block')
+        await queue.start()
+        await queue.put(make_asset(0))
+        await asyncio.sleep(0)  # 刷写任务取走第一条并阻塞在落库上
+        await queue.put(make_asset(1))  # 占满队列
+        blocked = asyncio.create_task(queue.put(make_asset(2)))
+        await asyncio.sleep(0.01)
+        stopping = asyncio.create_task(queue.stop())
+        await asyncio.sleep(0.01)
+        release.set()
+        await stopping
+        with pytest.raises(IngestQueueFull):
+            await blocked
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert flushed == ["queue_0", "queue_1"]
+    assert stats["enqueued"] == 2
+    assert stats["rejected"] == 1
+    assert not stats["running"]
+
+def test_block_timeout_rejects(monkeypatch):
+    """测试 block 策略下等待超时抛出 IngestQueueFull，超时的记录不会写入队列"""
+    monkeypatch.setattr("services.ingest_queue.settings.WRITE_BEHIND_BLOCK_TIMEOUT", 0.01)
+
+    async def main():
+        queue = IngestQueue(maxsize=1, backpressure='block')
+        queue._queue = asyncio.Queue(maxsize=1)
+        queue._task = asyncio.create_task(asyncio.sleep(60))  # 不消费的刷写任务
+        await queue.put(make_asset(0))
+        with pytest.raises(IngestQueueFull):
+            await queue.put(make_asset(1))
+        depth = queue._queue.qsize()
+        queue._task.cancel()
+        return depth, queue.stats()
+
+    depth, stats = asyncio.run(main())
+    assert depth == 1
+    assert stats["rejected"] == 1
+
+def test_flush_retries_then_dead_letters(monkeypatch, tmp_path):
+    """测试落库失败时按退避重试，重试耗尽的记录写入死信文件，可按 NDJSON 重新导入"""
+    dead_letter = tmp_path / "dead.ndjson"
+    monkeypatch.setattr("services.ingest_queue.settings.WRITE_BEHIND_RETRY_ATTEMPTS", 2)
+    monkeypatch.setattr("services.ingest_queue.settings.WRITE_BEHIND_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr("services.ingest_queue.settings.WRITE_BEHIND_DEAD_LETTER_PATH", str(dead_letter))
+    calls = []
+
+    async def fake_bulk_upsert(batch, batch_size=None):
+        calls.append([asset.identifier for asset in batch])
+        if batch[0].identifier == "queue_0" and len(calls) < 3:
+            raise RuntimeError("connection lost")  # 第一批前两次失败，第三次成功
+        if batch[0].identifier == "queue_1":
+            return {"inserted": 0, "updated": 0, "rejected": len(batch), "errors": [{"index": 0, "error": "down"}]}
+        return {"inserted": len(batch), "updated": 0, "rejected": 0, "errors": []}
+
+    monkeypatch.setattr(AssetsService, "bulk_upsert_assets", fake_bulk_upsert)
+
+    async def main():
+        queue = IngestQueue(maxsize=10, batch_size=1, flush_interval=60)
+        await queue.start()
+        await queue.put(make_asset(0))
+        await queue.put(make_asset(1))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert calls == [["queue_0"]] * 3 + [["queue_1"]] * 3
+    assert stats["flushed_rows"] == 1
+    assert stats["failed_rows"] == 1
+    assert stats["retries"] == 4
+    assert stats["dead_lettered"] == 1
+    lines = dead_letter.read_text(encoding="utf-8").splitlines()
+    assert [AssetsCreate.model_validate_json(line).identifier for line in lines] == ["queue_1"]
+
+def test_stop_bounded_when_queue_full(monkeypatch, tmp_path):
+    """测试刷写卡住且队列已满时 stop 不会阻塞在放入哨兵上，未落库的记录全部写入死信"""
+    dead_letter = tmp_path / "dead.ndjson"
+    monkeypatch.setattr("services.ingest_queue.settings.WRITE_BEHIND_DEAD_LETTER_PATH", str(dead_letter))
+
+    async def stuck_bulk_upsert(batch, batch_size=None):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(AssetsService, "bulk_upsert_assets", stuck_bulk_upsert)
+
+    async def main():
+        queue = IngestQueue(maxsize=1, batch_size=1, flush_interval=60)
+        await queue.start()
+        await queue.put(make_asset(0))
+        await asyncio.sleep(0)  # 刷写任务取走第一条并卡在落库上
+        await queue.put(make_asset(1))  # 占满队列
+        await asyncio.wait_for(queue.stop(timeout=0.05), 5)
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    lines = dead_letter.read_text(encoding="utf-8").splitlines()
+    assert sorted(AssetsCreate.model_validate_json(line).identifier for line in lines) == ["queue_0", "queue_1"]
+    assert stats["dead_lettered"] == 2
+    assert not stats["running"]
@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from datetime import datetime
+from peewee import SqliteDatabase
+from database.migrations import MigrationRunner
+from database.migrations.versions import MIGRATIONS, m0001_query_indexes, m0002_typed_time_columns, m0005_ip_binary, m0006_domain_rev, m0008_delta_sync
+from database.models.assets import Assets
+from services.network import ip_to_bytes
+
+@pytest.fixture
+def database(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "migrate.db"))
+    yield db
+    db.close()
+
+def fake_migration(version, calls):
+    return SimpleNamespace(VERSION=version, NAME=f"m{version}", upgrade=lambda ctx: calls.append(version))
+
+def test_baseline_creates_current_schema(database):
+    """测试空库按当前模型建表并记录全部迁移"""
+    runner = MigrationRunner(database)
+    assert runner.baseline([Assets])
+    indexes = {index.name for index in database.get_indexes('assets')}
+    assert {'assets_identifier', 'assets_lastupdatetime', 'assets_ip_port'} <= indexes
+    assert runner.pending() == []
+    assert not runner.baseline([Assets])
+
+def test_upgrade_runs_pending_in_order(database):
+    """测试按版本顺序执行未执行的迁移，支持指定目标版本"""
+    calls = []
+    runner = MigrationRunner(database, migrations=[fake_migration(v, calls) for v in (3, 1, 2)])
+    assert runner.upgrade(target=2) == [1, 2]
+    assert runner.upgrade() == [3]
+    assert calls == [1, 2, 3]
+    assert [item["applied_at"] is not None for item in runner.status()] == [True, True, True]
+
+def test_iter_batches_uses_keyset(database):
+    """测试按主键分批读取"""
+    database.execute_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+    for i in range(1, 8):
+        database.execute_sql("INSERT INTO items (id, value) VALUES (?, ?)", (i, str(i)))
+    runner = MigrationRunner(database, migrations=[], batch_size=3, pause=0)
+    batches = list(runner.context.iter_batches('items', ['value'], "value <> '5'"))
+    assert [[row[0] for row in batch] for batch in batches] == [[1, 2, 3], [4, 6, 7]]
+
+def test_query_indexes_migration_is_idempotent(database):
+    """测试索引迁移可重复执行"""
+    database.execute_sql(
+        "CREATE TABLE assets (id INTEGER PRIMARY KEY, identifier TEXT, search_engine TEXT, "
+        "country_name TEXT, region TEXT)"
+    )
+    runner = MigrationRunner(database, migrations=[m0001_query_indexes])
+    m0001_query_indexes.upgrade(runner.context)
+    m0001_query_indexes.upgrade(runner.context)
+    indexes = {index.name for index in database.get_indexes('assets')}
+    assert indexes == {'assets_identifier', 'assets_search_engine', 'assets_country_name', 'assets_region'}
+
+def test_time_values_parsed_for_backfill():
+    """测试回填时解析多种时间格式，无法解析时返回 None"""
+    parse = m0002_typed_time_columns._parse
+    assert parse("2024-03-19") == datetime(2024, 3, 19)
+    assert parse("20240319120000") == datetime(2024, 3, 19, 12, 0, 0)
+    assert parse("2024-03-19T12:00:00Z") == datetime(2024, 3, 19, 12, 0, 0)
+    assert parse("") is None
+    assert parse("not a date") is None
+
+def test_migration_versions_are_unique():
+    """测试迁移版本号唯一且递增"""
+    versions = [m.VERSION for m in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+def test_ip_binary_migration_backfills(database):
+    """测试 ip_bin 迁移补列、回填并建索引，可重复执行"""
+    database.execute_sql("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip TEXT, port INTEGER)")
+    for ip in ("10.0.0.1", "2001:db8::1", "example.com"):
+        database.execute_sql("INSERT INTO assets (ip, port) VALUES (?, 80)", (ip,))
+    runner = MigrationRunner(database, migrations=[m0005_ip_binary], batch_size=2, pause=0)
+    m0005_ip_binary.upgrade(runner.context)
+    m0005_ip_binary.upgrade(runner.context)
+    rows = database.execute_sql("SELECT ip, ip_bin FROM assets ORDER BY id").fetchall()
+    assert [(ip, value and bytes(value)) for ip, value in rows] == [
+        (ip, ip_to_bytes(ip)) for ip in ("10.0.0.1", "2001:db8::1", "example.com")
+    ]
+    assert 'assets_ip_bin_port' in {index.name for index in database.get_indexes('assets')}
+
+def test_domain_rev_migration_backfills(database):
+    """测试 domain_rev 迁移补列、回填并建索引"""
+    database.execute_sql("CREATE TABLE assets (id INTEGER PRIMARY KEY, domain TEXT)")
+    for domain in ("www.example.com", None, "10.0.0.1"):
+        database.execute_sql("INSERT INTO assets (domain) VALUES (?)", (domain,))
+    runner = MigrationRunner(database, migrations=[m0006_domain_rev], batch_size=2, pause=0)
+    m0006_domain_rev.upgrade(runner.context)
+    m0006_domain_rev.upgrade(runner.context)
+    rows = database.execute_sql("SELECT domain_rev FROM assets ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == ["com.example.www.", None, None]
+    assert 'assets_domain_rev' in {index.name for index in database.get_indexes('assets')}
+
+def test_delta_sync_migration_adds_column_and_index(database):
+    """测试增量同步迁移补列并建 (updated_at, id) 索引"""
+    database.execute_sql("CREATE TABLE assets (id INTEGER PRIMARY KEY, ip TEXT)")
+    runner = MigrationRunner(database, migrations=[m0008_delta_sync])
+    m0008_delta_sync.upgrade(runner.context)
+    m0008_delta_sync.upgrade(runner.context)
+    assert 'updated_at' in {column.name for column in database.get_columns('assets')}
+    assert m0008_delta_sync.INDEX_NAME in {index.name for index in database.get_indexes('assets')}
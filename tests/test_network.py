@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsFilter
+from services.query_builder import compile_filters
+from services.network import ip_to_bytes, cidr_bounds, cidr_addresses, reverse_domain, domain_suffix_prefix
+
+def test_ip_to_bytes_orders_addresses():
+    """测试 IPv4 映射为 16 字节，按字节序比较即按地址大小比较，非法地址返回 None"""
+    assert ip_to_bytes("1.2.3.4") == bytes(10) + b"\xff\xff\x01\x02\x03\x04"
+    assert ip_to_bytes("::1") == bytes(15) + b"\x01"
+    assert ip_to_bytes("10.0.0.9") < ip_to_bytes("10.0.0.10") < ip_to_bytes("10.0.1.0")
+    assert ip_to_bytes("example.com") is None
+    assert ip_to_bytes(None) is None
+
+def test_cidr_bounds():
+    """测试网段起止地址，主机位不为 0 时按所在网段处理"""
+    network, lo, hi = cidr_bounds("203.0.113.77/22")
+    assert network == "203.0.112.0/22"
+    assert (lo, hi) == (ip_to_bytes("203.0.112.0"), ip_to_bytes("203.0.115.255"))
+    network, lo, hi = cidr_bounds("2001:db8::/32")
+    assert (lo, hi) == (ip_to_bytes("2001:db8::"), ip_to_bytes("2001:db8:ffff:ffff:ffff:ffff:ffff:ffff"))
+    assert cidr_addresses("10.1.0.0/16") == ("10.1.0.0", "10.1.255.255")
+    with pytest.raises(ValueError):
+        cidr_bounds("10.0.0.0/33")
+
+def test_compile_filters_with_cidr():
+    """测试 cidr 编译为 ip_bin 范围条件"""
+    compiled = compile_filters(AssetsFilter(cidr="10.0.0.0/8", port=22))
+    assert "ip_bin BETWEEN %(f_cidr_lo)s AND %(f_cidr_hi)s" in compiled.where
+    assert compiled.params["f_cidr_lo"] == ip_to_bytes("10.0.0.0")
+    assert ("ip_bin", "cidr", "10.0.0.0/8") in compiled.predicates
+
+def test_reverse_domain():
+    """测试倒序域名：小写、去掉通配和根点，IP 和空值返回 None"""
+    assert reverse_domain("WWW.Example.com.") == "com.example.www."
+    assert reverse_domain("*.example.com") == "com.example."
+    assert reverse_domain("1.2.3.4") is None
+    assert reverse_domain("") is None
+    assert domain_suffix_prefix(".example.com") == "com.example."
+    with pytest.raises(ValueError):
+        domain_suffix_prefix("..")
+
+def test_compile_filters_with_domain_suffix():
+    """测试 domain_suffix 编译为 domain_rev 前缀匹配，不会匹配到 myexample.com"""
+    compiled = compile_filters(AssetsFilter(domain_suffix="example_1.com"))
+    assert compiled.where == "domain_rev LIKE %(f_domain_suffix)s"
+    assert compiled.params["f_domain_suffix"] == "com.example\\_1.%"
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+from datetime import date
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+import database.partitions as partitions_module
+from database.partitions import plan_partitions, parse_bound, plan_maintenance, maintain, MAX_PARTITION
+
+class FakeConnection:
+    """记录执行的语句，只实现分区维护用到的方法"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def executemany(self, sql, rows):
+        self.statements.append((sql, rows))
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_plan_monthly_partitions():
+    """按月分区：上界为下个月第一天，跨年正确"""
+    partitions = plan_partitions('monthly', date(2024, 11, 15), date(2025, 1, 3))
+    assert partitions == [
+        ('p202411', date(2024, 12, 1)),
+        ('p202412', date(2025, 1, 1)),
+        ('p202501', date(2025, 2, 1)),
+    ]
+
+def test_plan_daily_partitions():
+    """按日分区"""
+    partitions = plan_partitions('daily', date(2024, 2, 28), date(2024, 3, 1))
+    assert [name for name, _ in partitions] == ['p20240228', 'p20240229', 'p20240301']
+    with pytest.raises(ValueError):
+        plan_partitions('weekly', date(2024, 1, 1), date(2024, 1, 2))
+
+def test_parse_bound():
+    """解析 information_schema 中的分区上界"""
+    assert parse_bound("'2024-05-01 00:00:00'") == date(2024, 5, 1)
+    assert parse_bound('MAXVALUE') is None
+    assert parse_bound(None) is None
+
+def test_plan_maintenance_premake_and_drop():
+    """预建后续分区，上界不晚于保留截止日期的分区被删除"""
+    existing = [
+        ('p202401', "'2024-02-01 00:00:00'"),
+        ('p202402', "'2024-03-01 00:00:00'"),
+        ('p202403', "'2024-04-01 00:00:00'"),
+        (MAX_PARTITION, 'MAXVALUE'),
+    ]
+    create, drop = plan_maintenance(existing, 'monthly', 2, 45, date(2024, 3, 20))
+    assert [name for name, _ in create] == ['p202404', 'p202405']
+    # 截止日期 2024-02-04：只有 p202401 的数据全部过期
+    assert drop == ['p202401']
+
+    # 已覆盖到目标周期时不再新建，未设置保留天数时不删除
+    create, drop = plan_maintenance(existing, 'monthly', 0, 0, date(2024, 3, 20))
+    assert create == [] and drop == []
+
+def test_plan_maintenance_catches_up():
+    """维护任务停止一段时间后，补建到当前周期，旧分区全部过期可删除"""
+    existing = [
+        ('p20240101', "'2024-01-02 00:00:00'"),
+        ('p20240102', "'2024-01-03 00:00:00'"),
+        (MAX_PARTITION, 'MAXVALUE'),
+    ]
+    create, drop = plan_maintenance(existing, 'daily', 0, 1, date(2024, 6, 1))
+    assert create[-1][0] == 'p20240601'
+    assert drop == ['p20240101', 'p20240102']
+
+def test_maintain_records_range_tombstones_after_drop(monkeypatch):
+    """删除过期分区后每个分区记一条范围墓碑，不读取分区中的行"""
+    existing = [
+        ('p202401', "'2024-02-01 00:00:00'"),
+        ('p202402', "'2024-03-01 00:00:00'"),
+        ('p202403', "'2024-04-01 00:00:00'"),
+        (MAX_PARTITION, 'MAXVALUE'),
+    ]
+    monkeypatch.setattr(partitions_module, "list_partitions", lambda conn: existing)
+    monkeypatch.setattr(partitions_module, "has_state_table", lambda conn: False)
+    monkeypatch.setattr(partitions_module, "has_cutoffs_table", lambda conn: True)
+    conn = FakeConnection()
+    result = maintain(conn, 'monthly', 0, 40, date(2024, 4, 20))
+    assert result["dropped"] == ['p202401', 'p202402']
+
+    drop_index = next(i for i, (sql, _) in enumerate(conn.statements) if "DROP PARTITION" in sql)
+    sql, rows = conn.statements[drop_index + 1]
+    assert "asset_tombstone_ranges" in sql
+    assert rows == [('p202401', '2024-02-01 00:00:00'), ('p202402', '2024-03-01 00:00:00')]
+    assert not any("PARTITION (" in sql for sql, _ in conn.statements)
+
+def test_maintain_marks_rollup_dirty_around_drop(monkeypatch):
+    """删除分区前后标记汇总表失效，不扫描过期分区扣除计数"""
+    existing = [
+        ('p202401', "'2024-02-01 00:00:00'"),
+        ('p202402', "'2024-03-01 00:00:00'"),
+        (MAX_PARTITION, 'MAXVALUE'),
+    ]
+    conn = FakeConnection()
+    monkeypatch.setattr(partitions_module, "list_partitions", lambda conn: existing)
+    monkeypatch.setattr(partitions_module, "has_cutoffs_table", lambda conn: False)
+    monkeypatch.setattr(partitions_module, "has_state_table", lambda conn: True)
+    monkeypatch.setattr(partitions_module, "mark_dirty", lambda conn: conn.statements.append(("MARK DIRTY", None)))
+    monkeypatch.setattr(partitions_module, "is_dirty", lambda conn: True)
+    result = maintain(conn, 'monthly', 0, 40, date(2024, 4, 20))
+    assert result["dropped"] == ['p202401', 'p202402']
+    assert result["facets_dirty"]
+    statements = [sql for sql, _ in conn.statements if sql == "MARK DIRTY" or "DROP PARTITION" in sql]
+    assert statements == ["MARK DIRTY", "ALTER TABLE assets DROP PARTITION p202401, p202402", "MARK DIRTY"]
+    assert not any("PARTITION (" in sql for sql, _ in conn.statements)
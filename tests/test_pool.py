@@ -0,0 +1,190 @@
+import sys
+from pathlib import Path
+import threading
+import time
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from mysql.connector import Error
+import database.pool as pool_module
+from database.pool import MySQLConnectionPool, PoolTimeout
+
+class FakeConnection:
+    """模拟 mysql.connector 连接，只实现连接池用到的方法"""
+
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.in_transaction = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise Error("Lost connection")
+
+    def is_connected(self):
+        return self.alive
+
+    def consume_results(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def connect(**kwargs):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", connect)
+    return created
+
+def test_pool_reuses_connections(connections):
+    """测试连接归还后被复用"""
+    pool = MySQLConnectionPool({}, min_size=1, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(connections) == 1
+
+def test_pool_acquire_timeout(connections):
+    """测试连接用尽时等待超时"""
+    pool = MySQLConnectionPool({}, min_size=0, max_size=1, acquire_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+def test_pool_waiter_gets_released_connection(connections):
+    """测试等待中的线程拿到归还的连接"""
+    pool = MySQLConnectionPool({}, min_size=0, max_size=1, acquire_timeout=1)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    assert pool.acquire() is conn
+
+def test_pool_reconnects_dead_connection(connections):
+    """测试空闲连接探活失败后自动重连"""
+    pool = MySQLConnectionPool({}, min_size=1, max_size=1, ping_interval=0)
+    dead = connections[0]
+    dead.alive = False
+    conn = pool.acquire()
+    assert conn is not dead
+    assert dead.closed
+    assert pool.stats()["reconnects"] == 1
+
+def test_pool_recycles_old_connection(connections):
+    """测试超过最大存活时间的连接被回收"""
+    pool = MySQLConnectionPool({}, min_size=1, max_size=1, max_lifetime=0.01)
+    old = connections[0]
+    time.sleep(0.02)
+    assert pool.acquire() is not old
+    assert pool.stats()["recycled"] == 1
+
+def test_pool_rolls_back_on_release(connections):
+    """测试归还时回滚未提交的事务"""
+    pool = MySQLConnectionPool({}, min_size=1, max_size=1)
+    with pool.connection() as conn:
+        conn.in_transaction = True
+    assert conn.rollbacks == 1
+
+def test_pool_discards_broken_connection(connections):
+    """测试出错且已断开的连接不会归还到池中"""
+    pool = MySQLConnectionPool({}, min_size=1, max_size=1)
+    with pytest.raises(Error):
+        with pool.connection() as conn:
+            conn.alive = False
+            raise Error("Lost connection")
+    assert conn.closed
+    wait_replenished(pool)
+    stats = pool.stats()
+    assert stats["size"] == 1 and stats["idle"] == 1
+    assert pool.acquire() is not conn
+
+def wait_replenished(pool):
+    if pool._replenisher is not None:
+        pool._replenisher.join(timeout=5)
+
+def test_pool_replenishes_to_min_size(connections, monkeypatch):
+    """测试丢弃连接后在后台补足到 min_size；建连失败时由之后的借出补足"""
+    pool = MySQLConnectionPool({}, min_size=2, max_size=4)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first, discard=True)
+    wait_replenished(pool)
+    pool.release(second, discard=True)
+    wait_replenished(pool)
+    stats = pool.stats()
+    assert stats["size"] == 2 and stats["idle"] == 2
+    assert first.closed and second.closed
+
+    def refuse(**kwargs):
+        raise Error("Can't connect")
+
+    original = pool_module.mysql.connector.connect
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", refuse)
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+    wait_replenished(pool)
+    assert pool.stats()["size"] == 1
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", original)
+    conn = pool.acquire()
+    wait_replenished(pool)
+    stats = pool.stats()
+    assert stats["size"] == 2 and stats["in_use"] == 1
+    pool.release(conn)
+
+def test_pool_replenish_does_not_block_borrower(connections, monkeypatch):
+    """测试补足连接在后台进行，借出连接的线程不等待建连"""
+    pool = MySQLConnectionPool({}, min_size=2, max_size=4)
+    pool.release(pool.acquire(), discard=True)
+    wait_replenished(pool)
+    gate = threading.Event()
+    original = pool_module.mysql.connector.connect
+
+    def slow_connect(**kwargs):
+        gate.wait(5)
+        return original(**kwargs)
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", slow_connect)
+    conn = pool.acquire()
+    started = time.monotonic()
+    pool.release(conn, discard=True)  # 低于 min_size，后台补足阻塞在建连上
+    borrowed = pool.acquire()
+    assert time.monotonic() - started < 1
+    gate.set()
+    wait_replenished(pool)
+    pool.release(borrowed)
+    assert pool.stats()["size"] == 2
+
+def test_pool_bookkeeping_under_concurrency(connections):
+    """测试多线程同时借出、归还和丢弃时统计与连接登记保持一致"""
+    pool = MySQLConnectionPool({}, min_size=0, max_size=4, max_lifetime=3600)
+
+    def worker():
+        for i in range(200):
+            conn = pool.acquire()
+            pool.release(conn, discard=(i % 10 == 0))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pool.stats()
+    assert stats["acquired"] == 1600
+    assert stats["created"] == len(connections)
+    assert len(pool._created) == stats["size"] == stats["idle"]
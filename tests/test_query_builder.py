@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsFilter
+from services.query_builder import compile_filters, parse_fields, select_clause, SELECTABLE_COLUMNS
+
+def test_compile_empty_filter():
+    """测试无过滤条件"""
+    compiled = compile_filters(AssetsFilter())
+    assert compiled.where == "1=1"
+    assert compiled.params == {}
+
+def test_compile_all_fields():
+    """测试所有过滤字段都会被编译"""
+    filters = AssetsFilter(
+        identifier="abc", ip="1.1.1.1", port=443, domain="example.com",
+        title="登录", product="nginx", country="CN", search_engine="fofa",
+        protocol="https", org="Google", before="2024-03-01", after="20240101"
+    )
+    compiled = compile_filters(filters)
+    assert "identifier = %(f_id)s" in compiled.where
+    assert "port = %(f_port)s" in compiled.where
+    assert "search_engine = %(f_s)s" in compiled.where
+    assert "title LIKE %(f_title)s" in compiled.where
+    assert "as_organization LIKE %(f_org)s" in compiled.where
+    assert compiled.params["f_title"] == "%登录%"
+    assert "product LIKE %(f_product)s" in compiled.where
+    assert compiled.params["f_product"] == "%nginx%"
+    assert compiled.params["f_before"] == "2024-03-01 00:00:00"
+    assert compiled.params["f_after"] == "2024-01-01 00:00:00"
+    assert len(compiled.predicates) == 12
+
+def test_compile_escapes_like_wildcards():
+    """测试 LIKE 通配符转义"""
+    compiled = compile_filters(title="100%_off")
+    assert compiled.params["f_title"] == "%100\\%\\_off%"
+
+def test_compile_delete_conditions():
+    """测试删除接口的条件"""
+    compiled = compile_filters(
+        search_engine="fofa", country_name="中国", date_limit=datetime(2024, 1, 1)
+    )
+    assert compiled.where == (
+        "search_engine = %(f_search_engine)s AND country_name LIKE %(f_country_name)s"
+        " AND lastupdatetime < %(f_date_limit)s"
+    )
+    assert compiled.params["f_date_limit"] == "2024-01-01 00:00:00"
+
+def test_compile_same_shape_reuses_where():
+    """测试相同查询形状复用同一条件字符串"""
+    first = compile_filters(AssetsFilter(ip="1.1.1.1", port=80))
+    second = compile_filters(AssetsFilter(ip="2.2.2.2", port=8080))
+    assert first.where is second.where
+    assert first.key != second.key
+
+def test_compile_invalid_time():
+    """测试无法解析的时间"""
+    with pytest.raises(ValueError):
+        compile_filters(AssetsFilter(before="yesterday"))
+
+def test_parse_fields():
+    """测试字段投影解析"""
+    assert parse_fields(None) is None
+    assert parse_fields("ip, port,domain,ip") == ("ip", "port", "domain")
+    assert select_clause(parse_fields("ip,port")) == "ip, port"
+    assert select_clause(None) == ", ".join(SELECTABLE_COLUMNS)
+    with pytest.raises(ValueError):
+        parse_fields("ip,password")
@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from database.repositories import SQLiteAssetsRepository, ReplicatedAssetsRepository, read_from_primary
+from schemas.assets import AssetsCreate
+from services.query_builder import compile_filters
+from services.assets import AssetsService
+
+def make_row(ip, port):
+    return AssetsService.to_row(AssetsCreate(
+        identifier=f"{ip}:{port}",
+        url=f"http://{ip}:{port}",
+        timestamp="2024-01-01 00:00:00",
+        search_engine="fofa",
+        query_statements="test",
+        ip=ip,
+        port=port
+    ))
+
+def open_instances(tmp_path, sizes):
+    """多个独立的本地数据库实例，各写入不同条数，通过计数区分读取来源"""
+    instances = []
+    for index, size in enumerate(sizes):
+        repo = SQLiteAssetsRepository(str(tmp_path / f"db{index}.db"), readers=2)
+        asyncio.run(repo.upsert_batch([make_row(f"10.0.{index}.{i}", 80) for i in range(size)]))
+        instances.append(repo)
+    return instances
+
+@pytest.fixture
+def instances(tmp_path):
+    primary, replica1, replica2 = open_instances(tmp_path, [3, 1, 2])
+    yield primary, replica1, replica2
+
+def make_repository(instances, **options):
+    primary, replica1, replica2 = instances
+    return ReplicatedAssetsRepository(primary, [replica1, replica2], **options)
+
+def counts(repository, times):
+    async def main():
+        return [await repository.count(compile_filters()) for _ in range(times)]
+    return asyncio.run(main())
+
+def test_reads_round_robin_writes_primary(instances):
+    """读请求轮询分发到副本，写入只进入主库"""
+    repository = make_repository(instances)
+    assert sorted(counts(repository, 4)) == [1, 1, 2, 2]
+
+    asyncio.run(repository.insert(make_row("10.9.9.9", 80)))
+    primary, replica1, replica2 = instances
+    assert asyncio.run(primary.count(compile_filters())) == 4
+    assert asyncio.run(replica1.count(compile_filters())) == 1
+    assert repository.stats()["primary_reads"] == 0
+    asyncio.run(repository.close())
+
+def test_read_your_writes_uses_primary(instances):
+    """read_from_primary() 内的读取走主库"""
+    repository = make_repository(instances)
+
+    async def main():
+        with read_from_primary():
+            return await repository.count(compile_filters())
+
+    assert asyncio.run(main()) == 3
+    assert repository.stats()["primary_reads"] == 1
+    asyncio.run(repository.close())
+
+def test_lagging_replica_falls_back(instances):
+    """延迟超过阈值的副本不参与读取，全部落后时回退主库"""
+    primary, replica1, replica2 = instances
+    lag = {replica1: 30.0, replica2: 0.5}
+    for replica in (replica1, replica2):
+        replica.replication_lag = lambda replica=replica: asyncio.sleep(0, lag[replica])
+    repository = make_repository(instances, max_lag=5.0, lag_check_interval=0)
+
+    assert counts(repository, 3) == [2, 2, 2]
+    lag[replica2] = float('inf')  # 复制中断
+    assert counts(repository, 2) == [3, 3]
+    stats = repository.stats()
+    assert [r["healthy"] for r in stats["replicas"]] == [False, False]
+    assert stats["fallbacks"] == 2
+    asyncio.run(repository.close())
+
+def test_failed_replica_falls_back(instances):
+    """副本读取失败时本次回退主库，并在下次延迟检查前不再使用该副本"""
+    primary, replica1, replica2 = instances
+
+    async def broken(compiled):
+        raise RuntimeError("replica down")
+
+    replica1.count = broken
+    replica2.count = broken
+    repository = make_repository(instances, lag_check_interval=60)
+    assert counts(repository, 3) == [3, 3, 3]
+    stats = repository.stats()
+    assert [r["errors"] for r in stats["replicas"]] == [1, 1]
+    asyncio.run(repository.close())
+
+def test_least_busy_strategy(instances):
+    """least_busy 选择进行中请求最少的副本"""
+    repository = make_repository(instances, strategy="least_busy")
+    repository.replicas[0].in_flight = 5
+    assert counts(repository, 2) == [2, 2]
+    with pytest.raises(ValueError):
+        make_repository(instances, strategy="random")
+    asyncio.run(repository.close())
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+import services.retention as retention_module
+from services.retention import PartitionMaintainer
+
+def test_run_once_records_backend_errors(monkeypatch):
+    """测试获取数据库失败时记录错误并返回 None，不抛出"""
+    def broken_db():
+        raise RuntimeError("数据库未初始化")
+
+    monkeypatch.setattr(retention_module, "get_db", broken_db)
+    maintainer = PartitionMaintainer(mode='monthly', interval=60)
+    assert asyncio.run(maintainer.run_once()) is None
+    stats = maintainer.stats()
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "数据库未初始化"
+
+def test_loop_survives_errors(monkeypatch):
+    """测试单次维护抛出异常后定时任务继续运行"""
+    calls = []
+
+    async def flaky_run_once(self):
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(PartitionMaintainer, "run_once", flaky_run_once)
+
+    async def main():
+        maintainer = PartitionMaintainer(mode='monthly', interval=0.01)
+        await maintainer.start()
+        await asyncio.sleep(0.05)
+        running = maintainer.running
+        await maintainer.stop()
+        return running
+
+    assert asyncio.run(main())
+    assert len(calls) >= 2
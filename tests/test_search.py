@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from schemas.assets import AssetsFilter
+from services.query_builder import compile_filters, SEARCH_MATCH_SQL, SEARCH_PARAM
+from services.search import tokens, search_text, parse_query, mysql_boolean_query, fts5_query, tsquery
+
+def test_tokens_split_cjk_into_bigrams():
+    """测试中日韩文字切为重叠二元组并补末尾单字，拉丁字母按单词切分"""
+    assert tokens("Nginx 用户登录") == ["nginx", "用户", "户登", "登录", "录"]
+    assert tokens("login.Example.com 云") == ["login", "example", "com", "云"]
+    assert search_text("阿里云", None, "a.cn") == "阿里 里云 云 a cn"
+
+def test_parse_query_terms():
+    """测试检索词规范化、去重和校验"""
+    assert parse_query("用户登录  Example.COM example.com") == ("用户登录", "example com")
+    with pytest.raises(ValueError):
+        parse_query("!! --")
+    with pytest.raises(ValueError):
+        parse_query(" ".join(f"w{i}" for i in range(20)))
+
+def test_backend_query_syntax():
+    """测试各后端的检索串"""
+    terms = ("用户登录", "nginx")
+    assert mysql_boolean_query(terms) == '+"用户登录" +"nginx"'
+    assert fts5_query(terms) == '"用户 户登 登录 录"* AND "nginx"*'
+    assert tsquery(terms) == "('用户' <-> '户登' <-> '登录' <-> '录':*) & ('nginx':*)"
+
+def test_compile_filters_with_search():
+    """测试 q 编译为 MySQL 全文匹配，谓词中保留检索词"""
+    compiled = compile_filters(AssetsFilter(q="用户登录", port=80))
+    assert SEARCH_MATCH_SQL in compiled.where
+    assert compiled.params[SEARCH_PARAM] == '+"用户登录"'
+    assert compiled.search == ("用户登录",)
+    assert compile_filters(AssetsFilter(port=80)).search is None
+    assert compiled.key != compile_filters(AssetsFilter(q="登录", port=80)).key
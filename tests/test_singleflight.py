@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from services.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_query():
+    """测试并发的相同查询只执行一次"""
+    flight = SingleFlight()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    async def main():
+        return await asyncio.gather(*[flight.do("k", loader) for _ in range(20)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == [1, 2, 3] for r in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 19, "inflight": 0}
+
+def test_different_keys_run_separately():
+    """测试不同查询互不合并"""
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0.01, result="a")),
+            flight.do("b", lambda: asyncio.sleep(0.01, result="b")),
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert flight.stats()["executed"] == 2
+
+def test_error_is_shared_and_not_cached():
+    """测试异常传递给所有等待者，且之后的调用会重新执行"""
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            *[flight.do("k", failing) for _ in range(3)], return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await flight.do("k", failing)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_cancelled_waiter_does_not_cancel_query():
+    """测试某个等待者取消不影响其他等待者"""
+    flight = SingleFlight()
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(0.02, result=1)))
+        second = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(0.02, result=2)))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 1
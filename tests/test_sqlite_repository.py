@@ -0,0 +1,247 @@
+import sys
+from pathlib import Path
+import asyncio
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import pytest
+from database.repositories import SQLiteAssetsRepository
+from schemas.assets import AssetsCreate, AssetsFilter
+from services.query_builder import compile_filters
+from services.assets import AssetsService
+
+def make_row(ip, port, **fields):
+    data = {
+        "identifier": f"{ip}:{port}",
+        "url": f"http://{ip}:{port}",
+        "timestamp": "2024-01-01 00:00:00",
+        "search_engine": "fofa",
+        "query_statements": "test",
+        "ip": ip,
+        "port": port,
+    }
+    data.update(fields)
+    return AssetsService.to_row(AssetsCreate(**data))
+
+@pytest.fixture
+def repository(tmp_path):
+    repo = SQLiteAssetsRepository(str(tmp_path / "assets.db"), readers=2)
+    yield repo
+    asyncio.run(repo.close())
+
+def test_sqlite_uses_wal(repository):
+    """测试数据库以 WAL 模式打开"""
+    assert repository.journal_mode == "wal"
+
+def test_sqlite_upsert_counts(repository):
+    """测试批量 upsert 区分插入和更新"""
+    async def main():
+        first = await repository.upsert_batch([make_row("1.1.1.1", 80), make_row("1.1.1.2", 80)])
+        second = await repository.upsert_batch([
+            make_row("1.1.1.1", 80, title="new"),
+            make_row("1.1.1.3", None),
+        ])
+        rows = await repository.select(compile_filters(ip="1.1.1.1"), 0, 10)
+        return first, second, rows, await repository.count(compile_filters())
+
+    first, second, rows, total = asyncio.run(main())
+    assert first == 0
+    assert second == 1
+    assert rows[0]["title"] == "new"
+    assert total == 3
+
+def test_sqlite_get_by_keys(repository):
+    """测试按 (ip, port) 读回已写入的行，port 为空的键匹配该 ip 下 port 为空的行"""
+    async def main():
+        await repository.upsert_batch([
+            make_row("1.1.1.1", 80), make_row("1.1.1.1", 443), make_row("1.1.1.2", None)
+        ])
+        return await repository.get_by_keys([("1.1.1.1", 80), ("1.1.1.2", None), ("9.9.9.9", 80)])
+
+    rows = asyncio.run(main())
+    assert sorted((row["ip"], row["port"]) for row in rows) == [("1.1.1.1", 80), ("1.1.1.2", None)]
+    assert all(row["id"] and row["updated_at"] for row in rows)
+
+def test_sqlite_filters_escape_like(repository):
+    """测试 LIKE 条件中的 % 和 _ 按字面匹配"""
+    async def main():
+        await repository.insert(make_row("2.2.2.1", 80, title="100% ok"))
+        await repository.insert(make_row("2.2.2.2", 80, title="1000 ok"))
+        return await repository.select(compile_filters(title="0% o"), 0, 10)
+
+    rows = asyncio.run(main())
+    assert [row["ip"] for row in rows] == ["2.2.2.1"]
+
+def test_sqlite_keyset_and_iter_chunks(repository):
+    """测试按 id 游标翻页和分块遍历"""
+    async def main():
+        await repository.upsert_batch([make_row(f"3.3.3.{i}", 80) for i in range(5)])
+        page = await repository.select(compile_filters(), 0, 2, after_id=2)
+        chunks = [rows async for rows in repository.iter_chunks(compile_filters(), 2, ("ip",))]
+        return page, chunks
+
+    page, chunks = asyncio.run(main())
+    assert [row["id"] for row in page] == [3, 4]
+    assert [len(rows) for rows in chunks] == [2, 2, 1]
+    assert chunks[0][0] == {"ip": "3.3.3.0"}
+
+def test_sqlite_delete_batch(repository):
+    """测试按条件分批删除，返回被删除的行和本批最后一个 id"""
+    async def main():
+        await repository.upsert_batch([
+            make_row("4.4.4.1", 80, lastupdatetime="2023-01-01 00:00:00"),
+            make_row("4.4.4.2", 80, lastupdatetime="2024-06-01 00:00:00"),
+        ])
+        deleted, last_id = await repository.delete_batch(compile_filters(before="2024-01-01"), 0, 100)
+        done = await repository.delete_batch(compile_filters(before="2024-01-01"), last_id, 100)
+        return deleted, last_id, done, await repository.get_by_identifier("4.4.4.2:80")
+
+    deleted, last_id, done, remaining = asyncio.run(main())
+    assert [row["id"] for row in deleted] == [last_id]
+    assert done == ([], None)
+    assert remaining["ip"] == "4.4.4.2"
+
+def test_sqlite_fulltext_search(repository):
+    """测试全文检索：中文子串、多个词同时匹配、按相关度排序，修改标题后索引同步"""
+    async def main():
+        await repository.upsert_batch([
+            make_row("3.3.3.1", 80, title="用户登录页面", product="nginx"),
+            make_row("3.3.3.2", 80, title="登录", domain="login.example.com"),
+            make_row("3.3.3.3", 80, title="后台 用户登录 用户登录"),
+            make_row("3.3.3.4", 80, title="阿里云"),
+        ])
+        found = {}
+        for q in ["用户登录", "nginx 登录", "example.com", "云"]:
+            rows = await repository.select(compile_filters(AssetsFilter(q=q)), 0, 10)
+            found[q] = [row["ip"] for row in rows]
+        await repository.upsert_batch([make_row("3.3.3.4", 80, title="腾讯云")])
+        found["阿里"] = await repository.count(compile_filters(AssetsFilter(q="阿里")))
+        return found
+
+    found = asyncio.run(main())
+    assert found["用户登录"] == ["3.3.3.3", "3.3.3.1"]
+    assert found["nginx 登录"] == ["3.3.3.1"]
+    assert found["example.com"] == ["3.3.3.2"]
+    assert found["云"] == ["3.3.3.4"]
+    assert found["阿里"] == 0
+
+def test_sqlite_cidr_filter(tmp_path):
+    """测试 cidr 网段过滤，旧数据库打开时补列并回填 ip_bin"""
+    import sqlite3
+    path = str(tmp_path / "old.db")
+    repository = SQLiteAssetsRepository(path, readers=1)
+    asyncio.run(repository.upsert_batch([make_row("10.1.2.3", 80)]))
+    asyncio.run(repository.close())
+    conn = sqlite3.connect(path)
+    conn.executescript("DROP INDEX idx_assets_ip_bin_port; ALTER TABLE assets DROP COLUMN ip_bin;")
+    conn.close()
+    repository = SQLiteAssetsRepository(path, readers=1)
+
+    async def main():
+        await repository.upsert_batch([
+            make_row("10.1.200.1", 80),
+            make_row("10.2.0.1", 80),
+            make_row("2001:db8::5", 80),
+            make_row("example.com", 80),
+        ])
+        found = {}
+        for cidr in ["10.1.0.0/16", "10.0.0.0/8", "2001:db8::/32"]:
+            rows = await repository.select(compile_filters(AssetsFilter(cidr=cidr)), 0, 10)
+            found[cidr] = sorted(row["ip"] for row in rows)
+        rows = await repository.select(compile_filters(AssetsFilter(port=80)), 0, 1)
+        await repository.close()
+        return found, rows[0]
+
+    found, row = asyncio.run(main())
+    assert found["10.1.0.0/16"] == ["10.1.2.3", "10.1.200.1"]
+    assert found["10.0.0.0/8"] == ["10.1.2.3", "10.1.200.1", "10.2.0.1"]
+    assert found["2001:db8::/32"] == ["2001:db8::5"]
+    assert "ip_bin" not in row
+
+def test_sqlite_domain_suffix_filter(repository):
+    """测试 domain_suffix 匹配域名本身及全部子域名，写入更新域名后同步"""
+    async def main():
+        await repository.upsert_batch([
+            make_row("5.5.5.1", 80, domain="example.com"),
+            make_row("5.5.5.2", 80, domain="www.Example.com"),
+            make_row("5.5.5.3", 80, domain="a.b.example.com"),
+            make_row("5.5.5.4", 80, domain="myexample.com"),
+            make_row("5.5.5.5", 80, domain="example.com.cn"),
+        ])
+        await repository.upsert_batch([make_row("5.5.5.3", 80, domain="a.b.example.org")])
+        found = {}
+        for suffix in ["example.com", "b.example.com", "*.example.org"]:
+            rows = await repository.select(compile_filters(AssetsFilter(domain_suffix=suffix)), 0, 10)
+            found[suffix] = sorted(row["ip"] for row in rows)
+        return found
+
+    found = asyncio.run(main())
+    assert found["example.com"] == ["5.5.5.1", "5.5.5.2"]
+    assert found["b.example.com"] == []
+    assert found["*.example.org"] == ["5.5.5.3"]
+
+def test_sqlite_facets_rollup(repository):
+    """测试汇总表随插入、upsert 修改和删除增量更新，结果与扫描原表及全量重建一致"""
+    async def main():
+        await repository.upsert_batch([
+            make_row("6.6.6.1", 80, country_name="中国", protocol="http"),
+            make_row("6.6.6.2", 443, country_name="中国", protocol="https"),
+            make_row("6.6.6.3", 80, country_name="美国", protocol="http"),
+            make_row("6.6.6.4", 22, country_name="", protocol="ssh"),
+        ])
+        await repository.upsert_batch([make_row("6.6.6.3", 80, country_name="中国", protocol="http")])
+        await repository.delete_batch(compile_filters(AssetsFilter(ip="6.6.6.2")), 0, 100)
+        columns = ("country_name", "port")
+        rollup = await repository.facets(compile_filters(AssetsFilter(protocol="http")), columns, 10)
+        everything = await repository.facets(compile_filters(), columns, 1)
+        scan = await repository.facets(compile_filters(AssetsFilter(protocol="http", title="")), columns, 10)
+        scanned = await repository.facets(compile_filters(AssetsFilter(ip="6.6.6.4")), columns, 10)
+        groups = await repository.rebuild_facets()
+        rebuilt = await repository.facets(compile_filters(), columns, 1)
+        return rollup, everything, scan, scanned, groups, rebuilt
+
+    rollup, everything, scan, scanned, groups, rebuilt = asyncio.run(main())
+    assert rollup["source"] == "rollup"
+    assert rollup["total"] == 2
+    assert rollup["facets"] == {
+        "country_name": [{"value": "中国", "count": 2}],
+        "port": [{"value": 80, "count": 2}],
+    }
+    assert everything["facets"]["country_name"] == [{"value": "中国", "count": 2}]
+    assert everything["total"] == 3
+    assert scan["facets"] == rollup["facets"]
+    assert scanned["source"] == "scan"
+    assert scanned["facets"]["country_name"] == [{"value": None, "count": 1}]
+    assert groups == 2
+    assert rebuilt == everything
+
+def test_sqlite_delta_sync(repository):
+    """测试增量同步：按 (updated_at, id) 分页，内容不变的 upsert 不算变更，删除写入墓碑"""
+    start = ("1970-01-01 00:00:00", 0)
+
+    async def main():
+        await repository.upsert_batch([make_row("7.7.7.1", 80), make_row("7.7.7.2", 80), make_row("7.7.7.3", 443)])
+        # updated_at 为毫秒精度，until 不包含当前这一毫秒
+        await asyncio.sleep(0.01)
+        first = await repository.delta(compile_filters(AssetsFilter(port=80)), start, None, 1, 0)
+        everything = await repository.delta(compile_filters(), start, start, 10, 0)
+        until = everything["until"]
+        await repository.upsert_batch([make_row("7.7.7.1", 80), make_row("7.7.7.2", 80, title="changed")])
+        deleted, _ = await repository.delete_batch(compile_filters(AssetsFilter(port=443)), 0, 10)
+        await asyncio.sleep(0.01)
+        later = await repository.delta(compile_filters(), (until, 0), (until, 0), 10, 0)
+        settling = await repository.delta(compile_filters(), (until, 0), (until, 0), 10, 60)
+        return first, everything, deleted, later, settling
+
+    first, everything, deleted, later, settling = asyncio.run(main())
+    assert [row["ip"] for row in first["items"]] == ["7.7.7.1"]
+    assert [row["ip"] for row in everything["items"]] == ["7.7.7.1", "7.7.7.2", "7.7.7.3"]
+    assert everything["deleted"] == []
+    assert all(row["updated_at"] < everything["until"] for row in everything["items"])
+    assert deleted == [{"id": everything["items"][2]["id"]}]
+    assert [row["ip"] for row in later["items"]] == ["7.7.7.2"]
+    assert later["items"][0]["title"] == "changed"
+    assert [(row["asset_id"], row["ip"], row["port"]) for row in later["deleted"]] == [(deleted[0]["id"], "7.7.7.3", 443)]
+    assert settling["items"] == [] and settling["deleted"] == []
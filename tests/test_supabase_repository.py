@@ -0,0 +1,146 @@
+import sys
+from pathlib import Path
+import asyncio
+import json
+
+# 添加项目根目录到系统路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+import httpx
+import pytest
+from database.repositories import PooledAsyncPostgrestClient, SupabaseAssetsRepository, InsertBatcher
+from schemas.assets import ASSET_COLUMNS
+from services.query_builder import compile_filters
+
+def make_repository(handler, **kwargs):
+    """使用 httpx MockTransport 模拟 PostgREST 服务"""
+    client = PooledAsyncPostgrestClient("http://postgrest/rest/v1")
+    client.session = httpx.AsyncClient(
+        base_url="http://postgrest/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    return SupabaseAssetsRepository(client, **kwargs)
+
+def test_client_uses_configured_pool():
+    """测试客户端使用配置的连接池大小和 HTTP/2"""
+    client = PooledAsyncPostgrestClient("http://postgrest/rest/v1", max_connections=3, http2=True)
+    pool = client.session._transport._pool
+    assert pool._max_connections == 3
+    assert pool._http2
+    asyncio.run(client.aclose())
+
+def test_large_page_split_into_parallel_ranges():
+    """测试超过单次上限的分页拆成多个 range 请求"""
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params)
+        offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+        return httpx.Response(200, json=[{"id": i} for i in range(offset, offset + limit)])
+
+    repository = make_repository(handler, read_chunk_size=2, parallel_reads=2)
+    rows = asyncio.run(repository.select(compile_filters(), 1, 5))
+    assert [row["id"] for row in rows] == [1, 2, 3, 4, 5]
+    assert sorted((p["offset"], p["limit"]) for p in requests) == [("1", "2"), ("3", "2"), ("5", "1")]
+    assert all(p["order"] == "id" for p in requests)
+
+    # 单次读取的小页同样按 id 排序
+    requests.clear()
+    asyncio.run(repository.select(compile_filters(), 0, 2))
+    assert requests[0]["order"] == "id"
+
+def test_keyset_page_reads_sequential_chunks():
+    """测试游标翻页超过单次上限时按 id 依次读取"""
+    def handler(request):
+        after = int(request.url.params["id"].split(".")[1])
+        limit = int(request.url.params["limit"])
+        return httpx.Response(200, json=[{"id": i} for i in range(after + 1, min(after + limit, 6) + 1)])
+
+    repository = make_repository(handler, read_chunk_size=2)
+    rows = asyncio.run(repository.select(compile_filters(), 0, 10, after_id=0))
+    assert [row["id"] for row in rows] == [1, 2, 3, 4, 5, 6]
+
+def test_concurrent_inserts_are_batched():
+    """测试并发的单条插入合并为一次请求，只返回接口字段"""
+    bodies = []
+    selects = []
+
+    def handler(request):
+        rows = json.loads(request.content)
+        bodies.append(rows)
+        selects.append(request.url.params.get("select"))
+        return httpx.Response(201, json=[{**row, "id": i} for i, row in enumerate(rows, 1)])
+
+    repository = make_repository(handler, insert_batch_size=10, insert_batch_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*[repository.insert({"ip": f"1.1.1.{i}"}) for i in range(5)])
+
+    created = asyncio.run(main())
+    assert len(bodies) == 1
+    assert [row["ip"] for row in created] == [f"1.1.1.{i}" for i in range(5)]
+    assert repository.stats()["insert_batching"]["batches"] == 1
+    assert selects[0].split(",") == ["id", *ASSET_COLUMNS]
+
+def test_failed_batch_retries_rows_individually():
+    """测试批量插入失败时逐条重试，只有出错的记录失败"""
+    async def send(rows):
+        if any(row["bad"] for row in rows):
+            raise ValueError("bad row")
+        return rows
+
+    async def main():
+        batcher = InsertBatcher(send, max_batch=3, max_delay=1)
+        return await asyncio.gather(
+            *[batcher.submit({"n": i, "bad": i == 1}) for i in range(3)],
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert results[0] == {"n": 0, "bad": False}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"n": 2, "bad": False}
+
+def test_search_uses_ranked_rpc():
+    """测试全文检索通过 search_assets 函数按相关度查询，其他条件作为过滤参数"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": 2}, {"id": 1}])
+
+    repository = make_repository(handler)
+    compiled = compile_filters(q="用户登录", port=80)
+    rows = asyncio.run(repository.select(compiled, 0, 10))
+    assert [row["id"] for row in rows] == [2, 1]
+    request = requests[0]
+    assert request.url.path.endswith("/rpc/search_assets")
+    assert json.loads(request.content) == {"query": "('用户' <-> '户登' <-> '登录' <-> '录':*)"}
+    assert request.url.params["port"] == "eq.80"
+    assert "search_vector" not in request.url.params["select"]
+
+def test_upsert_lookup_pages_existing_rows(monkeypatch):
+    """测试 upsert 预查已存在的行时按 ip 分组、组内按 id 翻页，计数不受单次响应上限截断"""
+    import database.repositories.supabase as supabase_module
+    monkeypatch.setattr(supabase_module, "KEY_LOOKUP_CHUNK", 2)
+    stored = [{"id": i + 1, "ip": f"10.0.0.{i % 3}", "port": 8000 + i} for i in range(7)]
+    lookups = []
+
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(201, json=[])
+        params = request.url.params
+        ips = params["ip"][len("in.("):-1].split(",")
+        after, limit = int(params["id"].split(".")[1]), int(params["limit"])
+        lookups.append((tuple(ips), after))
+        assert params["order"] == "id"
+        rows = [row for row in stored if row["ip"] in ips and row["id"] > after]
+        return httpx.Response(200, json=rows[:limit])
+
+    repository = make_repository(handler, read_chunk_size=2)
+    rows = [{"ip": row["ip"], "port": row["port"]} for row in stored] + [{"ip": "10.0.0.9", "port": 80}]
+    updated = asyncio.run(repository.upsert_batch(rows))
+    assert updated == 7
+    assert all(len(ips) <= 2 for ips, _ in lookups)
+    assert len(lookups) > 2